@@ -0,0 +1,351 @@
+"""
+Модуль расчета показателей доступности узлов и сетей по истории состояний
+(таблица member_history): процент времени онлайн, количество сбоев,
+среднее время между сбоями (MTBF) и самый долгий сбой за произвольный период.
+
+История хранит только смены статуса, поэтому за месяц по тысячам узлов
+загружается немного строк. Расчет выполняется векторными проходами NumPy
+по массивам, без циклов Python по строкам. Если NumPy не установлен,
+используется эквивалентный, но более медленный расчет на чистом Python.
+
+Статус узла действует до его следующей смены, но учитывается только внутри
+периодов работы мониторинга (таблица monitor_sessions): время, пока скрипт
+был остановлен, не считается ни доступностью, ни простоем.
+
+Там же формируется сводка по инцидентам (таблица incidents) с MTTR.
+
+Запуск: python analytics.py [--since ДАТА] [--until ДАТА] [--members N]
+"""
+
+import argparse
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import database_manager as db
+import settings
+import state_backend
+import utils
+from models import MemberAvailability, NetworkAvailability
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def load_status_changes(start_ts: int, end_ts: int) -> tuple[array, array, array]:
+    """
+    Загружает смены статуса за период в компактные массивы (node_id, ts, online).
+    Статус на начало периода записывается со временем start_ts.
+    """
+    node_ids, timestamps, online = array("q"), array("q"), array("b")
+    for node_id, ts, is_online in db.iter_status_changes(start_ts, end_ts):
+        node_ids.append(node_id)
+        timestamps.append(max(ts, start_ts))
+        online.append(1 if is_online else 0)
+    return node_ids, timestamps, online
+
+
+def load_coverage(start_ts: int, end_ts: int) -> tuple[list[int], list[int]]:
+    """
+    Загружает периоды работы мониторинга, обрезанные по границам периода.
+
+    Returns:
+        Кортеж (начала периодов, накопленное время наблюдения до начала
+        каждого периода и итоговое - последним элементом).
+    """
+    starts, cumulative = [], [0]
+    for session_start, session_end in db.get_monitor_sessions(start_ts, end_ts):
+        session_start = max(session_start, start_ts)
+        session_end = min(session_end, end_ts)
+        starts.append(session_start)
+        cumulative.append(cumulative[-1] + max(session_end - session_start, 0))
+    return starts, cumulative
+
+
+def _compute_numpy(
+    node_ids: array, timestamps: array, online: array, end_ts: int, coverage
+) -> list[MemberAvailability]:
+    """Векторный расчет показателей доступности с помощью NumPy."""
+    nodes = numpy.frombuffer(node_ids, dtype=numpy.int64)
+    ts = numpy.frombuffer(timestamps, dtype=numpy.int64)
+    is_online = numpy.frombuffer(online, dtype=numpy.int8).astype(bool)
+
+    # Сортируем по узлу, затем по времени
+    order = numpy.lexsort((ts, nodes))
+    nodes, ts, is_online = nodes[order], ts[order], is_online[order]
+    same_node_next = nodes[1:] == nodes[:-1]
+
+    # Статус действует до следующей смены узла или до конца периода;
+    # длительность - время наблюдения внутри этого отрезка
+    next_ts = numpy.full_like(ts, end_ts)
+    next_ts[:-1] = numpy.where(same_node_next, ts[1:], end_ts)
+    session_starts = numpy.asarray(coverage[0], dtype=numpy.int64)
+    cumulative = numpy.asarray(coverage[1], dtype=numpy.int64)
+    session_lengths = numpy.diff(cumulative)
+
+    def covered_until(moments):
+        # Время наблюдения от начала периода до каждого момента
+        index = numpy.searchsorted(session_starts, moments, side="right") - 1
+        safe_index = numpy.maximum(index, 0)
+        inside = numpy.clip(
+            moments - session_starts[safe_index], 0, session_lengths[safe_index]
+        )
+        return numpy.where(index >= 0, cumulative[safe_index] + inside, 0)
+
+    if len(session_starts):
+        duration = (covered_until(next_ts) - covered_until(ts)).astype(numpy.float64)
+    else:
+        duration = numpy.zeros(len(ts))
+
+    unique_nodes, node_index = numpy.unique(nodes, return_inverse=True)
+    node_count = len(unique_nodes)
+    observed = numpy.bincount(node_index, weights=duration, minlength=node_count)
+    uptime = numpy.bincount(
+        node_index, weights=duration * is_online, minlength=node_count
+    )
+
+    # Сбой - переход узла из онлайн в офлайн
+    failure = numpy.zeros(len(ts), dtype=bool)
+    failure[1:] = same_node_next & is_online[:-1] & ~is_online[1:]
+    failures = numpy.bincount(node_index, weights=failure, minlength=node_count)
+
+    # Непрерывные отрезки одного статуса: новый отрезок начинается
+    # при смене узла или статуса (смена только уровня оповещения - нет)
+    run_start = numpy.ones(len(ts), dtype=bool)
+    run_start[1:] = ~same_node_next | (is_online[1:] != is_online[:-1])
+    run_id = numpy.cumsum(run_start) - 1
+    run_duration = numpy.bincount(run_id, weights=duration)
+    run_offline = ~is_online[run_start]
+    longest_outage = numpy.zeros(node_count)
+    numpy.maximum.at(
+        longest_outage, node_index[run_start][run_offline], run_duration[run_offline]
+    )
+
+    return [
+        MemberAvailability(
+            int(unique_nodes[i]),
+            _percent(uptime[i], observed[i]),
+            int(failures[i]),
+            float(uptime[i] / failures[i] / 1000) if failures[i] else None,
+            float(longest_outage[i] / 1000),
+            float(observed[i] / 1000),
+        )
+        for i in range(node_count)
+        if observed[i]
+    ]
+
+
+def _compute_python(
+    node_ids: array, timestamps: array, online: array, end_ts: int, coverage
+) -> list[MemberAvailability]:
+    """Расчет показателей доступности на чистом Python (если нет NumPy)."""
+    session_starts, cumulative = coverage
+
+    def covered_until(moment: int) -> int:
+        index = bisect_right(session_starts, moment) - 1
+        if index < 0:
+            return 0
+        session_length = cumulative[index + 1] - cumulative[index]
+        return cumulative[index] + min(
+            max(moment - session_starts[index], 0), session_length
+        )
+
+    order = sorted(range(len(node_ids)), key=lambda i: (node_ids[i], timestamps[i]))
+    results = []
+    position = 0
+    while position < len(order):
+        node_id = node_ids[order[position]]
+        observed = uptime = longest_outage = current_outage = 0
+        failures = 0
+        previous_online = None
+        while position < len(order) and node_ids[order[position]] == node_id:
+            index = order[position]
+            position += 1
+            has_next = position < len(order) and node_ids[order[position]] == node_id
+            next_ts = timestamps[order[position]] if has_next else end_ts
+            duration = covered_until(next_ts) - covered_until(timestamps[index])
+            is_online = bool(online[index])
+            observed += duration
+            if is_online:
+                uptime += duration
+                current_outage = 0
+            else:
+                if previous_online:
+                    failures += 1
+                current_outage += duration
+                longest_outage = max(longest_outage, current_outage)
+            previous_online = is_online
+        if observed:
+            results.append(
+                MemberAvailability(
+                    node_id,
+                    _percent(uptime, observed),
+                    failures,
+                    uptime / failures / 1000 if failures else None,
+                    longest_outage / 1000,
+                    observed / 1000,
+                )
+            )
+    return results
+
+
+def _percent(part: float, total: float) -> float:
+    """Возвращает долю в процентах, округленную до сотых."""
+    return round(float(100.0 * part / total), 2) if total else 0.0
+
+
+def compute_member_availability(start_ts: int, end_ts: int) -> list[MemberAvailability]:
+    """
+    Рассчитывает показатели доступности каждого узла за период [start_ts; end_ts).
+
+    Returns:
+        Список показателей по узлам, наблюдавшимся в течение периода.
+    """
+    node_ids, timestamps, online = load_status_changes(start_ts, end_ts)
+    if not node_ids:
+        return []
+    coverage = load_coverage(start_ts, end_ts)
+    compute = _compute_numpy if numpy is not None else _compute_python
+    return compute(node_ids, timestamps, online, end_ts, coverage)
+
+
+def compute_network_availability(
+    members: list[MemberAvailability], network_by_node: dict[int, str]
+) -> list[NetworkAvailability]:
+    """
+    Сводит доступность узлов по сетям: доля времени онлайн считается
+    по суммарному времени наблюдения всех узлов сети.
+    """
+    totals: dict[str, list[float]] = {}
+    for member in members:
+        network_id = network_by_node.get(member.node_id) or "?"
+        total = totals.setdefault(network_id, [0.0, 0.0, 0])
+        total[0] += member.uptime_percent * member.observed_seconds
+        total[1] += member.observed_seconds
+        total[2] += 1
+    return [
+        NetworkAvailability(
+            network_id, round(weighted / observed, 2) if observed else 0.0, count
+        )
+        for network_id, (weighted, observed, count) in sorted(totals.items())
+    ]
+
+
+def build_availability_section(
+    start_ts: int,
+    end_ts: int,
+    names: dict[int, str],
+    network_by_node: dict[int, str],
+    worst_count: int,
+) -> str:
+    """
+    Формирует раздел отчета с доступностью сетей и узлов с наименьшей
+    доступностью. Учитываются только узлы из names (ID -> имя).
+    Возвращает пустую строку, если истории за период нет.
+    """
+    members = [
+        member
+        for member in compute_member_availability(start_ts, end_ts)
+        if member.node_id in names
+    ]
+    if not members:
+        return ""
+    hours = round((end_ts - start_ts) / 3_600_000)
+    parts = [settings.t("availability_header", hours=hours)]
+    for network in compute_network_availability(members, network_by_node):
+        parts.append(
+            settings.t(
+                "availability_network_line",
+                network=network.network_id,
+                uptime=network.uptime_percent,
+                members=network.members,
+            )
+        )
+
+    worst = sorted(
+        (member for member in members if member.uptime_percent < 100.0),
+        key=lambda member: member.uptime_percent,
+    )[:worst_count]
+    if worst:
+        parts.append(settings.t("availability_worst_header"))
+        for member in worst:
+            parts.append(
+                settings.t(
+                    "availability_member_line",
+                    name=names.get(member.node_id)
+                    or utils.node_id_to_hex(member.node_id),
+                    uptime=member.uptime_percent,
+                    failures=member.failures,
+                    mtbf=(
+                        settings.t(
+                            "availability_mtbf_hours",
+                            hours=round(member.mtbf_seconds / 3600, 1),
+                        )
+                        if member.mtbf_seconds is not None
+                        else settings.t("availability_mtbf_none")
+                    ),
+                    outage=round(member.longest_outage_seconds / 60),
+                )
+            )
+    return "".join(parts)
+
+
+def build_incident_section(start_ts: int, end_ts: int) -> str:
+    """
+    Формирует раздел отчета с инцидентами за период: открытые и закрытые,
+    среднее время восстановления (MTTR) и число узлов, недоступных сейчас.
+    """
+    summary = db.get_incident_summary(start_ts, end_ts)
+    if not summary.opened and not summary.currently_open:
+        return ""
+    return settings.t(
+        "incidents_summary",
+        hours=round((end_ts - start_ts) / 3_600_000),
+        opened=summary.opened,
+        closed=summary.closed,
+        mttr=(
+            settings.t(
+                "incidents_mttr_minutes", minutes=round(summary.mttr_seconds / 60, 1)
+            )
+            if summary.mttr_seconds is not None
+            else settings.t("incidents_mttr_none")
+        ),
+        open_now=summary.currently_open,
+    )
+
+
+def _parse_datetime(value: str) -> int:
+    """Преобразует аргумент командной строки с датой в миллисекунды Unix."""
+    return utils.parse_datetime_arg(value, settings.t)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=settings.t("analytics_description"))
+    parser.add_argument(
+        "--since", type=_parse_datetime, help=settings.t("analytics_since_help")
+    )
+    parser.add_argument(
+        "--until", type=_parse_datetime, help=settings.t("analytics_until_help")
+    )
+    parser.add_argument(
+        "--members", type=int, default=20, help=settings.t("analytics_members_help")
+    )
+    args = parser.parse_args()
+
+    now = datetime.now()
+    until_ts = args.until or int(now.timestamp() * 1000)
+    since_ts = args.since or int((now - timedelta(days=1)).timestamp() * 1000)
+    states = state_backend.get_backend().load_member_states()
+    print(
+        build_incident_section(since_ts, until_ts)
+        + build_availability_section(
+            since_ts,
+            until_ts,
+            {node_id: state.name for node_id, state in states.items()},
+            {node_id: state.network_id for node_id, state in states.items()},
+            args.members,
+        )
+        or settings.t("availability_no_history")
+    )
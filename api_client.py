@@ -1,64 +1,97 @@
 """
-Модуль для взаимодействия с API ZeroTier и получения информации о членах сетей, а также о последней версии ZeroTier.
+Модуль для получения информации о членах сетей ZeroTier из всех источников, а также о последней версии ZeroTier.
 Содержит функции с поддержкой повторных попыток и уведомлений в случае ошибок.
 """
 
-import time
+import contextvars
+import queue
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+import clock
 import settings
-import database_manager as db
-from send_to_chat import send_telegram_alert
+from send_to_chat import send_alert
 from http_client import ApiClientError, make_request
+from member_sources import CENTRAL_SOURCE_TYPE, MemberSource
 
 
-def get_members(token: str, network_id: str) -> list | None:
-    """Получает список участников для одной сети ZeroTier с несколькими попытками."""
-    url = f"{settings.API_URL}network/{network_id}/member"
-    headers = {"Authorization": f"Bearer {token}"}
-    error_log_template = settings.t("error_getting_members", net_id=network_id, e="{e}")
+def _fetch_sources(sources: list[MemberSource], results: queue.Queue) -> None:
+    """
+    Последовательно получает участников источников и кладет каждый ответ
+    в очередь сразу после получения: (источник, участники или None).
+    """
+    for i, source in enumerate(sources):
+        try:
+            members = source.get_members()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Иначе потребитель ждал бы ответа этой сети бесконечно
+            print(settings.t("fetch_members_crashed", net_id=source.network_id, e=e))
+            members = None
+        results.put((source, members))
 
-    try:
-        response = make_request("GET", url, error_log_template, headers=headers)
-        return response.json()
-    except ApiClientError as e:
-        # Если после всех попыток произошла ошибка, отправляем уведомление
-        error_message = settings.t(
-            "alert_failed_to_get_members",
-            net_id=network_id,
-            attempts=settings.API_RETRY_ATTEMPTS,
-            error=e,
-        )
-        send_telegram_alert(error_message)
-        return None
+        # Добавляем паузу между запросами к разным сетям ZeroTier Central,
+        # чтобы не превышать лимиты API. Локальный контроллер лимитов не имеет.
+        # Пауза не нужна после последнего запроса.
+        if i < len(sources) - 1 and source.source_type == CENTRAL_SOURCE_TYPE:
+            clock.sleep(1)  # Небольшая задержка между запросами к разным сетям
 
 
-def get_all_members(networks: list[dict]) -> list[dict]:
-    """Получает и объединяет участников из всех указанных сетей ZeroTier."""
+def iter_network_members(
+    sources: list[MemberSource],
+) -> Iterator[tuple[MemberSource, list[dict] | None]]:
+    """
+    Получает участников всех источников и возвращает ответ каждой сети
+    по мере поступления, не дожидаясь остальных: (источник, участники или None).
+
+    Сети ZeroTier Central запрашиваются по очереди с паузой (лимиты API),
+    а локальные контроллеры - параллельно с ними, не больше
+    FETCH_CONCURRENCY запросов одновременно.
+    """
     print(settings.t("getting_members_info"))
+    central = [s for s in sources if s.source_type == CENTRAL_SOURCE_TYPE]
+    batches = ([central] if central else []) + [
+        [s] for s in sources if s.source_type != CENTRAL_SOURCE_TYPE
+    ]
+    results: queue.Queue = queue.Queue()
+    if len(sources) == 1:
+        # Параллелить нечего: запрос выполняется в текущем потоке
+        _fetch_sources(sources, results)
+        batches = []
+
+    with ThreadPoolExecutor(
+        max_workers=max(min(settings.FETCH_CONCURRENCY, len(batches)), 1),
+        thread_name_prefix="fetch",
+    ) as executor:
+        for batch in batches:
+            # Потоки пула выполняются в контексте цикла: запросы попадают
+            # в его трассу и в статистику соединений (transport.measure)
+            executor.submit(
+                contextvars.copy_context().run, _fetch_sources, batch, results
+            )
+        for _ in sources:
+            source, members = results.get()
+            if not members:
+                print(
+                    settings.t(
+                        "failed_to_get_members_for_network", net_id=source.network_id
+                    )
+                )
+            yield source, members
+
+
+def get_all_members(sources: list[MemberSource]) -> list[dict]:
+    """Получает и объединяет участников из всех источников (сетей ZeroTier)."""
     all_members = []
-    num_networks = len(networks)
-    for i, network in enumerate(networks):
-        members = get_members(network["token"], network["network_id"])
+    for _source, members in iter_network_members(sources):
         if members:
             all_members.extend(members)
-        else:
-            print(
-                settings.t(
-                    "failed_to_get_members_for_network", net_id=network["network_id"]
-                )
-            )
-
-        # Добавляем паузу между запросами к разным сетям, чтобы не превышать лимиты API.
-        # Пауза не нужна после последнего запроса.
-        if i < num_networks - 1:
-            time.sleep(1)  # Небольшая задержка между запросами к разным сетям
     return all_members
 
 
-def get_latest_zerotier_version() -> str:
+def get_latest_zerotier_version(known_version: str | None = None) -> str:
     """
     Получает последнюю версию ZeroTier с GitHub API.
-    В случае успеха обновляет значение в БД.
-    В случае ошибки пытается получить значение из БД, и только потом использует fallback.
+    В случае ошибки использует последнюю известную версию (из кэша состояния),
+    и только потом fallback из настроек.
     """
     url = "https://api.github.com/repos/zerotier/ZeroTierOne/releases/latest"
     error_log_template = settings.t("error_getting_latest_version", e="{e}")
@@ -68,10 +101,7 @@ def get_latest_zerotier_version() -> str:
         try:
             data = response.json()
             # Теги на GitHub часто имеют префикс 'v', уберем его
-            latest_version = data["tag_name"].lstrip("v")
-            # При успехе сохраняем в БД
-            db.save_latest_zt_version(latest_version)
-            return latest_version
+            return data["tag_name"].lstrip("v")
         except (KeyError, ValueError) as parse_error:
             # Ошибка парсинга ответа, даже если запрос прошел успешно
             # Создаем новое исключение, чтобы передать его дальше
@@ -80,7 +110,7 @@ def get_latest_zerotier_version() -> str:
             ) from parse_error
     except ApiClientError as e:
         # Если после всех попыток произошла ошибка, отправляем уведомление
-        send_telegram_alert(
+        send_alert(
             settings.t(
                 "alert_failed_to_get_latest_version",
                 attempts=settings.API_RETRY_ATTEMPTS,
@@ -88,12 +118,11 @@ def get_latest_zerotier_version() -> str:
             )
         )
 
-    # Если API недоступен, пытаемся взять версию из БД
-    db_version = db.get_latest_zt_version_from_db()
-    if db_version:
-        print(settings.t("using_db_version", version=db_version))
-        return db_version
+    # Если API недоступен, используем последнюю известную версию
+    if known_version:
+        print(settings.t("using_db_version", version=known_version))
+        return known_version
 
-    # Если и в БД ничего нет, используем fallback из настроек
+    # Если и она неизвестна, используем fallback из настроек
     print(settings.t("using_fallback_version", version=settings.ZT_FALLBACK_VERSION))
     return settings.ZT_FALLBACK_VERSION
@@ -2,11 +2,13 @@
 Модуль, содержащий бизнес-логику для проверки состояния участников сети ZeroTier.
 """
 
+import hashlib
+import json
 import platform
 import subprocess
 import settings
-from utils import get_seconds_since
-from models import MemberState, OnlineStatusResult
+from utils import get_seconds_since, node_id_to_int
+from models import MemberCheckContext, MemberState, OnlineStatusResult
 
 
 def ping_host(ip_address: str) -> bool:
@@ -44,6 +46,11 @@ def ping_host(ip_address: str) -> bool:
         return False
 
 
+def is_member_online(state: MemberState) -> bool:
+    """Проверяет, считается ли участник онлайн по сохраненному времени 'lastSeen'."""
+    return 0 <= state.last_seen_seconds_ago <= settings.ONLINE_THRESHOLD_SECONDS
+
+
 def check_member_version(
     name: str,
     client_version: str,
@@ -87,41 +94,52 @@ def check_member_online_status(
     """Проверяет онлайн-статус участника, обрабатывает аномалии и формирует отчет."""
     report = None
     previous_alert_level = previous_state.offline_alert_level if previous_state else 0
-    previous_last_seen_seconds_ago = (
-        previous_state.last_seen_seconds_ago if previous_state else -1
-    )
+    # Сохраненное абсолютное время активности не устаревает между проверками
+    # и перезапусками: ожидаемое время офлайна считается от него к текущему моменту.
+    previous_last_seen_ts = previous_state.last_seen_ts if previous_state else 0
 
     new_offline_alert_level = previous_alert_level
+    recovered = False
+    ping_ip = None
     seconds_ago = -1
     last_online_str = "N/A"
 
     if not last_online_ts:
         if previous_state is None:
             report = settings.t("member_never_online", name=name)
+        # Сохраненное время активности остается прежним: без него после
+        # перезапуска аномалии 'lastSeen' не обнаруживались бы
         return OnlineStatusResult(
-            report, new_offline_alert_level, seconds_ago, last_online_str
+            report,
+            new_offline_alert_level,
+            seconds_ago,
+            last_online_str,
+            previous_last_seen_ts,
         )
 
     api_seconds_ago = get_seconds_since(last_online_ts, time_ms)
     seconds_ago = api_seconds_ago
+    last_seen_ts = last_online_ts
 
-    anomaly_jump_threshold = (
-        previous_last_seen_seconds_ago
-        + settings.CHECK_INTERVAL_SECONDS
-        + settings.LAST_SEEN_ANOMALY_THRESHOLD_SECONDS
+    expected_seconds_ago = (
+        get_seconds_since(previous_last_seen_ts, time_ms)
+        if previous_last_seen_ts
+        else -1
     )
 
     if (
-        previous_last_seen_seconds_ago != -1
-        and api_seconds_ago > anomaly_jump_threshold
+        expected_seconds_ago != -1
+        and api_seconds_ago
+        > expected_seconds_ago + settings.LAST_SEEN_ANOMALY_THRESHOLD_SECONDS
     ):
-        seconds_ago = previous_last_seen_seconds_ago + settings.CHECK_INTERVAL_SECONDS
+        seconds_ago = expected_seconds_ago
+        last_seen_ts = previous_last_seen_ts
         print(
             settings.t(
                 "anomaly_detected",
                 name=name,
                 api_s=api_seconds_ago,
-                prev_s=previous_last_seen_seconds_ago,
+                prev_s=expected_seconds_ago,
                 calc_s=seconds_ago,
             )
         )
@@ -134,6 +152,7 @@ def check_member_online_status(
             print(settings.t("device_back_online", name=name))
             report = settings.t("member_back_online_report", name=name)
             new_offline_alert_level = 0
+            recovered = True
     else:
         triggered_level_key = None
         sorted_thresholds = sorted(
@@ -155,88 +174,330 @@ def check_member_online_status(
                 report = settings.t(message_key, name=name)
 
                 # --- Дополнительная проверка пингом ---
+                # Пинг выполняется после проверки всех узлов
+                # (correlate_status_changes): при сбое всей сети он не нужен.
                 if ip_assignments:
-                    ip_to_ping = ip_assignments[0]
-                    print(
-                        settings.t(
-                            "checking_ping_for_offline_node", name=name, ip=ip_to_ping
-                        )
-                    )
-                    ping_ok = ping_host(ip_to_ping)
-                    if ping_ok:
-                        report += settings.t("ping_success_report", ip=ip_to_ping)
-                    else:
-                        report += settings.t("ping_fail_report", ip=ip_to_ping)
+                    ping_ip = ip_assignments[0]
                 else:
                     print(settings.t("no_ip_for_ping", name=name))
 
                 new_offline_alert_level = new_alert_level
 
     return OnlineStatusResult(
-        report, new_offline_alert_level, seconds_ago, last_online_str
+        report,
+        new_offline_alert_level,
+        seconds_ago,
+        last_online_str,
+        last_seen_ts,
+        escalated=new_offline_alert_level > previous_alert_level,
+        recovered=recovered,
+        ping_ip=ping_ip,
     )
 
 
+def _ping_report(name: str, ip_address: str) -> str:
+    """Проверяет пингом узел, ушедший в офлайн, и возвращает дополнение к отчету."""
+    print(settings.t("checking_ping_for_offline_node", name=name, ip=ip_address))
+    if ping_host(ip_address):
+        return settings.t("ping_success_report", ip=ip_address)
+    return settings.t("ping_fail_report", ip=ip_address)
+
+
+def _offline_minutes(level: int) -> int:
+    """Возвращает порог офлайна (в минутах) для уровня оповещения."""
+    for threshold in settings.OFFLINE_THRESHOLDS.values():
+        if threshold["level"] == level:
+            return threshold["seconds"] // 60
+    return 0
+
+
+def correlate_status_changes(
+    changes: list[tuple[MemberState, OnlineStatusResult]],
+    network_sizes: dict[str, int],
+    network_outages: dict[str, dict[int, str]],
+    ping_targets: dict[int, tuple[str, str, int]] | None = None,
+) -> list[str]:
+    """
+    Формирует отчеты об уходе узлов в офлайн и возвращении в сеть
+    с учетом массовых сбоев сетей.
+
+    Если за один цикл уровень оповещения повысился больше чем у доли
+    NETWORK_OUTAGE_FRACTION отслеживаемых узлов сети (и не меньше чем
+    у NETWORK_OUTAGE_MIN_MEMBERS), вместо отчетов по каждому узлу
+    формируется один отчет о сбое сети, а пинги не выполняются.
+    Пока сбой продолжается, изменения его узлов тоже сводятся в одну строку,
+    а по отдельности перечисляются только исключения: узлы, не вошедшие
+    в сбой, и узлы, оставшиеся офлайн после возвращения остальных.
+
+    Args:
+        changes: Новые состояния узлов и результаты проверки с отчетом.
+        network_sizes: Количество отслеживаемых узлов в каждой сети за цикл.
+        network_outages: Текущие сбои сетей: ID сети -> {ID узла: имя}
+                         (изменяется на месте).
+        ping_targets: Если задан, узлы не пингуются сразу, а добавляются
+                      в него: ID узла -> (имя, IP-адрес, номер отчета
+                      в возвращаемом списке) - см. checks.OfflinePingCheck.
+
+    Returns:
+        Список отчетов.
+    """
+    reports = []
+    by_network: dict[str, list[tuple[MemberState, OnlineStatusResult]]] = {}
+    for change in changes:
+        by_network.setdefault(change[0].network_id, []).append(change)
+
+    for network_id, network_changes in by_network.items():
+        network = network_id or "?"
+        outage = network_outages.get(network_id)
+        escalated = [change for change in network_changes if change[1].escalated]
+        if (
+            outage is None
+            and settings.NETWORK_OUTAGE_FRACTION > 0
+            and len(escalated) >= max(settings.NETWORK_OUTAGE_MIN_MEMBERS, 1)
+            and len(escalated)
+            > settings.NETWORK_OUTAGE_FRACTION * network_sizes.get(network_id, 0)
+        ):
+            outage = {state.node_id: state.name for state, _ in escalated}
+            network_outages[network_id] = outage
+            reports.append(
+                settings.t(
+                    "network_outage_report",
+                    network=network,
+                    count=len(escalated),
+                    total=network_sizes.get(network_id, 0),
+                    minutes=_offline_minutes(
+                        min(result.new_offline_alert_level for _, result in escalated)
+                    ),
+                )
+            )
+            # Отчеты об уходе в офлайн и пинги узлов сбоя не нужны
+            network_changes = [
+                change for change in network_changes if not change[1].escalated
+            ]
+            outage_changes = []
+        elif outage is not None:
+            outage_changes = [
+                change for change in network_changes if change[0].node_id in outage
+            ]
+            network_changes = [
+                change for change in network_changes if change[0].node_id not in outage
+            ]
+        else:
+            outage_changes = []
+
+        # Изменения узлов, не входящих в сбой, - по отдельности, с проверкой пингом
+        for state, result in network_changes:
+            report = result.report
+            if result.escalated and result.ping_ip:
+                if ping_targets is None:
+                    report += _ping_report(state.name, result.ping_ip)
+                else:
+                    ping_targets[state.node_id] = (
+                        state.name,
+                        result.ping_ip,
+                        len(reports),
+                    )
+            reports.append(report)
+
+        # Изменения узлов сбоя сводятся в одну строку
+        continuing = [result for _, result in outage_changes if result.escalated]
+        if continuing:
+            reports.append(
+                settings.t(
+                    "network_outage_continues_report",
+                    network=network,
+                    count=len(continuing),
+                    minutes=_offline_minutes(
+                        min(result.new_offline_alert_level for result in continuing)
+                    ),
+                )
+            )
+        back_online = [state for state, result in outage_changes if result.recovered]
+        for state in back_online:
+            del outage[state.node_id]
+        if back_online and not outage:
+            del network_outages[network_id]
+            reports.append(
+                settings.t(
+                    "network_outage_resolved_report",
+                    network=network,
+                    count=len(back_online),
+                )
+            )
+        elif back_online:
+            reports.append(
+                settings.t(
+                    "network_outage_partial_report",
+                    network=network,
+                    count=len(back_online),
+                    still_offline=", ".join(sorted(outage.values())),
+                )
+            )
+    return reports
+
+
+def member_config_fields(member: dict) -> dict:
+    """
+    Возвращает отслеживаемые поля конфигурации узла (CONFIG_WATCH_FIELDS).
+    Списки (IP-адреса, теги) упорядочиваются: их порядок значения не имеет,
+    а у объединенной записи узла из нескольких сетей может меняться.
+    """
+    config = member.get("config") or {}
+    fields = {}
+    for field in settings.CONFIG_WATCH_FIELDS:
+        value = config.get(field)
+        if isinstance(value, list):
+            value = sorted(value, key=json.dumps)
+        fields[field] = value
+    return fields
+
+
+def config_hash(fields: dict) -> int:
+    """
+    Возвращает 64-битный хэш полей конфигурации (знаковое число, чтобы
+    помещаться в INTEGER SQLite). 0 означает "неизвестно" и не возвращается.
+    """
+    digest = hashlib.blake2b(
+        json.dumps(fields, sort_keys=True, separators=(",", ":")).encode(),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "big", signed=True) or 1
+
+
+def check_config_change(name: str, old_fields: dict, new_fields: dict) -> str | None:
+    """
+    Сравнивает сохраненную и новую конфигурацию узла по полям.
+    Возвращает отчет с измененными полями или None, если отличий нет
+    (например, изменился только список отслеживаемых полей).
+    """
+    changes = [
+        settings.t(
+            "config_change_field",
+            field=field,
+            old=json.dumps(old_fields[field], ensure_ascii=False),
+            new=json.dumps(value, ensure_ascii=False),
+        )
+        for field, value in new_fields.items()
+        if field in old_fields and old_fields[field] != value
+    ]
+    if not changes:
+        return None
+    return settings.t("config_change_report", name=name) + "".join(changes)
+
+
+def merge_members_by_node(members: list[dict]) -> list[dict]:
+    """
+    Объединяет записи одного узла, состоящего в нескольких сетях, в одну.
+
+    За основу берется запись с самым свежим 'lastSeen', IP-адреса всех сетей
+    объединяются (сначала адреса основной записи), а время активности узла
+    в каждой сети сохраняется в списке 'networks'. Порядок узлов сохраняется.
+    """
+    merged: dict[str, dict] = {}
+    for member in members:
+        node_id = member["nodeId"]
+        network_status = {
+            "networkId": member.get("networkId", ""),
+            "lastSeen": member.get("lastSeen"),
+        }
+        existing = merged.get(node_id)
+        if existing is None:
+            merged[node_id] = {**member, "networks": [network_status]}
+            continue
+
+        networks = existing["networks"] + [network_status]
+        ip_assignments = (existing.get("config") or {}).get("ipAssignments") or []
+        new_ip_assignments = (member.get("config") or {}).get("ipAssignments") or []
+        if (member.get("lastSeen") or 0) > (existing.get("lastSeen") or 0):
+            # Основной становится запись из сети, где узел был активен позже
+            existing = {**member}
+            ip_assignments, new_ip_assignments = new_ip_assignments, ip_assignments
+        existing["networks"] = networks
+        existing["config"] = {
+            **(existing.get("config") or {}),
+            "ipAssignments": list(dict.fromkeys(ip_assignments + new_ip_assignments)),
+        }
+        merged[node_id] = existing
+    return list(merged.values())
+
+
 def process_member(
     member: dict,
     latest_version: str,
     time_ms: int,
     previous_state: MemberState | None,
-) -> tuple[MemberState, list[str]]:
+    checks: list,
+) -> tuple[MemberState, list[str], OnlineStatusResult]:
     """
-    Обрабатывает одного участника: проверяет состояние, сравнивает с предыдущим,
-    и возвращает новое состояние и отчеты о проблемах.
+    Обрабатывает одного участника проверками реестра (checks.py): дешевые
+    проверки выполняются сразу, дорогие только отбирают цели по новому
+    состоянию. Возвращает новое состояние, отчеты о проблемах и результат
+    проверки онлайн-статуса. Отчеты об уходе в офлайн и возвращении в сеть
+    в список не входят: они формируются по всем узлам цикла
+    (correlate_status_changes).
     """
-    node_id = member["nodeId"]
-    name = member.get("name", node_id)
-    problem_reports = []
+    node_id = node_id_to_int(member["nodeId"])
+    name = member.get("name", member["nodeId"])
 
     # Используем предыдущее состояние или создаем новое, если участник не найден в БД
     current_state = previous_state or MemberState(node_id=node_id, name=name)
-    new_problems_count = current_state.problems_count
-
-    client_version = member.get("clientVersion", "N/A").lstrip("v")
-    version_report, new_version_alert_sent = check_member_version(
-        name, client_version, latest_version, current_state.version_alert_sent
-    )
-    if version_report:
-        problem_reports.append(version_report)
-        new_problems_count += 1
-
-    last_online_ts = member.get("lastSeen")
-    # Получаем IP-адреса для возможной проверки пингом
-    ip_assignments = member.get("config", {}).get("ipAssignments", [])
-
-    online_status = check_member_online_status(
-        name, last_online_ts, time_ms, current_state, ip_assignments
+    context = MemberCheckContext(
+        member=member,
+        node_id=node_id,
+        name=name,
+        current_state=current_state,
+        latest_version=latest_version,
+        time_ms=time_ms,
+        client_version=member.get("clientVersion", "N/A").lstrip("v"),
+        # IP-адреса для возможной проверки пингом
+        ip_assignments=(member.get("config") or {}).get("ipAssignments") or [],
+        problems_count=current_state.problems_count,
+        version_alert_sent=current_state.version_alert_sent,
     )
-
-    if online_status.report:
-        problem_reports.append(online_status.report)
-        # Не считаем проблемой, если узел просто вернулся в онлайн
-        if online_status.report != settings.t("member_back_online_report", name=name):
-            new_problems_count += 1
+    for check in checks:
+        check.run(context)
+    online_status = context.online_status
+    client_version = context.client_version
 
     version_status = "OK" if client_version == latest_version else "OLD"
     print(
         settings.t(
             "check_result_log",
-            id=node_id,
+            id=member["nodeId"],
             name=name,
             version=(client_version or "N/A"),
             status=version_status,
             online_str=online_status.last_online_str,
         )
     )
+    networks = member.get("networks", [])
+    if len(networks) > 1:
+        print(
+            settings.t(
+                "member_networks_log",
+                networks=", ".join(
+                    f"{network['networkId']}: "
+                    f"{get_seconds_since(network['lastSeen'], time_ms)}"
+                    for network in networks
+                ),
+            )
+        )
 
     # Создаем и сохраняем новое состояние
     new_state = MemberState(
         node_id,
         name,
-        new_version_alert_sent,
+        context.version_alert_sent,
         online_status.new_offline_alert_level,
         online_status.seconds_ago,
-        new_problems_count,
+        context.problems_count,
+        online_status.last_seen_ts,
+        member.get("networkId", current_state.network_id),
+        context.config_hash,
     )
+    # Дорогие проверки отбирают цели по новому состоянию
+    context.new_state = new_state
+    for check in checks:
+        check.collect(context)
 
-    return new_state, problem_reports
+    return new_state, context.reports, online_status
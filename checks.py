@@ -0,0 +1,416 @@
+"""
+Модуль реестра проверок участников.
+
+Каждая проверка объявляет свою стоимость. Дешевые проверки (версия клиента,
+онлайн-статус, хэш конфигурации) работают с данными в памяти и выполняются
+для каждого узла сразу (Check.run). Дорогие проверки (пинг, замер задержки,
+чтение конфигурации из БД) при проверке узла только отбирают цели
+(ExpensiveCheck.collect), а выполняются пакетом после обработки ответа сети,
+и не дольше общего бюджета цикла CHECK_BUDGET_SECONDS. Цели, не уместившиеся
+в бюджет, переносятся на следующий цикл или пропускаются - в зависимости
+от проверки. При нехватке бюджета первыми проверяются цели, пропущенные
+больше циклов подряд, поэтому до каждого узла со временем доходит очередь.
+
+Новая проверка добавляется классом с декоратором @register: цикл проверки
+(main.CycleEvaluation) менять не нужно. Проверки выполняются в порядке
+регистрации, поэтому проверка может использовать результаты предыдущих.
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import checker
+import clock
+import prober
+import settings
+import tracing
+from models import MemberCheckContext
+from state_cache import StateCache
+from utils import node_id_to_hex
+
+CHEAP = "cheap"
+EXPENSIVE = "expensive"
+# Через сколько циклов подряд без проверки узла из-за бюджета выводится сообщение
+STARVED_CYCLES = 10
+
+# Классы проверок в порядке регистрации (см. register)
+CHECK_CLASSES: list[type["Check"]] = []
+
+
+def register(check_class: type["Check"]) -> type["Check"]:
+    """Декоратор: добавляет класс проверки в реестр."""
+    CHECK_CLASSES.append(check_class)
+    return check_class
+
+
+class Check:
+    """
+    Базовый класс дешевой проверки: run() вызывается для каждого узла
+    до сохранения его состояния и записывает результаты в контекст.
+    """
+
+    name = ""
+    cost = CHEAP
+
+    def __init__(self, cache: StateCache):
+        self.cache = cache
+
+    def enabled(self) -> bool:
+        """Проверяет, включена ли проверка в настройках."""
+        return True
+
+    def run(self, context: MemberCheckContext) -> None:
+        """Проверяет узел и дополняет контекст (отчеты, поля нового состояния)."""
+
+    def collect(self, context: MemberCheckContext) -> None:
+        """Вызывается после построения нового состояния узла (для дорогих проверок)."""
+
+    def forget(self, node_ids: set[int]) -> None:
+        """Удаляет данные узлов, исключенных из мониторинга."""
+
+
+class ExpensiveCheck(Check):
+    """
+    Базовый класс дорогой проверки. collect() отбирает цель для узла
+    (target()), а run_batch() выполняет пакет целей, дополняя отчеты.
+
+    Стоимость пакета оценивается как seconds_per_target на каждую
+    из concurrency одновременно проверяемых целей.
+    """
+
+    cost = EXPENSIVE
+    # Оценка времени проверки одной цели (в секундах, в худшем случае)
+    seconds_per_target = 1.0
+    # Сколько целей проверяется одновременно
+    concurrency = 1
+    # Переносить ли не уместившиеся в бюджет цели на следующий цикл
+    carry_over = False
+
+    def __init__(self, cache: StateCache):
+        super().__init__(cache)
+        # Цели, ожидающие проверки: node_id -> данные цели
+        self.pending: dict[int, Any] = {}
+        # Сколько циклов подряд цель узла не уместилась в бюджет: node_id -> циклы
+        self.missed_cycles: dict[int, int] = {}
+
+    def collect(self, context: MemberCheckContext) -> None:
+        """Добавляет цель узла в очередь проверки (новая цель заменяет старую)."""
+        target = self.target(context)
+        if target is not None:
+            self.pending[context.node_id] = target
+
+    def target(
+        self, context: MemberCheckContext  # pylint: disable=unused-argument
+    ) -> Any:
+        """Возвращает данные цели для узла или None, если проверка не нужна."""
+        raise NotImplementedError
+
+    def run_batch(self, targets: dict[int, Any], reports: list[str]) -> None:
+        """Проверяет пакет целей и дополняет отчеты пакета."""
+        raise NotImplementedError
+
+    def forget(self, node_ids: set[int]) -> None:
+        """Удаляет ожидающие цели узлов, исключенных из мониторинга."""
+        for node_id in node_ids:
+            self.pending.pop(node_id, None)
+            self.missed_cycles.pop(node_id, None)
+
+    def prioritized_targets(self) -> list[tuple[int, Any]]:
+        """
+        Возвращает ожидающие цели: первыми - дольше всех не умещавшиеся
+        в бюджет (сортировка устойчивая, иначе порядок узлов сохраняется).
+        """
+        return sorted(
+            self.pending.items(),
+            key=lambda item: -self.missed_cycles.get(item[0], 0),
+        )
+
+    def count_missed(self, selected: dict[int, Any], rest: dict[int, Any]) -> None:
+        """Учитывает цели, не уместившиеся в бюджет, и сообщает о давно не проверенных."""
+        for node_id in selected:
+            self.missed_cycles.pop(node_id, None)
+        starved = 0
+        longest = (0, 0)
+        for node_id in rest:
+            cycles = self.missed_cycles.get(node_id, 0) + 1
+            self.missed_cycles[node_id] = cycles
+            if cycles >= STARVED_CYCLES:
+                starved += 1
+            longest = max(longest, (cycles, node_id))
+        # Сообщение выводится раз в STARVED_CYCLES циклов ожидания
+        # узла, дольше всех не получавшего проверку
+        if starved and longest[0] % STARVED_CYCLES == 0:
+            print(
+                settings.t(
+                    "check_budget_starved",
+                    check=self.name,
+                    count=starved,
+                    node=node_id_to_hex(longest[1]),
+                    cycles=longest[0],
+                )
+            )
+
+    def estimate_seconds(self, count: int) -> float:
+        """Оценивает время проверки count целей."""
+        return math.ceil(count / self.concurrency) * self.seconds_per_target
+
+    def max_targets(self, seconds: float) -> int:
+        """Возвращает, сколько целей можно проверить за указанное время."""
+        return int(seconds // self.seconds_per_target) * self.concurrency
+
+
+@register
+class VersionCheck(Check):
+    """Версия клиента ZeroTier: оповещение об устаревшей версии."""
+
+    name = "version"
+
+    def run(self, context: MemberCheckContext) -> None:
+        report, context.version_alert_sent = checker.check_member_version(
+            context.name,
+            context.client_version,
+            context.latest_version,
+            context.current_state.version_alert_sent,
+        )
+        if report:
+            context.reports.append(report)
+            context.problems_count += 1
+
+
+@register
+class OnlineCheck(Check):
+    """Онлайн-статус: уровни оповещений об офлайне и возвращение в сеть."""
+
+    name = "online"
+
+    def run(self, context: MemberCheckContext) -> None:
+        online_status = checker.check_member_online_status(
+            context.name,
+            context.member.get("lastSeen"),
+            context.time_ms,
+            context.current_state,
+            context.ip_assignments,
+        )
+        context.online_status = online_status
+        if online_status.report:
+            # Отчеты об уходе в офлайн и возвращении формируются после проверки
+            # всех узлов (checker.correlate_status_changes), остальные - сразу
+            if not online_status.escalated and not online_status.recovered:
+                context.reports.append(online_status.report)
+            # Не считаем проблемой, если узел просто вернулся в онлайн
+            if not online_status.recovered:
+                context.problems_count += 1
+
+
+@register
+class ConfigHashCheck(Check):
+    """Хэш отслеживаемых полей конфигурации (сравнивается за O(1))."""
+
+    name = "config_hash"
+
+    def enabled(self) -> bool:
+        return bool(settings.CONFIG_WATCH_FIELDS)
+
+    def run(self, context: MemberCheckContext) -> None:
+        context.config_hash = checker.config_hash(
+            checker.member_config_fields(context.member)
+        )
+
+
+@register
+class ConfigDiffCheck(ExpensiveCheck):
+    """
+    Поля конфигурации, изменившиеся с прошлого раза: сохраненная
+    конфигурация читается из БД только при изменении хэша.
+    """
+
+    name = "config_diff"
+    seconds_per_target = 0.01
+    # Хэш уже сохранен, поэтому пропущенное изменение позже не обнаружится
+    carry_over = True
+
+    def enabled(self) -> bool:
+        return bool(settings.CONFIG_WATCH_FIELDS)
+
+    def target(self, context: MemberCheckContext) -> Any:
+        previous_hash = context.current_state.config_hash
+        if context.config_hash == previous_hash:
+            return None
+        fields = checker.member_config_fields(context.member)
+        if not previous_hash:
+            # Первая конфигурация узла только запоминается
+            self.cache.set_member_config(context.node_id, fields)
+            return None
+        return context.name, fields
+
+    def run_batch(self, targets: dict[int, Any], reports: list[str]) -> None:
+        for node_id, (name, new_fields) in targets.items():
+            old_fields = self.cache.get_member_config(node_id)
+            self.cache.set_member_config(node_id, new_fields)
+            if old_fields is not None:
+                report = checker.check_config_change(name, old_fields, new_fields)
+                if report:
+                    reports.append(report)
+
+
+@register
+class OfflinePingCheck(ExpensiveCheck):
+    """
+    Пинг узла, ушедшего в офлайн: результат дополняет отчет узла.
+    Цели задает checker.correlate_status_changes (при сбое всей сети
+    узлы не пингуются), данные цели - (имя, IP-адрес, номер отчета в пакете).
+    """
+
+    name = "offline_ping"
+    # Без ответа ping -c 1 завершается примерно через 10 секунд
+    seconds_per_target = 10.0
+
+    def __init__(self, cache: StateCache):
+        super().__init__(cache)
+        self.concurrency = settings.PROBE_CONCURRENCY
+
+    def target(
+        self, context: MemberCheckContext  # pylint: disable=unused-argument
+    ) -> Any:
+        # Цели задаются при сопоставлении изменений статуса, а не по узлу
+        return None
+
+    @staticmethod
+    def _ping(item: tuple[int, Any]) -> bool:
+        """Пингует IP-адрес цели (node_id, данные цели)."""
+        node_id, (_, ip_address, _) = item
+        with tracing.span("ping", node=node_id_to_hex(node_id), ip=ip_address) as span:
+            reachable = checker.ping_host(ip_address)
+            span.set("status", "reachable" if reachable else "unreachable")
+            return reachable
+
+    def run_batch(self, targets: dict[int, Any], reports: list[str]) -> None:
+        for name, ip_address, _ in targets.values():
+            print(
+                settings.t("checking_ping_for_offline_node", name=name, ip=ip_address)
+            )
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(tracing.bind(self._ping), targets.items()))
+        for (_, ip_address, index), reachable in zip(targets.values(), results):
+            reports[index] += settings.t(
+                "ping_success_report" if reachable else "ping_fail_report",
+                ip=ip_address,
+            )
+
+
+@register
+class LatencyProbeCheck(ExpensiveCheck):
+    """Задержка и потери пакетов до узлов в сети (см. prober.py)."""
+
+    name = "latency"
+
+    def __init__(self, cache: StateCache):
+        super().__init__(cache)
+        self.prober = prober.LatencyProber() if self.enabled() else None
+        if self.prober:
+            self._update_estimate()
+
+    def _update_estimate(self) -> None:
+        """Оценка времени замера: fping проверяет узлы одним процессом."""
+        self.concurrency = 1 if self.prober.batched else settings.PROBE_CONCURRENCY
+        self.seconds_per_target = self.prober.seconds_per_target()
+
+    def enabled(self) -> bool:
+        return settings.PROBE_ENABLED
+
+    def target(self, context: MemberCheckContext) -> Any:
+        # Узлы в сети с IP-адресом замеряем на задержку и потери
+        if context.ip_assignments and checker.is_member_online(context.new_state):
+            return context.name, context.ip_assignments[0]
+        return None
+
+    def run_batch(self, targets: dict[int, Any], reports: list[str]) -> None:
+        latency_stats, latency_reports = self.prober.probe_cycle(
+            targets, self.cache.latency_stats
+        )
+        # Если fping не сработал, узлы дальше пингуются по отдельности
+        self._update_estimate()
+        for latency in latency_stats:
+            self.cache.set_latency_stats(latency)
+        reports.extend(latency_reports)
+
+    def forget(self, node_ids: set[int]) -> None:
+        super().forget(node_ids)
+        self.prober.forget(node_ids)
+
+
+class CheckRegistry:
+    """
+    Включенные проверки и бюджет времени дорогих проверок на цикл
+    (0 - без ограничения).
+    """
+
+    def __init__(self, checks: list[Check], budget_seconds: float):
+        self.checks = [check for check in checks if check.enabled()]
+        self.expensive = [check for check in self.checks if check.cost == EXPENSIVE]
+        self.budget_seconds = budget_seconds
+        self._remaining = math.inf
+
+    def get(self, name: str) -> Check | None:
+        """Возвращает включенную проверку по имени."""
+        return next((check for check in self.checks if check.name == name), None)
+
+    def start_cycle(self) -> None:
+        """Восстанавливает бюджет дорогих проверок в начале цикла."""
+        self._remaining = self.budget_seconds or math.inf
+
+    def run_expensive(self, reports: list[str]) -> None:
+        """
+        Выполняет ожидающие цели дорогих проверок в порядке регистрации,
+        пока хватает бюджета цикла, и дополняет отчеты пакета.
+        """
+        for check in self.expensive:
+            if not check.pending:
+                continue
+            targets = list(check.pending.items())
+            if math.isinf(self._remaining):
+                allowed = len(targets)
+            elif self._remaining > 0:
+                # Хотя бы одна цель, даже если оценка больше бюджета,
+                # иначе такая проверка не выполнялась бы никогда
+                allowed = max(check.max_targets(self._remaining), 1)
+            else:
+                allowed = 0
+            if allowed < len(targets):
+                targets = check.prioritized_targets()
+            selected = dict(targets[:allowed])
+            rest = dict(targets[allowed:])
+            check.pending = rest if check.carry_over else {}
+            check.count_missed(selected, rest)
+            if rest:
+                print(
+                    settings.t(
+                        (
+                            "check_budget_deferred"
+                            if check.carry_over
+                            else "check_budget_skipped"
+                        ),
+                        check=check.name,
+                        count=len(rest),
+                    )
+                )
+            if selected:
+                started = clock.monotonic()
+                with tracing.span(
+                    "check.batch", check=check.name, targets=len(selected)
+                ):
+                    check.run_batch(selected, reports)
+                self._remaining -= clock.monotonic() - started
+
+    def forget(self, node_ids: set[int]) -> None:
+        """Удаляет данные узлов, исключенных из мониторинга, во всех проверках."""
+        for check in self.checks:
+            check.forget(node_ids)
+
+
+def create_registry(cache: StateCache) -> CheckRegistry:
+    """Создает реестр из всех зарегистрированных проверок."""
+    return CheckRegistry(
+        [check_class(cache) for check_class in CHECK_CLASSES],
+        settings.CHECK_BUDGET_SECONDS,
+    )
@@ -0,0 +1,93 @@
+"""
+Модуль часов приложения. Все модули получают текущее время, дату и паузы
+через него, поэтому вместо системных часов можно подставить
+моделируемые: тогда пауза между циклами не ждет реального времени,
+а мгновенно сдвигает виртуальное (см. simulate.py).
+"""
+
+import time
+from datetime import date, datetime, timedelta
+
+
+class SystemClock:
+    """Системные часы: реальное время и реальные паузы."""
+
+    def now(self) -> datetime:
+        """Возвращает текущие дату и время."""
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        """Возвращает монотонное время в секундах (для измерения интервалов)."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """Приостанавливает работу на указанное число секунд."""
+        time.sleep(seconds)
+
+
+class SimulatedClock(SystemClock):
+    """
+    Моделируемые часы: время меняется только вызовами sleep() и advance(),
+    а пауза выполняется мгновенно.
+    """
+
+    def __init__(self, start: datetime):
+        self._now = start
+        self._elapsed = 0.0
+
+    def now(self) -> datetime:
+        """Возвращает текущее виртуальное время."""
+        return self._now
+
+    def monotonic(self) -> float:
+        """Возвращает число виртуальных секунд с момента создания часов."""
+        return self._elapsed
+
+    def sleep(self, seconds: float) -> None:
+        """Мгновенно сдвигает виртуальное время вперед."""
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """Сдвигает виртуальное время вперед на указанное число секунд."""
+        if seconds > 0:
+            self._now += timedelta(seconds=seconds)
+            self._elapsed += seconds
+
+
+_clock: SystemClock = SystemClock()
+
+
+def get_clock() -> SystemClock:
+    """Возвращает общие часы приложения."""
+    return _clock
+
+
+def set_clock(new_clock: SystemClock) -> None:
+    """Заменяет общие часы приложения (например, моделируемыми)."""
+    global _clock  # pylint: disable=global-statement
+    _clock = new_clock
+
+
+def now() -> datetime:
+    """Возвращает текущие дату и время по часам приложения."""
+    return _clock.now()
+
+
+def today() -> date:
+    """Возвращает текущую дату по часам приложения."""
+    return _clock.now().date()
+
+
+def now_ms() -> int:
+    """Возвращает текущее время по часам приложения в миллисекундах Unix."""
+    return int(_clock.now().timestamp() * 1000)
+
+
+def monotonic() -> float:
+    """Возвращает монотонное время в секундах по часам приложения."""
+    return _clock.monotonic()
+
+
+def sleep(seconds: float) -> None:
+    """Приостанавливает работу по часам приложения."""
+    _clock.sleep(seconds)
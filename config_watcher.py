@@ -0,0 +1,65 @@
+"""
+Модуль отслеживания изменений файла .env для применения списка
+отслеживаемых участников и сетей без перезапуска скрипта.
+Изменения определяются по времени изменения и размеру файла (os.stat),
+поэтому проверка перед каждым циклом почти ничего не стоит.
+"""
+
+import os
+from dataclasses import dataclass
+from dotenv import dotenv_values
+import settings
+import utils
+
+
+@dataclass
+class MonitoringConfig:
+    """Представляет перечитанную конфигурацию: сети и ID участников."""
+
+    networks: list[dict]
+    member_ids: list[str]
+
+
+class ConfigWatcher:
+    """Следит за файлом конфигурации и перечитывает его при изменении."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._signature = self._get_signature()
+
+    def _get_signature(self) -> tuple[int, int] | None:
+        """Возвращает (время изменения, размер) файла или None, если его нет."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> MonitoringConfig | None:
+        """
+        Проверяет, изменился ли файл, и если да - перечитывает его.
+
+        Returns:
+            Новая конфигурация или None, если файл не менялся
+            или содержит ошибки (тогда продолжает действовать прежняя).
+        """
+        signature = self._get_signature()
+        if signature == self._signature or signature is None:
+            return None
+        self._signature = signature
+
+        values = dotenv_values(self.path)
+        try:
+            networks_json = values.get("ZEROTIER_NETWORKS_JSON")
+            member_ids_csv = values.get("MEMBER_IDS_CSV")
+            if not networks_json:
+                raise ValueError(settings.t("zt_networks_json_not_found"))
+            if not member_ids_csv:
+                raise ValueError(settings.t("member_ids_csv_not_found"))
+            return MonitoringConfig(
+                utils.parse_zt_networks(networks_json, settings.t),
+                utils.parse_member_ids(member_ids_csv, settings.t),
+            )
+        except ValueError as e:
+            print(settings.t("config_reload_failed", error=e))
+            return None
@@ -0,0 +1,94 @@
+"""
+Модуль формирования ежедневного отчета в виде сжатого документа (CSV или HTML).
+Строки читаются из хранилища состояний (state_backend.py) по одной и сразу пишутся в сжатый временный файл,
+поэтому потребление памяти не зависит от количества узлов в отчете.
+"""
+
+import csv
+import gzip
+import html
+import io
+import tempfile
+from typing import IO
+import settings
+import state_backend
+from utils import node_id_to_hex
+
+REPORT_MODE_MESSAGE = "message"
+REPORT_MODE_DOCUMENT = "document"
+REPORT_MODE_AUTO = "auto"
+
+_COLUMNS = (
+    "node_id",
+    "name",
+    "problems_count",
+    "offline_alert_level",
+    "version_alert_sent",
+    "last_seen_seconds_ago",
+)
+
+
+def should_send_as_document(problematic_count: int) -> bool:
+    """Определяет, нужно ли отправлять отчет документом, а не сообщением."""
+    if settings.DAILY_REPORT_MODE == REPORT_MODE_DOCUMENT:
+        return True
+    if settings.DAILY_REPORT_MODE == REPORT_MODE_AUTO:
+        return problematic_count > settings.DAILY_REPORT_MAX_MESSAGE_MEMBERS
+    return False
+
+
+def _row_values(row) -> list:
+    """Возвращает значения строки отчета; ID узла - в шестнадцатеричном виде."""
+    return [
+        node_id_to_hex(row[column]) if column == "node_id" else row[column]
+        for column in _COLUMNS
+    ]
+
+
+def _write_csv(text_stream: io.TextIOWrapper) -> None:
+    """Пишет строки отчета в формате CSV."""
+    writer = csv.writer(text_stream)
+    writer.writerow(_COLUMNS)
+    for row in state_backend.get_backend().iter_problematic_members():
+        writer.writerow(_row_values(row))
+
+
+def _write_html(text_stream: io.TextIOWrapper, report_date: str) -> None:
+    """Пишет строки отчета в виде HTML-таблицы."""
+    title = html.escape(settings.t("daily_report_document_title", date=report_date))
+    text_stream.write(
+        f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title>'
+        f'</head><body><h1>{title}</h1>\n<table border="1">\n<tr>'
+    )
+    text_stream.write("".join(f"<th>{column}</th>" for column in _COLUMNS))
+    text_stream.write("</tr>\n")
+    for row in state_backend.get_backend().iter_problematic_members():
+        cells = "".join(
+            f"<td>{html.escape(str(value))}</td>" for value in _row_values(row)
+        )
+        text_stream.write(f"<tr>{cells}</tr>\n")
+    text_stream.write("</table></body></html>\n")
+
+
+def build_report_document(report_date: str) -> tuple[IO[bytes], str]:
+    """
+    Формирует сжатый документ со списком проблемных узлов.
+
+    Returns:
+        Кортеж (временный файл, открытый на чтение с начала; имя файла).
+        Файл удаляется автоматически после закрытия.
+    """
+    extension = "html" if settings.DAILY_REPORT_DOCUMENT_FORMAT == "html" else "csv"
+    filename = f"zerotier_report_{report_date}.{extension}.gz"
+    document = tempfile.TemporaryFile()
+    with gzip.GzipFile(
+        filename=filename[:-3], mode="wb", fileobj=document
+    ) as gzip_stream, io.TextIOWrapper(
+        gzip_stream, encoding="utf-8", newline=""
+    ) as text_stream:
+        if extension == "html":
+            _write_html(text_stream, report_date)
+        else:
+            _write_csv(text_stream)
+    document.seek(0)
+    return document, filename
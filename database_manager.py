@@ -1,9 +1,93 @@
 """Модуль для управления состоянием и статистикой в базе данных SQLite."""
 
+import json
 import sqlite3
-from datetime import date
+from contextlib import closing
+from typing import Iterator, Sequence
+import clock
 import settings
-from models import MemberState, ProblematicMember
+from models import Incident, IncidentSummary, LatencyStats, MemberState
+from utils import node_id_to_int
+
+# ID узлов хранятся 40-битными целыми числами, а не строками: ключи и индексы
+# компактнее, а WITHOUT ROWID хранит строки прямо в B-дереве первичного ключа.
+MEMBER_STATES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS member_states (
+    node_id INTEGER PRIMARY KEY,
+    name TEXT,
+    version_alert_sent BOOLEAN DEFAULT FALSE,
+    offline_alert_level INTEGER DEFAULT 0,
+    last_seen_seconds_ago INTEGER DEFAULT -1,
+    problems_count INTEGER DEFAULT 0,
+    last_seen_ts INTEGER DEFAULT 0,
+    network_id TEXT DEFAULT '',
+    config_hash INTEGER DEFAULT 0
+) WITHOUT ROWID
+"""
+
+# Последняя известная конфигурация узла (только отслеживаемые поля, JSON).
+# Записывается и читается только при изменении хэша конфигурации в member_states.
+MEMBER_CONFIGS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS member_configs (
+    node_id INTEGER PRIMARY KEY,
+    config TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+MEMBER_LATENCY_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS member_latency (
+    node_id INTEGER PRIMARY KEY,
+    p50_ms REAL,
+    p95_ms REAL,
+    p99_ms REAL,
+    loss_percent REAL,
+    samples INTEGER,
+    slo_alert_sent BOOLEAN DEFAULT FALSE
+) WITHOUT ROWID
+"""
+
+# История состояний узлов: строка при каждой смене статуса узла (онлайн/офлайн,
+# уровень оповещения, флаг версии). Статус действует до следующей строки узла.
+# Первичный ключ начинается со времени, поэтому выборки по диапазону времени
+# и удаление устаревших строк не требуют отдельного индекса.
+MEMBER_HISTORY_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS member_history (
+    ts INTEGER NOT NULL,
+    node_id INTEGER NOT NULL,
+    online BOOLEAN,
+    offline_alert_level INTEGER,
+    version_alert_sent BOOLEAN,
+    last_seen_ts INTEGER,
+    PRIMARY KEY (ts, node_id)
+) WITHOUT ROWID
+"""
+
+# Инциденты недоступности узлов. Индекс по времени открытия - для выборок
+# за период (MTTR за неделю), частичный индекс - для открытых инцидентов.
+INCIDENTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS incidents (
+    node_id INTEGER NOT NULL,
+    opened_ts INTEGER NOT NULL,
+    peak_level INTEGER NOT NULL,
+    closed_ts INTEGER,
+    duration_seconds INTEGER,
+    PRIMARY KEY (node_id, opened_ts)
+) WITHOUT ROWID
+"""
+INCIDENTS_INDEXES_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_incidents_opened_ts ON incidents (opened_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_open ON incidents (node_id) "
+    "WHERE closed_ts IS NULL",
+)
+
+# Периоды работы мониторинга: история описывает состояние узлов
+# только внутри этих периодов (пока скрипт остановлен, данных нет).
+MONITOR_SESSIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS monitor_sessions (
+    start_ts INTEGER PRIMARY KEY,
+    end_ts INTEGER NOT NULL
+)
+"""
 
 
 def get_db_connection() -> sqlite3.Connection:
@@ -33,6 +117,86 @@ def _add_column_if_not_exists(
             raise
 
 
+def _migrate_node_ids_to_integer(
+    cursor: sqlite3.Cursor, table_name: str, create_table_sql: str
+):
+    """
+    Переводит таблицу со строковыми (шестнадцатеричными) ID узлов
+    на числовые ID. Таблица пересоздается по новой схеме, а строки
+    с некорректными ID пропускаются.
+
+    Перевод выполняется одной транзакцией: без нее переименование
+    и создание таблицы фиксировались сразу, и прерванный перевод оставлял
+    пустую новую таблицу. Такой перевод (с оставшейся таблицей
+    <имя>_text_ids) при запуске завершается.
+    """
+    old_table_name = f"{table_name}_text_ids"
+    interrupted = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (old_table_name,),
+    ).fetchone()
+    columns = cursor.execute(f"PRAGMA table_info({table_name})").fetchall()
+    node_id_type = next(
+        (column["type"] for column in columns if column["name"] == "node_id"), None
+    )
+    if not interrupted and (node_id_type is None or node_id_type.upper() == "INTEGER"):
+        return
+
+    if cursor.connection.in_transaction:
+        cursor.connection.commit()
+    # Без явной транзакции изменения схемы (ALTER, CREATE) фиксируются сразу
+    cursor.execute("BEGIN")
+    try:
+        migrated_count = _copy_node_id_rows(
+            cursor, table_name, old_table_name, create_table_sql, bool(interrupted)
+        )
+        cursor.execute(f"DROP TABLE {old_table_name}")
+        cursor.execute("COMMIT")
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK")
+        raise
+    print(settings.t("node_ids_migrated", table=table_name, count=migrated_count))
+
+
+def _copy_node_id_rows(
+    cursor: sqlite3.Cursor,
+    table_name: str,
+    old_table_name: str,
+    create_table_sql: str,
+    interrupted: bool,
+) -> int:
+    """
+    Переносит строки из таблицы со строковыми ID в таблицу по новой схеме
+    (при прерванном переводе она уже создана). Возвращает число строк.
+    """
+    if not interrupted:
+        cursor.execute(f"ALTER TABLE {table_name} RENAME TO {old_table_name}")
+    cursor.execute(create_table_sql)
+    rows = cursor.execute(f"SELECT * FROM {old_table_name}").fetchall()
+    migrated_rows = []
+    for row in rows:
+        values = dict(row)
+        try:
+            values["node_id"] = node_id_to_int(str(values["node_id"]).lower())
+        except ValueError:
+            print(
+                settings.t(
+                    "node_id_migration_skipped", id=values["node_id"], table=table_name
+                )
+            )
+            continue
+        migrated_rows.append(values)
+    if migrated_rows:
+        column_names = list(migrated_rows[0])
+        # Строки, уже записанные в новую таблицу, не заменяются
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {table_name} ({', '.join(column_names)}) "
+            f"VALUES ({', '.join('?' * len(column_names))})",
+            [[values[name] for name in column_names] for values in migrated_rows],
+        )
+    return len(migrated_rows)
+
+
 def initialize_database() -> None:
     """
     Инициализирует базу данных: создает таблицы, если они не существуют,
@@ -42,18 +206,7 @@ def initialize_database() -> None:
         cursor = conn.cursor()
 
         # Таблица для хранения состояния каждого отслеживаемого участника
-        cursor.execute(
-            """
-        CREATE TABLE IF NOT EXISTS member_states (
-            node_id TEXT PRIMARY KEY,
-            name TEXT,
-            version_alert_sent BOOLEAN DEFAULT FALSE,
-            offline_alert_level INTEGER DEFAULT 0,
-            last_seen_seconds_ago INTEGER DEFAULT -1,
-            problems_count INTEGER DEFAULT 0
-        )
-        """
-        )
+        cursor.execute(MEMBER_STATES_TABLE_SQL)
 
         # Для обратной совместимости с базами, созданными до этого изменения,
         # попробуем добавить столбец, если он отсутствует.
@@ -63,12 +216,36 @@ def initialize_database() -> None:
         _add_column_if_not_exists(
             cursor, "member_states", "problems_count", "INTEGER DEFAULT 0"
         )
+        # Абсолютное время последней активности (мс) не устаревает при
+        # перезапуске, поэтому сбрасывать сохраненные состояния не нужно.
+        # Для старых записей значение 0 означает "нет данных".
+        _add_column_if_not_exists(
+            cursor, "member_states", "last_seen_ts", "INTEGER DEFAULT 0"
+        )
+        _add_column_if_not_exists(
+            cursor, "member_states", "network_id", "TEXT DEFAULT ''"
+        )
+        # Для старых записей хэш 0: конфигурация запоминается при первой проверке
+        _add_column_if_not_exists(
+            cursor, "member_states", "config_hash", "INTEGER DEFAULT 0"
+        )
+        cursor.execute(MEMBER_CONFIGS_TABLE_SQL)
 
-        # Сбрасываем сохраненное время последнего онлайна при каждом запуске,
-        # чтобы избежать ложных срабатываний детектора аномалий после перезапуска.
-        # Устанавливаем в -1, так как это значение используется для обозначения
-        # отсутствия предыдущих данных о времени.
-        cursor.execute("UPDATE member_states SET last_seen_seconds_ago = -1")
+        # Таблица со сводными показателями задержки и потерь до узлов
+        cursor.execute(MEMBER_LATENCY_TABLE_SQL)
+
+        # История состояний узлов для выгрузки (export.py)
+        cursor.execute(MEMBER_HISTORY_TABLE_SQL)
+        cursor.execute(MONITOR_SESSIONS_TABLE_SQL)
+
+        # Инциденты недоступности узлов
+        cursor.execute(INCIDENTS_TABLE_SQL)
+        for index_sql in INCIDENTS_INDEXES_SQL:
+            cursor.execute(index_sql)
+
+        # Базы, созданные до перехода на числовые ID, переводим автоматически
+        _migrate_node_ids_to_integer(cursor, "member_states", MEMBER_STATES_TABLE_SQL)
+        _migrate_node_ids_to_integer(cursor, "member_latency", MEMBER_LATENCY_TABLE_SQL)
 
         # Таблица для хранения общей статистики работы скрипта (ключ-значение)
         cursor.execute(
@@ -82,12 +259,13 @@ def initialize_database() -> None:
 
         # Инициализация статистики, если она еще не задана
         # INSERT OR IGNORE не будет ничего делать, если ключ уже существует
-        today_str = str(date.today())
+        today_str = str(clock.today())
         initial_stats = [
             ("last_report_date", today_str),
             ("checks_today", "0"),
             ("problems_today", "0"),
             ("last_check_datetime", "N/A"),
+            ("last_check_ts", "0"),
             ("latest_zt_version", settings.ZT_FALLBACK_VERSION),
         ]
         cursor.executemany(
@@ -97,38 +275,20 @@ def initialize_database() -> None:
         print(settings.t("db_initialized"))
 
 
-def get_member_state(node_id: str) -> MemberState | None:
-    """Получает состояние для одного участника из БД."""
+def get_all_member_states() -> dict[int, MemberState]:
+    """Загружает состояния всех участников из БД в словарь по node_id."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM member_states WHERE node_id = ?", (node_id,))
-        row = cursor.fetchone()
-        return MemberState.from_db_row(row)
+        cursor.execute("SELECT * FROM member_states")
+        return {row["node_id"]: MemberState.from_db_row(row) for row in cursor}
 
 
-def update_member_state(state: MemberState):
-    """Обновляет или вставляет состояние участника в БД."""
+def get_all_latency_stats() -> dict[int, LatencyStats]:
+    """Загружает показатели задержки всех узлов из БД в словарь по node_id."""
     with get_db_connection() as conn:
-        conn.execute(
-            """
-        INSERT INTO member_states (node_id, name, version_alert_sent, offline_alert_level, last_seen_seconds_ago, problems_count)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ON CONFLICT(node_id) DO UPDATE SET
-            name = excluded.name,
-            version_alert_sent = excluded.version_alert_sent,
-            offline_alert_level = excluded.offline_alert_level,
-            last_seen_seconds_ago = excluded.last_seen_seconds_ago,
-            problems_count = excluded.problems_count
-        """,
-            (
-                state.node_id,
-                state.name,
-                state.version_alert_sent,
-                state.offline_alert_level,
-                state.last_seen_seconds_ago,
-                state.problems_count,
-            ),
-        )
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM member_latency")
+        return {row["node_id"]: LatencyStats.from_db_row(row) for row in cursor}
 
 
 def get_stats() -> dict:
@@ -141,54 +301,310 @@ def get_stats() -> dict:
         # Преобразуем числовые значения в int для удобства использования
         stats["checks_today"] = int(stats.get("checks_today", 0))
         stats["problems_today"] = int(stats.get("problems_today", 0))
+        stats["last_check_ts"] = int(stats.get("last_check_ts", 0))
         return stats
 
 
-def save_stats(stats: dict) -> None:
-    """Сохраняет словарь со статистикой в БД."""
+def save_state_batch(
+    member_states: list[MemberState],
+    stats: dict,
+    latency_stats: list[LatencyStats] | None = None,
+    history: list[tuple] | None = None,
+    session: tuple[int, int] | None = None,
+    incidents: list[Incident] | None = None,
+    configs: dict[int, dict] | None = None,
+) -> None:
+    """
+    Сохраняет измененные состояния участников, показатели статистики
+    и задержки одной транзакцией. Вместе с ними записываются новые строки
+    истории (ts, node_id, online, offline_alert_level, version_alert_sent,
+    last_seen_ts), границы текущего периода работы (начало, конец),
+    открытые, обновленные или закрытые инциденты и измененные конфигурации
+    узлов (node_id -> отслеживаемые поля).
+    """
     with get_db_connection() as conn:
-        for key, value in stats.items():
+        conn.executemany(
+            """
+        INSERT INTO member_states (node_id, name, version_alert_sent, offline_alert_level, last_seen_seconds_ago, problems_count, last_seen_ts, network_id, config_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(node_id) DO UPDATE SET
+            name = excluded.name,
+            version_alert_sent = excluded.version_alert_sent,
+            offline_alert_level = excluded.offline_alert_level,
+            last_seen_seconds_ago = excluded.last_seen_seconds_ago,
+            problems_count = excluded.problems_count,
+            last_seen_ts = excluded.last_seen_ts,
+            network_id = excluded.network_id,
+            config_hash = excluded.config_hash
+        """,
+            [
+                (
+                    state.node_id,
+                    state.name,
+                    state.version_alert_sent,
+                    state.offline_alert_level,
+                    state.last_seen_seconds_ago,
+                    state.problems_count,
+                    state.last_seen_ts,
+                    state.network_id,
+                    state.config_hash,
+                )
+                for state in member_states
+            ],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO script_stats (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in stats.items()],
+        )
+        if latency_stats:
+            conn.executemany(
+                """
+            INSERT OR REPLACE INTO member_latency
+                (node_id, p50_ms, p95_ms, p99_ms, loss_percent, samples, slo_alert_sent)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        latency.node_id,
+                        latency.p50_ms,
+                        latency.p95_ms,
+                        latency.p99_ms,
+                        latency.loss_percent,
+                        latency.samples,
+                        latency.slo_alert_sent,
+                    )
+                    for latency in latency_stats
+                ],
+            )
+        if history:
+            conn.executemany(
+                """
+            INSERT OR REPLACE INTO member_history
+                (ts, node_id, online, offline_alert_level, version_alert_sent, last_seen_ts)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                history,
+            )
+        if session:
             conn.execute(
-                "UPDATE script_stats SET value = ? WHERE key = ?", (str(value), key)
+                "INSERT OR REPLACE INTO monitor_sessions (start_ts, end_ts) VALUES (?, ?)",
+                session,
+            )
+        if incidents:
+            conn.executemany(
+                """
+            INSERT INTO incidents
+                (node_id, opened_ts, peak_level, closed_ts, duration_seconds)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(node_id, opened_ts) DO UPDATE SET
+                peak_level = excluded.peak_level,
+                closed_ts = excluded.closed_ts,
+                duration_seconds = excluded.duration_seconds
+            """,
+                [
+                    (
+                        incident.node_id,
+                        incident.opened_ts,
+                        incident.peak_level,
+                        incident.closed_ts,
+                        incident.duration_seconds,
+                    )
+                    for incident in incidents
+                ],
+            )
+        if configs:
+            conn.executemany(
+                "INSERT OR REPLACE INTO member_configs (node_id, config) VALUES (?, ?)",
+                [
+                    (node_id, json.dumps(config, sort_keys=True))
+                    for node_id, config in configs.items()
+                ],
             )
 
 
-def get_latest_zt_version_from_db() -> str | None:
-    """Получает последнюю известную версию ZeroTier из БД."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM script_stats WHERE key = 'latest_zt_version'")
-        row = cursor.fetchone()
-        return row["value"] if row else None
+def get_member_config(node_id: int) -> dict | None:
+    """Загружает последнюю сохраненную конфигурацию узла или None."""
+    with closing(get_db_connection()) as conn:
+        row = conn.execute(
+            "SELECT config FROM member_configs WHERE node_id = ?", (node_id,)
+        ).fetchone()
+        return json.loads(row["config"]) if row else None
 
 
-def save_latest_zt_version(version: str) -> None:
-    """Сохраняет последнюю версию ZeroTier в БД."""
-    with get_db_connection() as conn:
-        conn.execute(
-            "UPDATE script_stats SET value = ? WHERE key = 'latest_zt_version'",
-            (version,),
+def count_problematic_members() -> int:
+    """Возвращает количество участников, у которых были проблемы за день."""
+    with closing(get_db_connection()) as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM member_states WHERE problems_count > 0"
+        ).fetchone()
+        return row[0]
+
+
+def iter_problematic_members() -> Iterator[sqlite3.Row]:
+    """
+    Построчно возвращает участников, у которых были проблемы за день.
+    Строки читаются курсором по мере обхода, поэтому память не растет
+    с количеством участников.
+    """
+    with closing(get_db_connection()) as conn:
+        cursor = conn.execute(
+            """
+            SELECT node_id, name, problems_count, offline_alert_level,
+                   version_alert_sent, last_seen_seconds_ago
+            FROM member_states
+            WHERE problems_count > 0
+            ORDER BY problems_count DESC
+            """
         )
-    # Выводим сообщение в консоль, но не в Telegram, т.к. это не событие-ошибка
-    print(settings.t("zt_version_db_updated", version=version))
+        yield from cursor
 
 
-def get_problematic_members() -> list[ProblematicMember]:
-    """Возвращает список участников, у которых были проблемы за день."""
+def prune_member_history(older_than_ts: int) -> int:
+    """
+    Удаляет строки истории и периоды работы старше указанного времени (мс).
+    Последняя строка каждого узла сохраняется: она задает его статус
+    на начало любого более позднего периода. Возвращает число удаленных строк.
+    """
     with get_db_connection() as conn:
+        conn.execute("DELETE FROM monitor_sessions WHERE end_ts < ?", (older_than_ts,))
+        return conn.execute(
+            """
+            DELETE FROM member_history
+            WHERE ts < ?
+              AND (node_id, ts) NOT IN (
+                  SELECT node_id, MAX(ts) FROM member_history GROUP BY node_id
+              )
+            """,
+            (older_than_ts,),
+        ).rowcount
+
+
+def _node_id_filter(node_ids: Sequence[int] | None) -> tuple[str, list[int]]:
+    """Формирует условие SQL и параметры для фильтра по ID узлов."""
+    if not node_ids:
+        return "", []
+    placeholders = ", ".join("?" * len(node_ids))
+    return f" AND node_id IN ({placeholders})", list(node_ids)
+
+
+def iter_member_states(node_ids: Sequence[int] | None = None) -> Iterator[sqlite3.Row]:
+    """Построчно возвращает сохраненные состояния участников (курсором)."""
+    condition, params = _node_id_filter(node_ids)
+    with closing(get_db_connection()) as conn:
+        cursor = conn.execute(
+            f"SELECT * FROM member_states WHERE 1 = 1{condition} ORDER BY node_id",
+            params,
+        )
+        yield from cursor
+
+
+def iter_member_history(
+    after_ts: int, until_ts: int, node_ids: Sequence[int] | None = None
+) -> Iterator[sqlite3.Row]:
+    """
+    Построчно возвращает историю состояний за период (after_ts; until_ts]
+    в порядке времени. Строки читаются курсором по мере обхода.
+    """
+    condition, params = _node_id_filter(node_ids)
+    with closing(get_db_connection()) as conn:
+        cursor = conn.execute(
+            f"""
+            SELECT ts, node_id, online, offline_alert_level,
+                   version_alert_sent, last_seen_ts
+            FROM member_history
+            WHERE ts > ? AND ts <= ?{condition}
+            ORDER BY ts, node_id
+            """,
+            [after_ts, until_ts, *params],
+        )
+        yield from cursor
+
+
+def iter_status_changes(start_ts: int, end_ts: int) -> Iterator[tuple[int, int, int]]:
+    """
+    Построчно возвращает кортежи (node_id, ts, online) смен статуса за период
+    [start_ts; end_ts), а также последнюю смену каждого узла до начала периода
+    (она задает статус узла на начало периода). Кортежи вместо sqlite3.Row -
+    для быстрой загрузки в массивы.
+    """
+    with closing(get_db_connection()) as conn:
         cursor = conn.cursor()
+        cursor.row_factory = None
+        # SQLite возвращает столбец online из строки с MAX(ts)
         cursor.execute(
             """
-            SELECT name, problems_count FROM member_states
-            WHERE problems_count > 0
-            ORDER BY problems_count DESC
+            SELECT node_id, MAX(ts), online FROM member_history
+            WHERE ts < ? GROUP BY node_id
+            UNION ALL
+            SELECT node_id, ts, online FROM member_history
+            WHERE ts >= ? AND ts < ?
+            """,
+            (start_ts, start_ts, end_ts),
+        )
+        yield from cursor
+
+
+def get_monitor_sessions(start_ts: int, end_ts: int) -> list[tuple[int, int]]:
+    """Возвращает периоды работы мониторинга, пересекающиеся с [start_ts; end_ts)."""
+    with closing(get_db_connection()) as conn:
+        return conn.execute(
             """
+            SELECT start_ts, end_ts FROM monitor_sessions
+            WHERE end_ts > ? AND start_ts < ?
+            ORDER BY start_ts
+            """,
+            (start_ts, end_ts),
+        ).fetchall()
+
+
+def get_open_incidents() -> dict[int, Incident]:
+    """Загружает открытые инциденты (узлы, недоступные сейчас) в словарь по node_id."""
+    with closing(get_db_connection()) as conn:
+        cursor = conn.execute("SELECT * FROM incidents WHERE closed_ts IS NULL")
+        return {row["node_id"]: Incident.from_db_row(row) for row in cursor}
+
+
+def get_incident_summary(start_ts: int, end_ts: int) -> IncidentSummary:
+    """
+    Возвращает сводку по инцидентам, открытым за период [start_ts; end_ts):
+    количество открытых и закрытых, MTTR по закрытым, а также число
+    инцидентов, открытых на данный момент.
+    """
+    with closing(get_db_connection()) as conn:
+        row = conn.execute(
+            """
+            SELECT COUNT(*) AS opened,
+                   COUNT(closed_ts) AS closed,
+                   AVG(duration_seconds) AS mttr_seconds
+            FROM incidents
+            WHERE opened_ts >= ? AND opened_ts < ?
+            """,
+            (start_ts, end_ts),
+        ).fetchone()
+        currently_open = conn.execute(
+            "SELECT COUNT(*) FROM incidents WHERE closed_ts IS NULL"
+        ).fetchone()[0]
+        return IncidentSummary(
+            row["opened"], row["closed"], row["mttr_seconds"], currently_open
         )
-        return [ProblematicMember(**dict(row)) for row in cursor.fetchall()]
 
 
-def reset_daily_problem_counts() -> None:
-    """Сбрасывает счетчик дневных проблем для всех участников."""
-    with get_db_connection() as conn:
-        conn.execute("UPDATE member_states SET problems_count = 0")
-        print(settings.t("daily_counters_reset"))
+def iter_incidents(
+    since_ts: int, until_ts: int, node_ids: Sequence[int] | None = None
+) -> Iterator[sqlite3.Row]:
+    """
+    Построчно возвращает инциденты, открытые за период [since_ts; until_ts],
+    а также все еще открытые инциденты, в порядке времени открытия.
+    """
+    condition, params = _node_id_filter(node_ids)
+    with closing(get_db_connection()) as conn:
+        cursor = conn.execute(
+            f"""
+            SELECT node_id, opened_ts, peak_level, closed_ts, duration_seconds
+            FROM incidents
+            WHERE ((opened_ts >= ? AND opened_ts <= ?) OR closed_ts IS NULL){condition}
+            ORDER BY opened_ts
+            """,
+            [since_ts, until_ts, *params],
+        )
+        yield from cursor
@@ -0,0 +1,407 @@
+"""
+Модуль выгрузки истории мониторинга и инцидентов из SQLite в колоночный
+формат для анализа во внешних инструментах: Parquet, если установлен
+pyarrow, иначе CSV со сжатием gzip.
+
+Строки читаются курсором и пишутся пакетами, поэтому потребление памяти
+не зависит от объема истории. Выгрузка инкрементальная: время последней
+выгруженной строки истории (и узлы, выгруженные с этим временем) хранится
+в файле export_state.json в каталоге выгрузки, и каждый запуск добавляет
+новый файл только с новыми строками.
+
+Запуск: python export.py <каталог> [--since ДАТА] [--until ДАТА]
+        [--members ID,ID] [--format auto|parquet|csv] [--full]
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator
+
+import database_manager as db
+import settings
+import state_backend
+import utils
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMAT_AUTO = "auto"
+FORMAT_PARQUET = "parquet"
+FORMAT_CSV = "csv"
+
+STATE_FILE_NAME = "export_state.json"
+# Количество строк в одном пакете (и в одной группе строк Parquet)
+BATCH_SIZE = 10_000
+
+# Столбцы выгружаемых таблиц и их типы (имена фабрик типов pyarrow)
+MEMBER_STATES_COLUMNS = (
+    ("node_id", "string"),
+    ("name", "string"),
+    ("version_alert_sent", "bool_"),
+    ("offline_alert_level", "int64"),
+    ("last_seen_seconds_ago", "int64"),
+    ("last_seen_ts", "int64"),
+    ("problems_count", "int64"),
+    ("network_id", "string"),
+)
+MONITOR_SESSIONS_COLUMNS = (
+    ("start_ts", "int64"),
+    ("end_ts", "int64"),
+)
+INCIDENTS_COLUMNS = (
+    ("node_id", "string"),
+    ("opened_ts", "int64"),
+    ("peak_level", "int64"),
+    ("closed_ts", "int64"),
+    ("duration_seconds", "int64"),
+)
+MEMBER_HISTORY_COLUMNS = (
+    ("ts", "int64"),
+    ("node_id", "string"),
+    ("online", "bool_"),
+    ("offline_alert_level", "int64"),
+    ("version_alert_sent", "bool_"),
+    ("last_seen_ts", "int64"),
+)
+
+
+class CsvTableWriter:
+    """Пишет пакеты строк в CSV, сжатый gzip."""
+
+    extension = "csv.gz"
+
+    def __init__(self, path: str, columns: tuple[tuple[str, str], ...]):
+        self._file = gzip.open(path, "wt", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(name for name, _ in columns)
+
+    def write_batch(self, rows: list[tuple]) -> None:
+        """Дописывает пакет строк."""
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        """Завершает файл."""
+        self._file.close()
+
+
+class ParquetTableWriter:
+    """Пишет пакеты строк в Parquet: каждый пакет - отдельная группа строк."""
+
+    extension = "parquet"
+
+    def __init__(self, path: str, columns: tuple[tuple[str, str], ...]):
+        self._schema = pyarrow.schema(
+            [(name, getattr(pyarrow, type_name)()) for name, type_name in columns]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(
+            path, self._schema, compression="zstd"
+        )
+
+    def write_batch(self, rows: list[tuple]) -> None:
+        """Дописывает пакет строк."""
+        columns = list(zip(*rows))
+        self._writer.write_table(
+            pyarrow.Table.from_arrays(
+                [pyarrow.array(values) for values in columns], schema=self._schema
+            )
+        )
+
+    def close(self) -> None:
+        """Завершает файл."""
+        self._writer.close()
+
+
+def resolve_format(requested: str) -> str:
+    """Определяет формат выгрузки с учетом наличия pyarrow."""
+    if requested == FORMAT_CSV:
+        return FORMAT_CSV
+    if pyarrow is None:
+        if requested == FORMAT_PARQUET:
+            print(settings.t("export_pyarrow_missing"))
+        return FORMAT_CSV
+    return FORMAT_PARQUET
+
+
+def _create_writer(export_format: str, path: str, columns):
+    """Создает объект записи для выбранного формата."""
+    writer_class = (
+        ParquetTableWriter if export_format == FORMAT_PARQUET else CsvTableWriter
+    )
+    return writer_class(path, columns)
+
+
+def _extension(export_format: str) -> str:
+    """Возвращает расширение файла для выбранного формата."""
+    if export_format == FORMAT_PARQUET:
+        return ParquetTableWriter.extension
+    return CsvTableWriter.extension
+
+
+def write_table(rows: Iterable[tuple], path: str, columns, export_format: str) -> int:
+    """
+    Пишет строки в файл пакетами по BATCH_SIZE. Файл сначала создается
+    под временным именем и переименовывается только после успешной записи,
+    поэтому прерванная выгрузка не оставляет неполных файлов.
+    Если строк нет, файл не создается.
+
+    Returns:
+        Количество записанных строк.
+    """
+    iterator = iter(rows)
+    batch = list(islice(iterator, BATCH_SIZE))
+    if not batch:
+        return 0
+    temp_path = path + ".tmp"
+    writer = _create_writer(export_format, temp_path, columns)
+    count = 0
+    try:
+        while batch:
+            writer.write_batch(batch)
+            count += len(batch)
+            batch = list(islice(iterator, BATCH_SIZE))
+    finally:
+        writer.close()
+    os.replace(temp_path, path)
+    return count
+
+
+def _state_rows(node_ids: list[int] | None) -> Iterator[tuple]:
+    """Строки текущего состояния участников с ID в шестнадцатеричном виде."""
+    for row in state_backend.get_backend().iter_member_states(node_ids):
+        yield (
+            utils.node_id_to_hex(row["node_id"]),
+            row["name"],
+            bool(row["version_alert_sent"]),
+            row["offline_alert_level"],
+            row["last_seen_seconds_ago"],
+            row["last_seen_ts"],
+            row["problems_count"],
+            row["network_id"],
+        )
+
+
+def _incident_rows(
+    since_ts: int, until_ts: int, node_ids: list[int] | None
+) -> Iterator[tuple]:
+    """Строки инцидентов за период (и еще открытых) с ID в шестнадцатеричном виде."""
+    for row in db.iter_incidents(since_ts, until_ts, node_ids):
+        yield (utils.node_id_to_hex(row["node_id"]), *tuple(row)[1:])
+
+
+def _history_rows(
+    after_ts: int, until_ts: int, node_ids: list[int] | None, cursor: dict
+) -> Iterator[tuple]:
+    """
+    Строки истории за период, кроме уже выгруженных по курсору.
+
+    Строки одного цикла записываются несколькими транзакциями (срочная
+    запись после проверки каждой сети), поэтому строки со временем курсора
+    могут появиться уже после выгрузки. Они читаются повторно, а узлы,
+    выгруженные с этим временем (cursor["node_ids"]), пропускаются.
+    Курсор продвигается по мере выгрузки строк.
+    """
+    cursor_ts = cursor["ts"]
+    exported = set(cursor["node_ids"])
+    for row in db.iter_member_history(after_ts, until_ts, node_ids):
+        if row["ts"] == cursor_ts and row["node_id"] in exported:
+            continue
+        if row["ts"] != cursor["ts"]:
+            cursor["ts"] = row["ts"]
+            cursor["node_ids"] = []
+        cursor["node_ids"].append(row["node_id"])
+        yield (
+            row["ts"],
+            utils.node_id_to_hex(row["node_id"]),
+            bool(row["online"]),
+            row["offline_alert_level"],
+            bool(row["version_alert_sent"]),
+            row["last_seen_ts"],
+        )
+
+
+def _load_export_state(path: str) -> dict:
+    """Загружает состояние инкрементальной выгрузки."""
+    try:
+        with open(path, encoding="utf-8") as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(settings.t("export_state_invalid", path=path, error=e))
+        return {}
+
+
+def _save_export_state(path: str, state: dict) -> None:
+    """Атомарно сохраняет состояние инкрементальной выгрузки."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file, indent=2)
+    os.replace(temp_path, path)
+
+
+def _load_cursor(saved: dict | int) -> dict:
+    """
+    Возвращает курсор выгрузки: время последней выгруженной строки истории
+    и ID узлов, выгруженных с этим временем.
+    """
+    if isinstance(saved, int):
+        # Прежний формат - только время, все строки которого выгружены
+        return {"ts": saved + 1, "node_ids": []}
+    return {"ts": saved["ts"], "node_ids": list(saved["node_ids"])}
+
+
+def _cursor_key(member_ids: list[str] | None) -> str:
+    """
+    Ключ курсора выгрузки. Для каждого набора участников курсор свой,
+    чтобы выгрузка по части узлов не пропускала данные остальных.
+    """
+    return ",".join(sorted(member_ids)) if member_ids else "*"
+
+
+def export(
+    output_dir: str,
+    since_ts: int = 0,
+    until_ts: int | None = None,
+    member_ids: list[str] | None = None,
+    requested_format: str = FORMAT_AUTO,
+    full: bool = False,
+) -> dict[str, int]:
+    """
+    Выгружает текущее состояние участников и новые строки истории.
+
+    Args:
+        output_dir: Каталог выгрузки (создается при необходимости).
+        since_ts: Начало периода истории (мс), 0 - без ограничения.
+        until_ts: Конец периода истории (мс), None - до текущего момента.
+        member_ids: Шестнадцатеричные ID участников, None - все.
+        requested_format: auto, parquet или csv.
+        full: Выгрузить всю историю за период, не используя и не меняя курсор.
+
+    Returns:
+        Количество выгруженных строк по таблицам.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    export_format = resolve_format(requested_format)
+    extension = _extension(export_format)
+    node_ids = [utils.node_id_to_int(m) for m in member_ids] if member_ids else None
+    now_ts = int(datetime.now().timestamp() * 1000)
+    until_ts = now_ts if until_ts is None else until_ts
+
+    state_path = os.path.join(output_dir, STATE_FILE_NAME)
+    export_state = _load_export_state(state_path)
+    cursors = export_state.setdefault("cursors", {})
+    key = _cursor_key(member_ids)
+    cursor = {"ts": 0, "node_ids": []}
+    if not full and key in cursors:
+        cursor = _load_cursor(cursors[key])
+    # Строки со временем курсора читаются повторно (см. _history_rows)
+    after_ts = max(since_ts - 1, cursor["ts"] - 1, 0)
+
+    counts = {}
+    # Текущее состояние, периоды работы и инциденты - небольшие таблицы,
+    # поэтому они каждый раз выгружаются целиком и заменяют прежние
+    # (инцидент может закрыться уже после предыдущей выгрузки).
+    snapshot_tables = (
+        ("member_states", _state_rows(node_ids), MEMBER_STATES_COLUMNS),
+        (
+            "incidents",
+            _incident_rows(since_ts, until_ts, node_ids),
+            INCIDENTS_COLUMNS,
+        ),
+        (
+            "monitor_sessions",
+            db.get_monitor_sessions(0, until_ts),
+            MONITOR_SESSIONS_COLUMNS,
+        ),
+    )
+    for table, rows, columns in snapshot_tables:
+        path = os.path.join(output_dir, f"{table}.{extension}")
+        counts[table] = write_table(
+            (tuple(row) for row in rows), path, columns, export_format
+        )
+        print(
+            settings.t(
+                "export_table_written", table=table, rows=counts[table], path=path
+            )
+        )
+
+    # История дописывается отдельными файлами: каждый содержит только
+    # строки, появившиеся после предыдущей выгрузки.
+    history_path = os.path.join(
+        output_dir, f"member_history_{after_ts + 1}_{now_ts}.{extension}"
+    )
+    counts["member_history"] = write_table(
+        _history_rows(after_ts, until_ts, node_ids, cursor),
+        history_path,
+        MEMBER_HISTORY_COLUMNS,
+        export_format,
+    )
+    if counts["member_history"]:
+        print(
+            settings.t(
+                "export_table_written",
+                table="member_history",
+                rows=counts["member_history"],
+                path=history_path,
+            )
+        )
+        if not full:
+            cursors[key] = cursor
+            _save_export_state(state_path, export_state)
+    else:
+        print(settings.t("export_no_new_history"))
+    return counts
+
+
+def _parse_datetime(value: str) -> int:
+    """Преобразует аргумент командной строки с датой в миллисекунды Unix."""
+    return utils.parse_datetime_arg(value, settings.t)
+
+
+def _parse_members(value: str) -> list[str]:
+    """Разбирает список ID участников через запятую."""
+    try:
+        return utils.parse_member_ids(value, settings.t)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=settings.t("export_description"))
+    parser.add_argument("output_dir", help=settings.t("export_output_help"))
+    parser.add_argument(
+        "--since", type=_parse_datetime, default=0, help=settings.t("export_since_help")
+    )
+    parser.add_argument(
+        "--until",
+        type=_parse_datetime,
+        default=None,
+        help=settings.t("export_until_help"),
+    )
+    parser.add_argument(
+        "--members",
+        type=_parse_members,
+        default=None,
+        help=settings.t("export_members_help"),
+    )
+    parser.add_argument(
+        "--format",
+        choices=(FORMAT_AUTO, FORMAT_PARQUET, FORMAT_CSV),
+        default=FORMAT_AUTO,
+        help=settings.t("export_format_help"),
+    )
+    parser.add_argument(
+        "--full", action="store_true", help=settings.t("export_full_help")
+    )
+    args = parser.parse_args()
+    export(
+        args.output_dir, args.since, args.until, args.members, args.format, args.full
+    )
@@ -1,25 +1,23 @@
 """Модуль для централизованного выполнения HTTP-запросов с повторными попытками."""
 
-import time
 import random
+from urllib.parse import urlsplit
 import requests
+import clock
 import settings
+import tracing
+import transport
 
 
 class ApiClientError(Exception):
     """Исключение, которое выбрасывается, когда HTTP-клиент не может выполнить запрос после всех попыток."""
 
 
-# Создаем один экземпляр сессии для переиспользования TCP-соединений.
-# Это повышает производительность, т.к. не нужно устанавливать новое
-# TCP-соединение и проходить TLS-рукопожатие для каждого запроса.
-_session = requests.Session()
-
-
 def make_request(
     method: str,
     url: str,
     error_log_template: str,
+    total_timeout: float | None = None,
     **kwargs,
 ) -> requests.Response:
     """
@@ -30,6 +28,10 @@ def make_request(
         method: HTTP-метод ('GET', 'POST', и т.д.).
         url: URL для запроса.
         error_log_template: Шаблон сообщения об ошибке для логгирования в консоль.
+        total_timeout: Общий лимит времени всех попыток вместе с паузами
+                       между ними (в секундах). Таймаут попытки не превышает
+                       оставшегося времени, а повторная попытка не начинается,
+                       если пауза перед ней выходит за лимит.
         **kwargs: Дополнительные аргументы для requests (headers, json, timeout).
 
     Returns:
@@ -41,25 +43,50 @@ def make_request(
     last_error = None
     # Устанавливаем таймаут по умолчанию из настроек, если он не передан явно.
     kwargs.setdefault("timeout", settings.API_TIMEOUT_SECONDS)
+    request_timeout = kwargs["timeout"]
+    deadline = clock.monotonic() + total_timeout if total_timeout else None
 
     for attempt in range(settings.API_RETRY_ATTEMPTS):
-        try:
-            response = _session.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response  # Успех
-        except requests.RequestException as e:
-            last_error = e
-            print(
-                f"{settings.t('attempt_info', attempt=attempt + 1, total=settings.API_RETRY_ATTEMPTS)} "
-                f"{error_log_template.format(e=e)}"
-            )
-            if attempt < settings.API_RETRY_ATTEMPTS - 1:
-                # Экспоненциальная задержка с джиттером для предотвращения "волн" нагрузки
-                backoff_time = settings.API_RETRY_DELAY_SECONDS * (2**attempt)
-                jitter = random.uniform(0, 1)
-                sleep_time = backoff_time + jitter
-                print(settings.t("retry_in_seconds", delay=round(sleep_time, 2)))
-                time.sleep(sleep_time)
+        if deadline is not None:
+            kwargs["timeout"] = min(request_timeout, deadline - clock.monotonic())
+        # Файлы для загрузки перематываем в начало: предыдущая попытка
+        # могла прочитать их до конца.
+        for file_spec in (kwargs.get("files") or {}).values():
+            file_obj = file_spec[1] if isinstance(file_spec, tuple) else file_spec
+            if hasattr(file_obj, "seek"):
+                file_obj.seek(0)
+        # В трассу попадает только хост: путь может содержать токен (Telegram)
+        with tracing.span(
+            "http.request",
+            method=method,
+            host=urlsplit(url).hostname,
+            attempt=attempt + 1,
+        ) as span:
+            try:
+                # Общий транспорт переиспользует соединения: не нужно заново
+                # устанавливать TCP-соединение и проходить TLS-рукопожатие
+                response = transport.get_transport().request(method, url, **kwargs)
+                span.set("status", response.status_code)
+                response.raise_for_status()
+                return response  # Успех
+            except requests.RequestException as e:
+                last_error = e
+                if e.response is None:
+                    span.set("status", type(e).__name__)
+                print(
+                    f"{settings.t('attempt_info', attempt=attempt + 1, total=settings.API_RETRY_ATTEMPTS)} "
+                    f"{error_log_template.format(e=e)}"
+                )
+        # Пауза между попытками в интервал попытки не входит
+        if attempt < settings.API_RETRY_ATTEMPTS - 1:
+            # Экспоненциальная задержка с джиттером для предотвращения "волн" нагрузки
+            backoff_time = settings.API_RETRY_DELAY_SECONDS * (2**attempt)
+            jitter = random.uniform(0, 1)
+            sleep_time = backoff_time + jitter
+            if deadline is not None and clock.monotonic() + sleep_time >= deadline:
+                break
+            print(settings.t("retry_in_seconds", delay=round(sleep_time, 2)))
+            clock.sleep(sleep_time)
 
     # Формируем и выбрасываем кастомное исключение, если все попытки провалились
     final_error_message = settings.t("all_attempts_failed_with_error", error=last_error)
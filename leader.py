@@ -0,0 +1,161 @@
+"""
+Модуль ведущего экземпляра для горячего резерва (active/standby).
+
+Несколько экземпляров мониторинга работают с одной БД на общем хранилище,
+но проверки выполняет и оповещения отправляет только ведущий - владелец
+аренды (lease) в отдельном небольшом файле SQLite. Ведущий продлевает аренду
+в фоновом потоке; резервный экземпляр пытается ее захватить и, пока аренда
+занята, следит за изменениями БД, поддерживая кэши в памяти в актуальном
+состоянии. Если ведущий перестает продлевать аренду, резервный становится
+ведущим в течение LEADER_LEASE_TTL_SECONDS (плюс интервал опроса).
+
+Время окончания аренды записывается по системным часам (а не по часам
+приложения clock.py, которые могут быть моделируемыми), поэтому часы
+экземпляров должны быть синхронизированы (NTP).
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import closing
+import database_manager as db
+import settings
+
+LEASE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS leader_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    holder TEXT NOT NULL,
+    expires_ts INTEGER NOT NULL,
+    epoch INTEGER NOT NULL
+)
+"""
+
+
+class LeaderLease:
+    """
+    Аренда роли ведущего. Смена владельца увеличивает номер эпохи (epoch),
+    по которому в логе видно, сколько раз менялся ведущий.
+    """
+
+    def __init__(self, path: str, instance_id: str, ttl_seconds: int):
+        self.path = path
+        self.instance_id = instance_id
+        self.ttl_seconds = max(ttl_seconds, 3)
+        # Аренда продлевается и проверяется трижды за время ее действия
+        self.poll_interval = self.ttl_seconds / 3
+        self.epoch: int | None = None
+        self._valid_until = 0.0
+        self._stop = threading.Event()
+        self._renewal_thread: threading.Thread | None = None
+        with closing(self._connect()) as conn:
+            conn.execute(LEASE_TABLE_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение с файлом аренды в режиме ручных транзакций."""
+        conn = sqlite3.connect(self.path, timeout=self.poll_interval)
+        conn.isolation_level = None
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @property
+    def is_leader(self) -> bool:
+        """Проверяет, действует ли аренда этого экземпляра."""
+        return self.epoch is not None and time.monotonic() < self._valid_until
+
+    def try_acquire(self) -> bool:
+        """
+        Захватывает или продлевает аренду, если она свободна, истекла
+        или уже принадлежит этому экземпляру. Возвращает True при успехе.
+        """
+        started = time.monotonic()
+        now_ms = int(time.time() * 1000)
+        try:
+            with closing(self._connect()) as conn:
+                # BEGIN IMMEDIATE блокирует запись: захватить аренду
+                # одновременно два экземпляра не могут
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute(
+                        "SELECT holder, expires_ts, epoch FROM leader_lease WHERE id = 1"
+                    ).fetchone()
+                    if (
+                        row
+                        and row["holder"] != self.instance_id
+                        and row["expires_ts"] > now_ms
+                    ):
+                        conn.execute("ROLLBACK")
+                        self.epoch = None
+                        return False
+                    epoch = row["epoch"] if row else 0
+                    if not row or row["holder"] != self.instance_id:
+                        epoch += 1
+                    conn.execute(
+                        "INSERT OR REPLACE INTO leader_lease (id, holder, expires_ts, epoch) "
+                        "VALUES (1, ?, ?, ?)",
+                        (self.instance_id, now_ms + self.ttl_seconds * 1000, epoch),
+                    )
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            # Файл занят или недоступен: аренда считается не полученной,
+            # а действующая аренда истечет сама
+            print(settings.t("leader_lease_error", error=e))
+            return self.is_leader
+        self.epoch = epoch
+        # Отсчет от начала запроса: аренда не должна действовать дольше записанной
+        self._valid_until = started + self.ttl_seconds
+        return True
+
+    def release(self) -> None:
+        """Освобождает аренду при остановке, чтобы резервный экземпляр не ждал ее истечения."""
+        self._stop.set()
+        if self.epoch is None:
+            return
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute(
+                    "UPDATE leader_lease SET expires_ts = 0 WHERE id = 1 AND holder = ?",
+                    (self.instance_id,),
+                )
+        except sqlite3.Error as e:
+            print(settings.t("leader_lease_error", error=e))
+        self.epoch = None
+
+    def start_renewal(self) -> None:
+        """Запускает фоновое продление аренды (один раз)."""
+        if self._renewal_thread is None:
+            self._renewal_thread = threading.Thread(
+                target=self._renew_loop, name="leader-lease", daemon=True
+            )
+            self._renewal_thread.start()
+
+    def _renew_loop(self) -> None:
+        """Продлевает аренду, пока этот экземпляр остается ведущим."""
+        while not self._stop.wait(self.poll_interval):
+            if self.epoch is not None and not self.try_acquire():
+                print(settings.t("leader_lease_lost", instance=self.instance_id))
+
+
+class StateFollower:
+    """
+    Определяет, записывал ли другой экземпляр изменения в БД, по значению
+    PRAGMA data_version: оно меняется после каждой транзакции другого
+    соединения, а его чтение не обращается к данным.
+    """
+
+    def __init__(self):
+        self._conn = db.get_db_connection()
+        self._version = None
+
+    def changed(self) -> bool:
+        """Проверяет, изменилась ли БД с прошлого вызова."""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._version
+        self._version = version
+        return changed
+
+    def close(self) -> None:
+        """Закрывает соединение."""
+        self._conn.close()
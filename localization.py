@@ -16,7 +16,9 @@ STRINGS = {
         "all_attempts_failed": "Все попытки исчерпаны.",
         # settings.py
         "json_must_be_list": "JSON должен быть списком (массивом).",
-        "json_must_be_dict": "Каждый элемент списка должен быть словарем с ключами 'token' и 'network_id'.",
+        "json_must_be_dict": "Каждый элемент списка должен быть словарем с ключами 'token' и 'network_id' (для контроллера 'token' необязателен).",
+        "unknown_network_type": "Неизвестный тип сети '{type}'. Допустимые значения: 'central', 'controller'.",
+        "invalid_member_id": "Некорректный ID участника '{id}' в MEMBER_IDS_CSV: ожидается 10 шестнадцатеричных символов.",
         "invalid_json_format": "Неверный формат ZEROTIER_NETWORKS_JSON в .env файле. {e}",
         "zt_networks_json_not_found": "Переменная ZEROTIER_NETWORKS_JSON не найдена в .env файле.",
         "member_ids_csv_not_found": "Переменная MEMBER_IDS_CSV не найдена в .env файле.",
@@ -29,10 +31,12 @@ STRINGS = {
             "Неверный формат CHECK_INTERVAL_SECONDS в .env. "
             "Используется значение по умолчанию: 300 секунд."
         ),
+        "invalid_int_setting": "Неверное значение {var} в .env. Используется значение по умолчанию: {default}.",
         # api_client.py
         "getting_members_info": "Получение информации о членах сети ZeroTier...",
         "error_getting_members": "Ошибка при получении участников сети {net_id}: {e}",
         "failed_to_get_members_for_network": "Не удалось получить участников для сети {net_id}",
+        "fetch_members_crashed": "Непредвиденная ошибка при получении участников сети {net_id}: {e}",
         "alert_failed_to_get_members": (
             "⛔ Не удалось получить участников сети {net_id} после {attempts} попыток. "
             "Последняя ошибка: {error}"
@@ -45,6 +49,8 @@ STRINGS = {
         "using_fallback_version": "Используется версия по умолчанию: {version}",
         "using_db_version": "Используется версия из базы данных: {version}",
         "zt_version_db_updated": "Версия ZeroTier в базе данных обновлена на {version}",
+        # member_sources.py
+        "controller_token_read_failed": "Не удалось прочитать токен контроллера из файла {path}: {error}",
         # checker.py
         "ping_command_not_found": "ОШИБКА: Команда 'ping' не найдена. Невозможно проверить хост {ip}.",
         "version_report_old": "🔧 {name}: старая версия ({version})",
@@ -52,7 +58,7 @@ STRINGS = {
         "member_never_online": "❓ {name}: ни разу не был в сети.",
         "anomaly_detected": (
             "АНАЛИЗ: Обнаружен аномальный скачок 'lastSeen' для {name}. "
-            "API: {api_s} сек, Предыдущее: {prev_s} сек. "
+            "API: {api_s} сек, по сохраненному времени активности: {prev_s} сек. "
             "Используется расчетное значение: {calc_s} сек."
         ),
         "last_seen_calculated": "~{seconds} сек. назад (расчетное)",
@@ -64,20 +70,173 @@ STRINGS = {
         "ping_fail_report": "\n  (❗️ Пинг до {ip} не проходит. Узел недоступен.)",
         "no_ip_for_ping": "АНАЛИЗ: У узла {name} нет IP-адреса для проверки пинга.",
         "check_result_log": "ID: {id}, Имя: {name}, Версия: {version} [{status}], Онлайн: {online_str}",
+        "member_networks_log": "    Сети узла (сек. с последней активности): {networks}",
         "offline_level1_message": "⚠️ {name}: офлайн более 5 минут.",
         "offline_level2_message": "🚨 {name}: офлайн более 15 минут!",
         "offline_level3_message": "🆘 {name}: офлайн более 1 часа!",
+        "network_outage_report": "🌐 Сбой сети {network}: {count} из {total} узлов офлайн более {minutes} мин. Пинг узлов пропущен.",
+        "network_outage_continues_report": "🌐 Сбой сети {network} продолжается: {count} узлов офлайн более {minutes} мин.",
+        "network_outage_resolved_report": "✅ Сбой сети {network} завершен: {count} узлов снова в сети.",
+        "config_change_report": "⚙️ {name}: изменилась конфигурация.",
+        "config_change_field": "\n  {field}: {old} → {new}",
+        # tracing.py
+        "tracing_enabled": "Трассировка включена: файл {path}, доля записываемых трасс {rate}.",
+        "trace_export_failed": "Ошибка записи трассировки в {path}, трассировка отключена: {error}",
+        # state_backend.py
+        "state_backend_unknown": "Неизвестное хранилище состояний STATE_BACKEND={backend}, используется sqlite.",
+        "mmap_state_invalid": "Файл {path} не является файлом состояний mmap этой версии.",
+        "mmap_state_imported": "Состояния участников ({count}) перенесены из SQLite в {path}.",
+        # leader.py
+        "leader_lease_error": "Ошибка файла аренды ведущего: {error}",
+        "leader_lease_lost": "Экземпляр {instance} потерял аренду ведущего.",
+        "leader_standby": "Экземпляр {instance} в резерве: ожидание аренды ведущего, отслеживание изменений состояния в БД...",
+        "leader_acquired": "Экземпляр {instance} стал ведущим (эпоха {epoch}).",
+        "leader_alerts_suppressed": "Экземпляр больше не ведущий: {count} отчетов не отправлено.",
+        # checks.py
+        "check_budget_deferred": "Бюджет дорогих проверок исчерпан: {check} для {count} узлов перенесена на следующий цикл.",
+        "check_budget_skipped": "Бюджет дорогих проверок исчерпан: {check} для {count} узлов пропущена.",
+        "check_budget_starved": "Проверка {check} давно не выполнялась для {count} узлов: не хватает бюджета CHECK_BUDGET_SECONDS (узел {node} ожидает {cycles} циклов подряд).",
+        "network_outage_partial_report": "🌐 Сеть {network}: {count} узлов снова в сети, еще офлайн: {still_offline}.",
+        # prober.py
+        "probing_nodes": "Замер задержки и потерь до {count} узлов...",
+        "fping_failed": "Не удалось выполнить fping ({error}), узлы будут пинговаться по отдельности.",
+        "latency_slo_violated_report": "🐢 {name}: нарушен SLO связи (p95: {p95} мс, потери: {loss}%)",
+        "latency_slo_restored_report": "✅ {name}: связь в пределах SLO (p95: {p95} мс, потери: {loss}%)",
+        # memory_watchdog.py
+        "memory_watchdog_enabled": "Контроль памяти включен: замер каждые {cycles} циклов, порог роста {threshold} МБ.",
+        "memory_watchdog_stats": "Память после {cycles} циклов: RSS {rss} МБ, выделено Python {traced} МБ (пик {peak} МБ), рост с первого замера {growth} МБ.",
+        "memory_watchdog_site": "    +{size_kb} КБ ({count:+d} блоков): {site}",
+        "memory_watchdog_alert": "🧠 Память мониторинга выросла на {growth} МБ с первого замера (циклов: {cycles}, RSS {rss} МБ, выделено Python {traced} МБ). Места наибольшего роста:",
+        # recorder.py / replay.py
+        "recording_cycles_to": "Данные циклов записываются в архив {path}",
+        "archive_tail_damaged": "Окончание архива {path} повреждено и пропущено: {error}",
+        "replay_description": "Воспроизведение архива циклов проверки без обращений к сети.",
+        "replay_archive_help": "Путь к архиву, записанному в режиме RECORD_ARCHIVE_FILE.",
+        "replay_verbose_help": "Выводить подробный журнал каждого цикла.",
+        "replay_started": "Воспроизведение архива {path}...",
+        "replay_summary": (
+            "Воспроизведено циклов: {cycles}, проверок узлов: {evaluations} за {seconds} сек. "
+            "({cycles_per_second} циклов/сек, {evaluations_per_second} проверок/сек). "
+            "Оповещений: {alerts}."
+        ),
+        # simulate.py
+        "simulation_description": "Моделирование работы мониторинга на виртуальных часах.",
+        "simulation_days_help": "Длительность моделирования в днях (по умолчанию 7).",
+        "simulation_interval_help": "Интервал между проверками в секундах (по умолчанию 60).",
+        "simulation_networks_help": "Количество смоделированных сетей (по умолчанию 1).",
+        "simulation_members_help": "Количество узлов в каждой сети (по умолчанию 20).",
+        "simulation_failure_rate_help": "Вероятность ухода узла в офлайн за цикл (по умолчанию 0.001).",
+        "simulation_recovery_rate_help": "Вероятность возвращения узла в сеть за цикл (по умолчанию 0.05).",
+        "simulation_seed_help": "Начальное значение генератора случайных чисел.",
+        "simulation_start_help": "Виртуальные дата и время начала (по умолчанию текущие).",
+        "simulation_memory_help": "Отслеживать объем памяти (tracemalloc) по дням.",
+        "simulation_verbose_help": "Выводить подробный журнал каждого цикла.",
+        "simulation_started": "Моделирование {days} дн. с интервалом {interval} сек. для {members} узлов...",
+        "simulation_summary": (
+            "Смоделировано циклов: {cycles}, ежедневных отчетов: {reports} за {seconds} сек. "
+            "({cycles_per_second} циклов/сек). Сбоев узлов: {outages}, "
+            "инцидентов записано: {incidents}, открыто сейчас: {open_now}. "
+            "Оповещений: {alerts}."
+        ),
+        "simulation_memory_day": "Память после отчета за {day}: {kb} КБ",
+        "simulation_memory_total": "Память в конце: {kb} КБ, пик: {peak_kb} КБ",
+        # export.py
+        "export_description": "Выгрузка состояния и истории узлов в Parquet (если установлен pyarrow) или CSV.gz.",
+        "export_output_help": "Каталог выгрузки. В нем же хранится курсор инкрементальной выгрузки.",
+        "export_since_help": "Начало периода истории (ISO 8601, например 2024-05-01 или 2024-05-01T12:00).",
+        "export_until_help": "Конец периода истории (ISO 8601). По умолчанию - текущий момент.",
+        "export_members_help": "ID участников через запятую. По умолчанию - все.",
+        "export_format_help": "Формат: auto (Parquet, если доступен pyarrow), parquet или csv.",
+        "export_full_help": "Выгрузить всю историю за период, не учитывая и не изменяя курсор.",
+        "invalid_datetime_argument": "Некорректная дата '{value}', ожидается формат ISO 8601.",
+        "export_pyarrow_missing": "pyarrow не установлен, выгрузка выполняется в CSV.gz.",
+        "export_state_invalid": "Файл курсора выгрузки {path} поврежден и будет создан заново: {error}",
+        "export_table_written": "Таблица {table}: выгружено строк {rows} в {path}",
+        "export_no_new_history": "Новых строк истории для выгрузки нет.",
+        "history_pruned": "Из истории состояний удалено устаревших строк: {rows}.",
+        # analytics.py
+        "analytics_description": "Доступность сетей и узлов за период по истории состояний.",
+        "analytics_since_help": "Начало периода (ISO 8601). По умолчанию - сутки назад.",
+        "analytics_until_help": "Конец периода (ISO 8601). По умолчанию - текущий момент.",
+        "analytics_members_help": "Сколько узлов с наименьшей доступностью показать.",
+        "incidents_summary": (
+            "\n\n🚨 Инциденты за {hours} ч: открыто {opened}, закрыто {closed}, "
+            "среднее время восстановления (MTTR): {mttr}. Недоступно сейчас: {open_now}"
+        ),
+        "incidents_mttr_minutes": "{minutes} мин",
+        "incidents_mttr_none": "нет данных",
+        "availability_no_history": "Нет истории состояний за указанный период.",
+        "availability_header": "\n\n📶 Доступность за {hours} ч:",
+        "availability_network_line": "\n  - Сеть {network}: {uptime}% (узлов: {members})",
+        "availability_worst_header": "\n\n📉 Узлы с наименьшей доступностью:",
+        "availability_member_line": "\n  - {name}: {uptime}%, сбоев: {failures}, MTBF: {mtbf}, самый долгий сбой: {outage} мин",
+        "availability_mtbf_hours": "{hours} ч",
+        "availability_mtbf_none": "нет сбоев",
+        # config_watcher.py
+        "config_reload_failed": "Не удалось применить изменения .env, продолжает действовать прежняя конфигурация. Ошибка: {error}",
+        "config_reloaded": (
+            "Конфигурация обновлена без перезапуска. Сети: +{added_networks}/-{removed_networks}, "
+            "узлы: +{added_members}/-{removed_members}."
+        ),
         # database_manager.py
+        "node_ids_migrated": "Таблица '{table}' переведена на числовые ID узлов (строк: {count}).",
+        "node_id_migration_skipped": "Строка с некорректным ID узла '{id}' в таблице '{table}' пропущена при переходе на числовые ID.",
         "column_added_to_table": "Столбец '{column}' добавлен в таблицу '{table}'.",
-        "db_initialized": "База данных инициализирована, сохраненные состояния 'lastSeen' сброшены.",
+        "db_initialized": "База данных инициализирована.",
         "daily_counters_reset": "Счетчики проблем для всех узлов сброшены.",
+        # state_cache.py
+        "state_flushed": "Состояние сохранено в БД (участников: {members}, показателей: {stats}).",
+        # telegram_bot.py
+        "bot_started": "Обработка команд Telegram-бота запущена.",
+        "bot_not_configured": "Команды Telegram-бота не включены: не заданы TELEGRAM_BOT_TOKEN или TELEGRAM_CHAT_ID.",
+        "bot_polling_error": "Ошибка получения команд Telegram-бота: {error}",
+        "bot_polling_failed": "Не удалось получить команды Telegram-бота, повтор позже: {error}",
+        "bot_help": "Доступные команды:\n/status - сводка последней проверки\n/offline - узлы не в сети\n/member <ID> - состояние узла\n/report - отчет за сегодня на данный момент",
+        "bot_no_data": "Данных пока нет: первая проверка еще не завершена.",
+        "bot_status": (
+            "📊 Последняя проверка: {last_check}\n"
+            "Узлов: {members}, в сети: {online}, не в сети: {offline}\n"
+            "Открытых инцидентов: {open_incidents}\n"
+            "Проверок сегодня: {checks}, проблем: {problems}\n"
+            "Последняя версия ZeroTier: {version}"
+        ),
+        "bot_all_online": "✅ Все узлы в сети.",
+        "bot_offline_header": "🔴 Не в сети ({count}):\n",
+        "bot_member_line": "{name} ({id}), активность {seconds} сек. назад\n",
+        "bot_more_members": "... и еще {count}",
+        "bot_member_usage": "Укажите ID узла: /member <ID>",
+        "bot_member_not_found": "Узел {id} не отслеживается.",
+        "bot_member": (
+            "{name} ({id})\n"
+            "Сеть: {network}\n"
+            "Статус: {status}, активность {seconds} сек. назад\n"
+            "Уровень оповещения: {level}\n"
+            "Версия: {version}\n"
+            "Проблем сегодня: {problems}"
+        ),
+        "bot_online": "в сети",
+        "bot_offline": "не в сети",
+        "bot_version_ok": "актуальная",
+        "bot_version_old": "устаревшая",
+        # transport.py
+        "http_prewarm_failed": "Не удалось заранее открыть соединение с {url}: {error}",
+        "http_connection_stats": "HTTP {host}: запросов {requests}, новых соединений {connections}, повторное использование {reuse}%",
+        # status_api.py
+        "status_api_started": "HTTP API состояния запущен на http://{host}:{port}/status",
+        "status_api_start_failed": "Не удалось запустить HTTP API состояния: {error}",
+        # notifiers.py
+        "notify_sink_sent": "Уведомление доставлено через канал '{sink}'.",
+        "notify_sink_error": "Ошибка доставки уведомления через канал '{sink}': {error}",
+        "notify_sink_not_configured": "Канал уведомлений '{sink}' неизвестен или не настроен и будет пропущен.",
+        "notify_queue_full": "Очередь канала уведомлений '{sink}' переполнена: самое старое уведомление отброшено.",
         # send_to_chat.py
-        "telegram_sending_skipped": "Отправка в Telegram пропущена: BOT_TOKEN или CHAT_ID не настроены.",
+        "telegram_sending_skipped": "Отправка уведомления пропущена: ни один канал (NOTIFY_SINKS) не настроен.",
         "telegram_notification_sent": "Уведомление успешно отправлено.",
+        "telegram_document_skipped": "Отправка файла в Telegram пропущена: канал telegram не настроен.",
         "telegram_sending_error": "Ошибка при отправке уведомления в Telegram: {e}",
         "problems_detected_header": "--- Обнаружены проблемы ---",
         "problems_report_header": "🔎 Обнаружены проблемы с клиентами ZeroTier:\n\n",
-        "sending_telegram_notification": "Отправка уведомления в Telegram...",
+        "sending_telegram_notification": "Отправка уведомления...",
         "daily_report_title": "🌙 Ежедневный отчет за {date}:\n\n",
         "daily_report_status_ok": "✅ Скрипт мониторинга ZeroTier работает в штатном режиме.\n",
         "daily_report_checks": "📈 Проверок за день: {checks}\n",
@@ -86,6 +245,8 @@ STRINGS = {
         "daily_report_problematic_members_header": "\n\n📊 Статистика по узлам с проблемами:",
         "daily_report_problematic_member_line": "\n  - {name}: {count} инцидентов",
         "sending_daily_report": "--- Отправка ежедневного отчета ---",
+        "daily_report_document_summary": "\n\n📎 Узлов с проблемами: {count}. Полный список - во вложенном файле.",
+        "daily_report_document_title": "Узлы с проблемами за {date}",
         "startup_notification": "🚀 Мониторинг ZeroTier (v{version}) успешно запущен.",
         "stop_notification": "🚧 Мониторинг ZeroTier остановлен",
         # main.py
@@ -110,7 +271,9 @@ STRINGS = {
         "all_attempts_failed": "All attempts have been exhausted.",
         # settings.py
         "json_must_be_list": "JSON must be a list (array).",
-        "json_must_be_dict": "Each list item must be a dictionary with 'token' and 'network_id' keys.",
+        "json_must_be_dict": "Each list item must be a dictionary with 'token' and 'network_id' keys ('token' is optional for a controller).",
+        "unknown_network_type": "Unknown network type '{type}'. Allowed values: 'central', 'controller'.",
+        "invalid_member_id": "Invalid member ID '{id}' in MEMBER_IDS_CSV: 10 hexadecimal characters expected.",
         "invalid_json_format": "Invalid ZEROTIER_NETWORKS_JSON format in .env file. {e}",
         "zt_networks_json_not_found": "ZEROTIER_NETWORKS_JSON variable not found in .env file.",
         "member_ids_csv_not_found": "MEMBER_IDS_CSV variable not found in .env file.",
@@ -123,10 +286,12 @@ STRINGS = {
             "Invalid CHECK_INTERVAL_SECONDS format in .env. "
             "Using default value: 300 seconds."
         ),
+        "invalid_int_setting": "Invalid {var} value in .env. Using default value: {default}.",
         # api_client.py
         "getting_members_info": "Getting information about ZeroTier network members...",
         "error_getting_members": "Error getting members for network {net_id}: {e}",
         "failed_to_get_members_for_network": "Failed to get members for network {net_id}",
+        "fetch_members_crashed": "Unexpected error while getting members of network {net_id}: {e}",
         "alert_failed_to_get_members": (
             "⛔ Failed to get members for network {net_id} after {attempts} attempts. "
             "Last error: {error}"
@@ -139,6 +304,8 @@ STRINGS = {
         "using_fallback_version": "Using fallback version: {version}",
         "using_db_version": "Using version from database: {version}",
         "zt_version_db_updated": "ZeroTier version in database updated to {version}",
+        # member_sources.py
+        "controller_token_read_failed": "Failed to read the controller token from {path}: {error}",
         # checker.py
         "ping_command_not_found": "ERROR: 'ping' command not found. Cannot check host {ip}.",
         "version_report_old": "🔧 {name}: outdated version ({version})",
@@ -146,7 +313,8 @@ STRINGS = {
         "member_never_online": "❓ {name}: has never been online.",
         "anomaly_detected": (
             "ANALYSIS: Anomalous 'lastSeen' jump detected for {name}. "
-            "API: {api_s}s, Previous: {prev_s}s. Using calculated value: {calc_s}s."
+            "API: {api_s}s, from the stored last-seen time: {prev_s}s. "
+            "Using calculated value: {calc_s}s."
         ),
         "last_seen_calculated": "~{seconds}s ago (calculated)",
         "last_seen_normal": "{seconds}s ago",
@@ -157,20 +325,173 @@ STRINGS = {
         "ping_fail_report": "\n  (❗️ Ping to {ip} is failing. Node is unreachable.)",
         "no_ip_for_ping": "ANALYSIS: Node {name} has no IP address for ping check.",
         "check_result_log": "ID: {id}, Name: {name}, Version: {version} [{status}], Online: {online_str}",
+        "member_networks_log": "    Node networks (seconds since last seen): {networks}",
         "offline_level1_message": "⚠️ {name}: offline for more than 5 minutes.",
         "offline_level2_message": "🚨 {name}: offline for more than 15 minutes!",
         "offline_level3_message": "🆘 {name}: offline for more than 1 hour!",
+        "network_outage_report": "🌐 Network {network} outage: {count} of {total} nodes offline for more than {minutes} min. Node pings skipped.",
+        "network_outage_continues_report": "🌐 Network {network} outage continues: {count} nodes offline for more than {minutes} min.",
+        "network_outage_resolved_report": "✅ Network {network} outage is over: {count} nodes are back online.",
+        "config_change_report": "⚙️ {name}: configuration changed.",
+        "config_change_field": "\n  {field}: {old} → {new}",
+        # tracing.py
+        "tracing_enabled": "Tracing enabled: file {path}, sampled share of traces {rate}.",
+        "trace_export_failed": "Failed to write traces to {path}, tracing disabled: {error}",
+        # state_backend.py
+        "state_backend_unknown": "Unknown state backend STATE_BACKEND={backend}, using sqlite.",
+        "mmap_state_invalid": "{path} is not an mmap state file of this version.",
+        "mmap_state_imported": "Member states ({count}) moved from SQLite to {path}.",
+        # leader.py
+        "leader_lease_error": "Leader lease file error: {error}",
+        "leader_lease_lost": "Instance {instance} lost the leader lease.",
+        "leader_standby": "Instance {instance} is on standby: waiting for the leader lease, following state changes in the DB...",
+        "leader_acquired": "Instance {instance} became the leader (epoch {epoch}).",
+        "leader_alerts_suppressed": "The instance is no longer the leader: {count} reports not sent.",
+        # checks.py
+        "check_budget_deferred": "Budget for expensive checks exhausted: {check} postponed for {count} nodes until the next cycle.",
+        "check_budget_skipped": "Budget for expensive checks exhausted: {check} skipped for {count} nodes.",
+        "check_budget_starved": "Check {check} has not run for {count} nodes for a long time: CHECK_BUDGET_SECONDS is too small (node {node} has waited {cycles} cycles in a row).",
+        "network_outage_partial_report": "🌐 Network {network}: {count} nodes are back online, still offline: {still_offline}.",
+        # prober.py
+        "probing_nodes": "Measuring latency and loss to {count} nodes...",
+        "fping_failed": "fping failed ({error}), nodes will be pinged one by one.",
+        "latency_slo_violated_report": "🐢 {name}: link SLO violated (p95: {p95} ms, loss: {loss}%)",
+        "latency_slo_restored_report": "✅ {name}: link is within SLO (p95: {p95} ms, loss: {loss}%)",
+        # memory_watchdog.py
+        "memory_watchdog_enabled": "Memory watchdog enabled: measuring every {cycles} cycles, growth threshold {threshold} MB.",
+        "memory_watchdog_stats": "Memory after {cycles} cycles: RSS {rss} MB, Python allocations {traced} MB (peak {peak} MB), growth since first measurement {growth} MB.",
+        "memory_watchdog_site": "    +{size_kb} KB ({count:+d} blocks): {site}",
+        "memory_watchdog_alert": "🧠 Monitor memory grew by {growth} MB since the first measurement (cycles: {cycles}, RSS {rss} MB, Python allocations {traced} MB). Top growing sites:",
+        # recorder.py / replay.py
+        "recording_cycles_to": "Cycle data is recorded to the archive {path}",
+        "archive_tail_damaged": "The end of archive {path} is damaged and was skipped: {error}",
+        "replay_description": "Replay an archive of check cycles without network access.",
+        "replay_archive_help": "Path to an archive recorded with RECORD_ARCHIVE_FILE.",
+        "replay_verbose_help": "Print the detailed log of every cycle.",
+        "replay_started": "Replaying archive {path}...",
+        "replay_summary": (
+            "Replayed cycles: {cycles}, node evaluations: {evaluations} in {seconds}s "
+            "({cycles_per_second} cycles/s, {evaluations_per_second} evaluations/s). "
+            "Alerts: {alerts}."
+        ),
+        # simulate.py
+        "simulation_description": "Simulate monitoring on a virtual clock.",
+        "simulation_days_help": "Simulated duration in days (default 7).",
+        "simulation_interval_help": "Interval between checks in seconds (default 60).",
+        "simulation_networks_help": "Number of simulated networks (default 1).",
+        "simulation_members_help": "Number of nodes in each network (default 20).",
+        "simulation_failure_rate_help": "Probability of a node going offline per cycle (default 0.001).",
+        "simulation_recovery_rate_help": "Probability of a node coming back per cycle (default 0.05).",
+        "simulation_seed_help": "Random number generator seed.",
+        "simulation_start_help": "Virtual start date and time (default: now).",
+        "simulation_memory_help": "Track memory usage (tracemalloc) per day.",
+        "simulation_verbose_help": "Print the detailed log of every cycle.",
+        "simulation_started": "Simulating {days} days with a {interval}s interval for {members} nodes...",
+        "simulation_summary": (
+            "Simulated cycles: {cycles}, daily reports: {reports} in {seconds}s "
+            "({cycles_per_second} cycles/s). Node outages: {outages}, "
+            "incidents recorded: {incidents}, open now: {open_now}. "
+            "Alerts: {alerts}."
+        ),
+        "simulation_memory_day": "Memory after the report for {day}: {kb} KB",
+        "simulation_memory_total": "Memory at the end: {kb} KB, peak: {peak_kb} KB",
+        # export.py
+        "export_description": "Export node state and history to Parquet (if pyarrow is installed) or CSV.gz.",
+        "export_output_help": "Output directory. The incremental export cursor is stored there too.",
+        "export_since_help": "Start of the history period (ISO 8601, e.g. 2024-05-01 or 2024-05-01T12:00).",
+        "export_until_help": "End of the history period (ISO 8601). Defaults to now.",
+        "export_members_help": "Comma-separated member IDs. Defaults to all.",
+        "export_format_help": "Format: auto (Parquet if pyarrow is available), parquet or csv.",
+        "export_full_help": "Export the whole history for the period, ignoring and keeping the cursor.",
+        "invalid_datetime_argument": "Invalid date '{value}', ISO 8601 expected.",
+        "export_pyarrow_missing": "pyarrow is not installed, exporting to CSV.gz.",
+        "export_state_invalid": "Export cursor file {path} is damaged and will be recreated: {error}",
+        "export_table_written": "Table {table}: {rows} rows exported to {path}",
+        "export_no_new_history": "No new history rows to export.",
+        "history_pruned": "Outdated history rows removed: {rows}.",
+        # analytics.py
+        "analytics_description": "Network and node availability for a period based on state history.",
+        "analytics_since_help": "Start of the period (ISO 8601). Defaults to 24 hours ago.",
+        "analytics_until_help": "End of the period (ISO 8601). Defaults to now.",
+        "analytics_members_help": "How many nodes with the lowest availability to show.",
+        "incidents_summary": (
+            "\n\n🚨 Incidents over {hours} h: opened {opened}, closed {closed}, "
+            "mean time to recovery (MTTR): {mttr}. Down right now: {open_now}"
+        ),
+        "incidents_mttr_minutes": "{minutes} min",
+        "incidents_mttr_none": "no data",
+        "availability_no_history": "No state history for the specified period.",
+        "availability_header": "\n\n📶 Availability over {hours} h:",
+        "availability_network_line": "\n  - Network {network}: {uptime}% (nodes: {members})",
+        "availability_worst_header": "\n\n📉 Nodes with the lowest availability:",
+        "availability_member_line": "\n  - {name}: {uptime}%, failures: {failures}, MTBF: {mtbf}, longest outage: {outage} min",
+        "availability_mtbf_hours": "{hours} h",
+        "availability_mtbf_none": "no failures",
+        # config_watcher.py
+        "config_reload_failed": "Failed to apply .env changes, the previous configuration stays in effect. Error: {error}",
+        "config_reloaded": (
+            "Configuration updated without restart. Networks: +{added_networks}/-{removed_networks}, "
+            "nodes: +{added_members}/-{removed_members}."
+        ),
         # database_manager.py
+        "node_ids_migrated": "Table '{table}' switched to integer node IDs ({count} rows).",
+        "node_id_migration_skipped": "Row with invalid node ID '{id}' in table '{table}' skipped while switching to integer IDs.",
         "column_added_to_table": "Column '{column}' added to table '{table}'.",
-        "db_initialized": "Database initialized, saved 'lastSeen' states have been reset.",
+        "db_initialized": "Database initialized.",
         "daily_counters_reset": "Daily problem counters for all nodes have been reset.",
+        # state_cache.py
+        "state_flushed": "State saved to the database (members: {members}, stats: {stats}).",
+        # telegram_bot.py
+        "bot_started": "Telegram bot command handling started.",
+        "bot_not_configured": "Telegram bot commands are not enabled: TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID is not set.",
+        "bot_polling_error": "Error getting Telegram bot commands: {error}",
+        "bot_polling_failed": "Failed to get Telegram bot commands, retrying later: {error}",
+        "bot_help": "Available commands:\n/status - last check summary\n/offline - nodes that are offline\n/member <ID> - node status\n/report - today's report so far",
+        "bot_no_data": "No data yet: the first check has not finished.",
+        "bot_status": (
+            "📊 Last check: {last_check}\n"
+            "Nodes: {members}, online: {online}, offline: {offline}\n"
+            "Open incidents: {open_incidents}\n"
+            "Checks today: {checks}, problems: {problems}\n"
+            "Latest ZeroTier version: {version}"
+        ),
+        "bot_all_online": "✅ All nodes are online.",
+        "bot_offline_header": "🔴 Offline ({count}):\n",
+        "bot_member_line": "{name} ({id}), last seen {seconds}s ago\n",
+        "bot_more_members": "... and {count} more",
+        "bot_member_usage": "Specify a node ID: /member <ID>",
+        "bot_member_not_found": "Node {id} is not monitored.",
+        "bot_member": (
+            "{name} ({id})\n"
+            "Network: {network}\n"
+            "Status: {status}, last seen {seconds}s ago\n"
+            "Alert level: {level}\n"
+            "Version: {version}\n"
+            "Problems today: {problems}"
+        ),
+        "bot_online": "online",
+        "bot_offline": "offline",
+        "bot_version_ok": "up to date",
+        "bot_version_old": "outdated",
+        # transport.py
+        "http_prewarm_failed": "Failed to pre-open a connection to {url}: {error}",
+        "http_connection_stats": "HTTP {host}: {requests} requests, {connections} new connections, {reuse}% reused",
+        # status_api.py
+        "status_api_started": "Status HTTP API started at http://{host}:{port}/status",
+        "status_api_start_failed": "Failed to start the status HTTP API: {error}",
+        # notifiers.py
+        "notify_sink_sent": "Notification delivered via '{sink}'.",
+        "notify_sink_error": "Error delivering notification via '{sink}': {error}",
+        "notify_sink_not_configured": "Notification sink '{sink}' is unknown or not configured and will be skipped.",
+        "notify_queue_full": "Notification queue of sink '{sink}' is full: the oldest notification was dropped.",
         # send_to_chat.py
-        "telegram_sending_skipped": "Telegram sending skipped: BOT_TOKEN or CHAT_ID is not configured.",
+        "telegram_sending_skipped": "Notification skipped: no sink (NOTIFY_SINKS) is configured.",
         "telegram_notification_sent": "Notification sent successfully.",
+        "telegram_document_skipped": "Sending the file to Telegram skipped: the telegram sink is not configured.",
         "telegram_sending_error": "Error sending notification to Telegram: {e}",
         "problems_detected_header": "--- Problems Detected ---",
         "problems_report_header": "🔎 Problems detected with ZeroTier clients:\n\n",
-        "sending_telegram_notification": "Sending notification to Telegram...",
+        "sending_telegram_notification": "Sending notification...",
         "daily_report_title": "🌙 Daily report for {date}:\n\n",
         "daily_report_status_ok": "✅ ZeroTier monitoring script is running normally.\n",
         "daily_report_checks": "📈 Checks today: {checks}\n",
@@ -179,6 +500,8 @@ STRINGS = {
         "daily_report_problematic_members_header": "\n\n📊 Statistics for nodes with problems:",
         "daily_report_problematic_member_line": "\n  - {name}: {count} incidents",
         "sending_daily_report": "--- Sending daily report ---",
+        "daily_report_document_summary": "\n\n📎 Nodes with problems: {count}. The full list is in the attached file.",
+        "daily_report_document_title": "Nodes with problems for {date}",
         "startup_notification": "🚀 ZeroTier Monitor (v{version}) started successfully.",
         "stop_notification": "🚧 *ZeroTier Monitor stopped*",
         # main.py
@@ -1,19 +1,38 @@
 """Модуль для мониторинга состояния устройств в сетях ZeroTier."""
 
-import time
-from datetime import date, datetime
+import signal
+from datetime import date
 
+import analytics
 import api_client
 import checker
+import checks
+import clock
+import daily_report
+import leader
 import database_manager as db
+import member_sources
+import memory_watchdog
 import settings
+import snapshot
+import state_backend
+import status_api
+import telegram_bot
+import tracing
+import transport
+from config_watcher import ConfigWatcher
+from models import MemberState, OnlineStatusResult
+from recorder import CycleRecorder
+from state_cache import StateCache
 from send_to_chat import (
+    close_notifications,
     report_findings,
     send_daily_report,
+    send_daily_report_document,
     send_startup_notification,
     send_exit_notification,
 )
-from utils import now_datetime
+from utils import node_id_to_int, now_datetime
 
 
 class AppStateManager:
@@ -25,8 +44,30 @@ class AppStateManager:
     last_report_date: date
 
     def __init__(self):
-        """Инициализирует менеджер состояния, загружая статистику из БД."""
-        self.stats: dict = db.get_stats()
+        """Инициализирует менеджер состояния, загружая состояние из БД в кэш."""
+        self.cache = StateCache()
+        self.stats: dict = self.cache.stats
+        self.checks = checks.create_registry(self.cache)
+        self.recorder = (
+            CycleRecorder(settings.RECORD_ARCHIVE_FILE)
+            if settings.RECORD_ARCHIVE_FILE
+            else None
+        )
+        self.memory_watchdog = (
+            memory_watchdog.MemoryWatchdog(
+                settings.MEMORY_WATCHDOG_INTERVAL_CYCLES,
+                settings.MEMORY_WATCHDOG_GROWTH_MB,
+                settings.MEMORY_WATCHDOG_TOP_SITES,
+            )
+            if settings.MEMORY_WATCHDOG_INTERVAL_CYCLES
+            else None
+        )
+        # Текущие сбои сетей: ID сети -> {ID узла: имя} (см. checker.correlate_status_changes)
+        self.network_outages: dict[str, dict[int, str]] = {}
+        # Сети узлов в прошлом цикле: ID узла -> ID сетей (см. CycleEvaluation)
+        self.member_networks: dict[str, frozenset[str]] = {}
+        # Аренда ведущего при работе с резервным экземпляром (см. leader.py)
+        self.lease: leader.LeaderLease | None = None
         self.last_report_date = self._load_last_report_date()
 
     def _load_last_report_date(self) -> date:
@@ -39,33 +80,94 @@ class AppStateManager:
         except (ValueError, TypeError):
             print(settings.t("invalid_report_date_in_db"))
             # Если дата некорректна, устанавливаем текущую и сохраняем в статистику.
-            today = date.today()
+            today = clock.today()
             self.stats["last_report_date"] = str(today)
             return today
 
+    def reload(self):
+        """Перечитывает состояние из БД (резервный экземпляр)."""
+        self.cache.reload()
+        self.last_report_date = self._load_last_report_date()
+
+    def is_fenced(self) -> bool:
+        """
+        Проверяет, потерял ли экземпляр роль ведущего: тогда он не должен
+        отправлять оповещения и записывать состояние в БД.
+        """
+        return self.lease is not None and not self.lease.is_leader
+
     def save(self):
-        """Сохраняет текущую статистику в базу данных."""
-        db.save_stats(self.stats)
+        """Сохраняет накопленные изменения в БД, если пришло время записи."""
+        self.cache.maybe_flush()
+
+    def flush(self):
+        """Немедленно сохраняет все накопленные изменения в БД."""
+        self.cache.flush()
 
     def handle_daily_rollover(self):
         """
         Проверяет, наступил ли новый день. Если да, отправляет
         ежедневный отчет и сбрасывает суточные счетчики.
         """
-        current_date = date.today()
+        current_date = clock.today()
         if current_date > self.last_report_date:
             print(
                 f"\n{settings.t('new_day_started', current_date=current_date, last_report_date=self.last_report_date)}"
             )
-            problematic_members = db.get_problematic_members()
-            send_daily_report(self.stats, problematic_members)
+            # Записываем кэш, чтобы отчет строился по актуальным данным в БД
+            self.flush()
+            analytics_section = self.build_analytics_section()
+            problematic_count = state_backend.get_backend().count_problematic_members()
+            if daily_report.should_send_as_document(problematic_count):
+                send_daily_report_document(
+                    self.stats, problematic_count, analytics_section
+                )
+            else:
+                problematic_members = self.cache.get_problematic_members()
+                send_daily_report(self.stats, problematic_members, analytics_section)
 
             # Сброс статистики для нового дня
             self.last_report_date = current_date
             self.stats["last_report_date"] = str(current_date)
             self.stats["checks_today"] = 0
             self.stats["problems_today"] = 0
-            db.reset_daily_problem_counts()
+            self.cache.reset_daily_problem_counts()
+            # Записываем сразу, чтобы после сбоя отчет не был отправлен повторно
+            self.flush()
+            self.prune_history()
+
+    def build_analytics_section(self) -> str:
+        """
+        Формирует раздел отчета с инцидентами за сутки, а также
+        доступностью сетей и узлов, если ведется история состояний.
+        """
+        end_ts = clock.now_ms()
+        start_ts = end_ts - 24 * 60 * 60 * 1000
+        incident_section = analytics.build_incident_section(start_ts, end_ts)
+        if not settings.HISTORY_RETENTION_DAYS:
+            return incident_section
+        monitored_states = [
+            self.cache.member_states[node_id]
+            for node_id in map(node_id_to_int, settings.MEMBER_IDS)
+            if node_id in self.cache.member_states
+        ]
+        return incident_section + analytics.build_availability_section(
+            start_ts,
+            end_ts,
+            {state.node_id: state.name for state in monitored_states},
+            {state.node_id: state.network_id for state in monitored_states},
+            settings.DAILY_REPORT_AVAILABILITY_MEMBERS,
+        )
+
+    def prune_history(self):
+        """Удаляет из истории состояний строки старше срока хранения."""
+        if not settings.HISTORY_RETENTION_DAYS:
+            return
+        retention_ms = settings.HISTORY_RETENTION_DAYS * 24 * 60 * 60 * 1000
+        cutoff_ts = clock.now_ms() - retention_ms
+        deleted = db.prune_member_history(cutoff_ts)
+        if deleted:
+            print(settings.t("history_pruned", rows=deleted))
 
     def increment_checks(self):
         """Увеличивает счетчик проверок за день."""
@@ -75,76 +177,444 @@ class AppStateManager:
         """Добавляет количество новых проблем к суточному счетчику."""
         self.stats["problems_today"] += len(reports)
 
-    def update_last_check_time(self):
-        """Обновляет время последней успешной проверки."""
+    def update_last_check_time(self, time_ms: int):
+        """Обновляет время последней проверки (строкой и в миллисекундах)."""
         self.stats["last_check_datetime"] = now_datetime()
+        self.stats["last_check_ts"] = time_ms
+
+    def update_latest_version(self, latest_version: str):
+        """Запоминает последнюю версию ZeroTier, если она изменилась."""
+        if self.stats.get("latest_zt_version") != latest_version:
+            self.stats["latest_zt_version"] = latest_version
+            print(settings.t("zt_version_db_updated", version=latest_version))
 
 
-def run_check_cycle(state: AppStateManager) -> None:
+def run_check_cycle(
+    state: AppStateManager, sources: list[member_sources.MemberSource]
+) -> None:
     """Основной цикл проверки состояния участников ZeroTier."""
-    state.update_last_check_time()
-    state.increment_checks()
+    with tracing.span("cycle", networks=len(sources)) as span:
+        time_ms = clock.now_ms()
+        state.update_last_check_time(time_ms)
+        state.increment_checks()
+        print(
+            settings.t(
+                "current_datetime", check_time_str=state.stats["last_check_datetime"]
+            )
+        )
+
+        latest_version = api_client.get_latest_zerotier_version(
+            state.stats.get("latest_zt_version")
+        )
+        state.update_latest_version(latest_version)
+        print(settings.t("latest_zt_version", latest_version=latest_version))
+
+        # Каждая сеть проверяется сразу после получения ее ответа, не дожидаясь
+        # остальных: получение и проверка идут одновременно, а оповещения
+        # по быстрым сетям не задерживаются медленными
+        evaluation = CycleEvaluation(
+            state, latest_version, time_ms, [source.network_id for source in sources]
+        )
+        all_members = []
+        for source, members in api_client.iter_network_members(sources):
+            all_members.extend(members or [])
+            evaluation.add_network(source.network_id, members)
+
+        if not all_members:
+            print(settings.t("get_members_failed_skipping"))
+            span.set("status", "no_members")
+            return
+
+        span.set("members", len(all_members))
+        span.set("problems", len(evaluation.finish()))
+        if state.recorder:
+            state.recorder.record(time_ms, latest_version, all_members)
+
+
+class CycleEvaluation:
+    """
+    Проверка участников за один цикл по мере поступления ответов сетей.
+
+    Узел из нескольких сетей проверяется один раз за цикл по объединенной
+    записи (checker.merge_members_by_node), поэтому он откладывается, пока
+    не придут ответы всех его сетей. Состав сетей узла известен по прошлому
+    циклу; новые узлы (и все узлы в первом цикле) проверяются после
+    получения ответов всех сетей. Новое состояние сохраняется, а оповещения
+    по проверенным узлам отправляются сразу после обработки каждого ответа.
+    Уход в офлайн и возвращение в сеть сопоставляются по сети целиком
+    (checker.correlate_status_changes), поэтому такие изменения откладываются,
+    пока не будут проверены все узлы сети.
+    """
+
+    def __init__(
+        self,
+        state: AppStateManager,
+        latest_version: str,
+        time_ms: int,
+        network_ids: list[str] | None = None,
+    ):
+        self.state = state
+        self.latest_version = latest_version
+        self.time_ms = time_ms
+        self.monitored_ids = set(settings.MEMBER_IDS)
+        self.pending_networks = set(network_ids or [])
+        self.failed_networks: set[str] = set()
+        self.problem_reports: list[str] = []
+        # Записи отложенных узлов: ID узла -> записи из полученных сетей
+        self._deferred: dict[str, list[dict]] = {}
+        self._evaluated: set[str] = set()
+        # Еще не проверенные узлы каждой сети из полученных ответов
+        self._unevaluated: dict[str, set[str]] = {}
+        # Изменения онлайн-статуса, ожидающие проверки всех узлов своей сети,
+        # и число проверенных узлов каждой сети за цикл
+        self._status_changes: dict[
+            str, list[tuple[MemberState, OnlineStatusResult]]
+        ] = {}
+        self._network_sizes: dict[str, int] = {}
+        # Сети, в которых узлы встретились в этом цикле (см. finish)
+        self._seen_networks: dict[str, set[str]] = {}
+        self._header_printed = False
+        state.checks.start_cycle()
+
+        monitored_node_ids = {node_id_to_int(node_id) for node_id in self.monitored_ids}
+        for network_id, outage in list(state.network_outages.items()):
+            # Узлы, исключенные из мониторинга, в сбое больше не учитываются
+            for node_id in outage.keys() - monitored_node_ids:
+                del outage[node_id]
+            if not outage:
+                del state.network_outages[network_id]
+
+    def add_network(self, network_id: str, members: list[dict] | None) -> None:
+        """Учитывает ответ сети (None - ответ не получен) и проверяет готовые узлы."""
+        self.pending_networks.discard(network_id)
+        if members is None:
+            self.failed_networks.add(network_id)
+        with tracing.span(
+            "network.evaluate", network=network_id, members=len(members or [])
+        ):
+            self.add_members(members or [])
+
+    def add_members(self, members: list[dict]) -> None:
+        """Добавляет записи участников и проверяет узлы, записи которых собраны."""
+        for member in members:
+            node_id = member["nodeId"]
+            if node_id not in self.monitored_ids:
+                continue
+            network_id = member.get("networkId", "")
+            self._seen_networks.setdefault(node_id, set()).add(network_id)
+            # Узел уже проверен (например, появился в новой для него сети)
+            if node_id not in self._evaluated:
+                self._deferred.setdefault(node_id, []).append(member)
+                self._unevaluated.setdefault(network_id, set()).add(node_id)
+
+        ready = [node_id for node_id in self._deferred if self._is_ready(node_id)]
+        self._evaluate(
+            [record for node_id in ready for record in self._deferred.pop(node_id)]
+        )
+
+    def _is_ready(self, node_id: str) -> bool:
+        """Проверяет, пришли ли ответы всех сетей, в которых состоит узел."""
+        if not self.pending_networks:
+            return True
+        known_networks = self.state.member_networks.get(node_id)
+        return known_networks is not None and not (
+            known_networks & self.pending_networks
+        )
+
+    def _is_network_complete(self, network_id: str) -> bool:
+        """Проверяет, получен ли ответ сети и проверены ли все ее узлы."""
+        return network_id not in self.pending_networks and not self._unevaluated.get(
+            network_id
+        )
+
+    def _evaluate(self, records: list[dict]) -> None:
+        """Проверяет узлы, сохраняет их новое состояние и отправляет оповещения."""
+        # Без новых узлов сопоставляются только отложенные изменения,
+        # если их сети стали полными (например, при завершении цикла)
+        if not records and not any(self._status_changes.values()):
+            return
+        self._print_header()
+        state = self.state
+        batch_reports = []
+        # Узел из нескольких сетей проверяется и сохраняется один раз за цикл
+        for member in checker.merge_members_by_node(records):
+            self._evaluated.add(member["nodeId"])
+            for network in member["networks"]:
+                self._unevaluated.get(network["networkId"], set()).discard(
+                    member["nodeId"]
+                )
+            # 1. Получаем предыдущее состояние из кэша (ключ - числовой ID)
+            previous_state = state.cache.get_member_state(
+                node_id_to_int(member["nodeId"])
+            )
+            # 2. Вызываем "чистую" функцию проверки, передавая ей состояние
+            # и проверки реестра (дорогие проверки только отбирают цели)
+            with tracing.span(
+                "member.process",
+                node=member["nodeId"],
+                network=member.get("networkId", ""),
+            ) as span:
+                new_state, member_reports, online_status = checker.process_member(
+                    member,
+                    self.latest_version,
+                    self.time_ms,
+                    previous_state,
+                    state.checks.checks,
+                )
+                span.set("reports", len(member_reports))
+            # 3. Сохраняем новое состояние в кэш (запись в БД - отложенная)
+            state.cache.set_member_state(new_state)
+            batch_reports.extend(member_reports)
+            network_id = new_state.network_id
+            self._network_sizes[network_id] = self._network_sizes.get(network_id, 0) + 1
+            changes = self._status_changes.setdefault(network_id, [])
+            if online_status.escalated or online_status.recovered:
+                changes.append((new_state, online_status))
+
+        # Уход в офлайн и возвращение в сеть: при сбое всей сети - одним отчетом,
+        # а отдельные узлы проверяются пингом вместе с другими дорогими проверками.
+        # Доля узлов в сбое считается по сети целиком, поэтому сопоставляются
+        # только сети, все узлы которых уже проверены
+        complete_networks = [
+            network_id
+            for network_id in self._status_changes
+            if self._is_network_complete(network_id)
+        ]
+        status_changes = [
+            change
+            for network_id in complete_networks
+            for change in self._status_changes.pop(network_id)
+        ]
+        ping_targets: dict[int, tuple[str, str, int]] = {}
+        correlated_reports = checker.correlate_status_changes(
+            status_changes, self._network_sizes, state.network_outages, ping_targets
+        )
+        ping_check = state.checks.get(checks.OfflinePingCheck.name)
+        if ping_check:
+            for node_id, (name, ip_address, index) in ping_targets.items():
+                ping_check.pending[node_id] = (
+                    name,
+                    ip_address,
+                    len(batch_reports) + index,
+                )
+        batch_reports.extend(correlated_reports)
+        # 4. Дорогие проверки (пинг, задержка, изменения конфигурации) - пакетом
+        state.checks.run_expensive(batch_reports)
+        self._report(batch_reports)
+
+    def _print_header(self) -> None:
+        """Выводит заголовок результатов проверки перед первыми результатами."""
+        if not self._header_printed:
+            print(f"\n{settings.t('check_results_header')}")
+            self._header_printed = True
+
+    def _report(self, reports: list[str]) -> None:
+        """Учитывает новые проблемы и ставит оповещение о них в очередь отправки."""
+        if reports:
+            self.problem_reports.extend(reports)
+            if self.state.is_fenced():
+                print(settings.t("leader_alerts_suppressed", count=len(reports)))
+                return
+            self.state.add_problem_reports(reports)
+            # Флаги оповещений записываются до отправки: после сбоя
+            # или смены ведущего оповещение не будет отправлено повторно
+            self.state.save()
+            report_findings(reports)
+
+    def finish(self) -> list[str]:
+        """
+        Проверяет оставшиеся узлы (их сети не ответили)
+        и запоминает состав сетей узлов для следующего цикла.
+        Возвращает все отчеты о проблемах за цикл.
+        """
+        self.pending_networks.clear()
+        self.add_members([])
+
+        state = self.state
+        # Сеть, не ответившая в этом цикле, остается в составе сетей узла,
+        # иначе в следующем цикле узел был бы проверен без ее записи
+        for node_id, networks in self._seen_networks.items():
+            networks.update(
+                state.member_networks.get(node_id, set()) & self.failed_networks
+            )
+        state.member_networks = {
+            node_id: frozenset(networks)
+            for node_id, networks in self._seen_networks.items()
+        }
+
+        if not self.problem_reports:
+            self._print_header()
+            print(f"\n{settings.t('no_new_problems')}")
+        return self.problem_reports
+
+
+def evaluate_members(
+    state: AppStateManager, all_members: list[dict], latest_version: str, time_ms: int
+) -> list[str]:
+    """
+    Проверяет отслеживаемых участников, сохраняет их новое состояние
+    и отправляет отчет о проблемах. Возвращает список отчетов.
+    """
+    evaluation = CycleEvaluation(state, latest_version, time_ms)
+    evaluation.add_members(all_members)
+    return evaluation.finish()
+
+
+def apply_config_changes(
+    state: AppStateManager,
+    sources: dict[str, member_sources.MemberSource],
+    watcher: ConfigWatcher,
+) -> dict[str, member_sources.MemberSource]:
+    """
+    Применяет изменения списка сетей и участников между циклами.
+    Пересоздаются только источники измененных сетей, а из состояния
+    удаляются только данные участников, которые больше не отслеживаются.
+    """
+    config = watcher.poll()
+    if config is None:
+        return sources
+
+    new_sources = member_sources.rebuild_member_sources(sources, config.networks)
+    old_member_ids = set(settings.MEMBER_IDS)
+    new_member_ids = set(config.member_ids)
+    removed_member_ids = old_member_ids - new_member_ids
+
+    # Новая конфигурация полностью разобрана и проверена - применяем ее целиком
+    settings.ZEROTIER_NETWORKS = config.networks
+    settings.MEMBER_IDS = config.member_ids
+    state.checks.forget({node_id_to_int(node_id) for node_id in removed_member_ids})
+
     print(
         settings.t(
-            "current_datetime", check_time_str=state.stats["last_check_datetime"]
+            "config_reloaded",
+            added_networks=len(new_sources.keys() - sources.keys()),
+            removed_networks=len(sources.keys() - new_sources.keys()),
+            added_members=len(new_member_ids - old_member_ids),
+            removed_members=len(removed_member_ids),
         )
     )
+    return new_sources
 
-    time_ms = int(datetime.now().timestamp() * 1000)
 
-    latest_version = api_client.get_latest_zerotier_version()
-    print(settings.t("latest_zt_version", latest_version=latest_version))
-
-    all_members = api_client.get_all_members(settings.ZEROTIER_NETWORKS)
+def run_monitoring_step(
+    state: AppStateManager, sources: list[member_sources.MemberSource]
+) -> None:
+    """
+    Выполняет один шаг мониторинга: ежедневный отчет при смене дня,
+    цикл проверки, публикацию снимка для HTTP API и отложенную запись в БД.
+    """
+    state.handle_daily_rollover()
+    # Соединения с API открываются заранее, чтобы их установка
+    # не входила во время цикла
+    if settings.HTTP_PREWARM_ENABLED:
+        transport.get_transport().prewarm(
+            [source.base_url for source in sources if source.base_url]
+        )
+    cycle_start = clock.monotonic()
+    with transport.get_transport().measure():
+        run_check_cycle(state, sources)
+    transport.log_connection_stats()
+    # Публикуем снимок состояния для HTTP API
+    snapshot.publish(
+        snapshot.build_snapshot(
+            state.cache.member_states,
+            state.cache.open_incidents,
+            state.stats,
+            clock.monotonic() - cycle_start,
+        )
+    )
 
-    if not all_members:
-        print(settings.t("get_members_failed_skipping"))
-        return
+    # Сохраняем изменения в БД, если пришло время записи
+    # (экземпляр, потерявший роль ведущего, БД не изменяет)
+    if not state.is_fenced():
+        state.save()
+    if state.memory_watchdog:
+        state.memory_watchdog.on_cycle()
 
-    print(f"\n{settings.t('check_results_header')}")
 
-    all_problem_reports = []
-    monitored_members = [m for m in all_members if m["nodeId"] in settings.MEMBER_IDS]
+def wait_for_leadership(state: AppStateManager, lease: leader.LeaderLease) -> None:
+    """
+    Работает резервным экземпляром, пока не удастся захватить аренду
+    ведущего. После каждой записи ведущего в БД состояние перечитывается
+    и публикуется для HTTP API, поэтому после перехода первый цикл
+    продолжает работу с актуальными флагами оповещений и инцидентами.
+    """
+    print(settings.t("leader_standby", instance=lease.instance_id))
+    follower = leader.StateFollower()
+    try:
+        while not lease.try_acquire():
+            if follower.changed():
+                state.reload()
+                snapshot.publish(
+                    snapshot.build_snapshot(
+                        state.cache.member_states,
+                        state.cache.open_incidents,
+                        state.stats,
+                        0.0,
+                    )
+                )
+            clock.sleep(lease.poll_interval)
+        # Последние записи прежнего ведущего
+        if follower.changed():
+            state.reload()
+    finally:
+        follower.close()
+    print(settings.t("leader_acquired", instance=lease.instance_id, epoch=lease.epoch))
 
-    for member in monitored_members:
-        node_id = member["nodeId"]
-        # 1. Получаем предыдущее состояние из БД
-        previous_state = db.get_member_state(node_id)
-        # 2. Вызываем "чистую" функцию проверки, передавая ей состояние
-        new_state, member_reports = checker.process_member(
-            member, latest_version, time_ms, previous_state
-        )
-        # 3. Сохраняем новое состояние в БД
-        db.update_member_state(new_state)
-        all_problem_reports.extend(member_reports)
 
-    if all_problem_reports:
-        state.add_problem_reports(all_problem_reports)
-        report_findings(all_problem_reports)
-    else:
-        print(f"\n{settings.t('no_new_problems')}")
+def _handle_sigterm(_signum, _frame):
+    """Обрабатывает SIGTERM так же, как остановку пользователем."""
+    raise KeyboardInterrupt
 
 
 def start_monitoring():
     """Инициализирует и запускает бесконечный цикл мониторинга."""
     db.initialize_database()
-    send_startup_notification()
+    signal.signal(signal.SIGTERM, _handle_sigterm)
 
     state = AppStateManager()
+    lease = (
+        leader.LeaderLease(
+            settings.LEADER_LEASE_FILE,
+            settings.INSTANCE_ID,
+            settings.LEADER_LEASE_TTL_SECONDS,
+        )
+        if settings.LEADER_LEASE_ENABLED
+        else None
+    )
+    state.lease = lease
+    # С резервным экземпляром уведомление отправляется при получении роли ведущего
+    if lease is None:
+        send_startup_notification()
+    sources = member_sources.rebuild_member_sources({}, settings.ZEROTIER_NETWORKS)
+    watcher = (
+        ConfigWatcher(settings.ENV_FILE)
+        if settings.CONFIG_RELOAD_ENABLED and settings.ENV_FILE
+        else None
+    )
+    status_api.start_status_server()
+    telegram_bot.start_command_bot(lambda: not state.is_fenced())
 
     while True:
         try:
-            state.handle_daily_rollover()
-            run_check_cycle(state)
-
-            # Сохраняем обновленную статистику в БД после каждой проверки
-            state.save()
+            if lease and not lease.is_leader:
+                wait_for_leadership(state, lease)
+                lease.start_renewal()
+                send_startup_notification()
+            if watcher:
+                sources = apply_config_changes(state, sources, watcher)
+            run_monitoring_step(state, list(sources.values()))
             print(
                 f"\n{settings.t('pause_before_next_check', minutes=settings.CHECK_INTERVAL_SECONDS // 60)}"
             )
-            time.sleep(settings.CHECK_INTERVAL_SECONDS)
+            clock.sleep(settings.CHECK_INTERVAL_SECONDS)
         except KeyboardInterrupt:
-            send_exit_notification()
+            if not state.is_fenced():
+                state.flush()
+                send_exit_notification()
+            if lease:
+                lease.release()
+            close_notifications()
             print(settings.t("script_stopped_by_user"))
             break
         # pylint: disable=broad-exception-caught
@@ -153,7 +623,7 @@ def start_monitoring():
             print(f"\n{settings.t('unexpected_error', e=e)}")
             # Добавляем паузу после ошибки, чтобы избежать "горячего" цикла
             # в случае повторяющейся проблемы.
-            time.sleep(settings.CHECK_INTERVAL_SECONDS)
+            clock.sleep(settings.CHECK_INTERVAL_SECONDS)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,237 @@
+"""
+Модуль источников данных об участниках сетей ZeroTier.
+Поддерживаются ZeroTier Central (облачный API) и локальный API
+собственного контроллера. Оба источника возвращают участников в формате
+ZeroTier Central, поэтому дальнейшая обработка не зависит от источника.
+"""
+
+import json
+import platform
+import settings
+import tracing
+from send_to_chat import send_alert
+from http_client import ApiClientError, make_request
+
+CENTRAL_SOURCE_TYPE = "central"
+CONTROLLER_SOURCE_TYPE = "controller"
+DEFAULT_CONTROLLER_URL = "http://127.0.0.1:9993/"
+
+
+def default_controller_token_file() -> str:
+    """Возвращает стандартный путь к файлу authtoken.secret для текущей ОС."""
+    system = platform.system().lower()
+    if system == "windows":
+        return r"C:\ProgramData\ZeroTier\One\authtoken.secret"
+    if system == "darwin":
+        return "/Library/Application Support/ZeroTier/One/authtoken.secret"
+    return "/var/lib/zerotier-one/authtoken.secret"
+
+
+class MemberSource:
+    """Базовый класс источника участников одной сети ZeroTier."""
+
+    source_type = ""
+
+    def __init__(self, network_id: str):
+        self.network_id = network_id
+
+    @property
+    def base_url(self) -> str:
+        """Адрес API источника (для заблаговременного открытия соединения)."""
+        return ""
+
+    def fetch_members(self) -> list[dict]:
+        """
+        Получает участников сети в формате ZeroTier Central.
+
+        Raises:
+            ApiClientError: Если получить данные не удалось.
+        """
+        raise NotImplementedError
+
+    def get_members(self) -> list | None:
+        """Получает участников сети, а в случае ошибки отправляет уведомление."""
+        with tracing.span(
+            "source.get_members", network=self.network_id, source=self.source_type
+        ) as span:
+            try:
+                members = self.fetch_members()
+            except ApiClientError as e:
+                span.set("status", "error")
+                # Если после всех попыток произошла ошибка, отправляем уведомление
+                error_message = settings.t(
+                    "alert_failed_to_get_members",
+                    net_id=self.network_id,
+                    attempts=settings.API_RETRY_ATTEMPTS,
+                    error=e,
+                )
+                send_alert(error_message)
+                return None
+            span.set("status", "ok")
+            span.set("members", len(members))
+            return members
+
+
+class CentralMemberSource(MemberSource):
+    """Источник участников из облачного API ZeroTier Central."""
+
+    source_type = CENTRAL_SOURCE_TYPE
+
+    def __init__(self, network_id: str, token: str, api_url: str = settings.API_URL):
+        super().__init__(network_id)
+        self.token = token
+        self.api_url = api_url
+
+    @property
+    def base_url(self) -> str:
+        """Адрес API ZeroTier Central."""
+        return self.api_url
+
+    def fetch_members(self) -> list[dict]:
+        """Получает список участников сети с несколькими попытками."""
+        url = f"{self.api_url}network/{self.network_id}/member"
+        headers = {"Authorization": f"Bearer {self.token}"}
+        error_log_template = settings.t(
+            "error_getting_members", net_id=self.network_id, e="{e}"
+        )
+        response = make_request("GET", url, error_log_template, headers=headers)
+        return response.json()
+
+
+class LocalControllerMemberSource(MemberSource):
+    """
+    Источник участников из локального API собственного контроллера ZeroTier
+    (по умолчанию порт 9993). Контроллер не хранит 'lastSeen', поэтому он
+    вычисляется по таблице пиров контроллера (время последнего пакета).
+    """
+
+    source_type = CONTROLLER_SOURCE_TYPE
+
+    def __init__(
+        self,
+        network_id: str,
+        url: str = DEFAULT_CONTROLLER_URL,
+        token: str | None = None,
+        token_file: str | None = None,
+    ):
+        super().__init__(network_id)
+        self.url = url if url.endswith("/") else url + "/"
+        self.token = token
+        self.token_file = token_file or default_controller_token_file()
+        # Последнее известное время активности узлов: узел, пропавший из
+        # таблицы пиров, должен "стареть", а не выглядеть никогда не бывшим в сети.
+        self._last_seen: dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        """Адрес локального API контроллера."""
+        return self.url
+
+    def _get_headers(self) -> dict:
+        """Возвращает заголовок авторизации, при необходимости читая токен из файла."""
+        if not self.token:
+            try:
+                with open(self.token_file, encoding="utf-8") as token_file:
+                    self.token = token_file.read().strip()
+            except OSError as e:
+                raise ApiClientError(
+                    settings.t(
+                        "controller_token_read_failed", path=self.token_file, error=e
+                    )
+                ) from e
+        return {"X-ZT1-Auth": self.token}
+
+    def _get_json(self, path: str, headers: dict):
+        """Выполняет GET-запрос к локальному API и возвращает JSON."""
+        error_log_template = settings.t(
+            "error_getting_members", net_id=self.network_id, e="{e}"
+        )
+        response = make_request(
+            "GET", self.url + path, error_log_template, headers=headers
+        )
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ApiClientError(f"Failed to parse controller API response: {e}") from e
+
+    def _get_peer_last_seen(self, headers: dict) -> dict[str, int]:
+        """Возвращает время последнего полученного пакета (мс) для каждого пира."""
+        last_seen = {}
+        for peer in self._get_json("peer", headers):
+            receive_times = [
+                path.get("lastReceive") or 0 for path in peer.get("paths") or []
+            ]
+            if receive_times and max(receive_times) > 0:
+                last_seen[peer["address"]] = max(receive_times)
+        return last_seen
+
+    def _normalize_member(self, member: dict) -> dict:
+        """Приводит участника из API контроллера к формату ZeroTier Central."""
+        node_id = member.get("address") or member.get("id")
+        v_major = member.get("vMajor", -1)
+        client_version = (
+            f"{v_major}.{member.get('vMinor', 0)}.{member.get('vRev', 0)}"
+            if v_major is not None and v_major >= 0
+            else "N/A"
+        )
+        return {
+            "nodeId": node_id,
+            "networkId": self.network_id,
+            "name": member.get("name") or node_id,
+            "clientVersion": client_version,
+            "lastSeen": self._last_seen.get(node_id),
+            "config": {
+                "authorized": member.get("authorized", False),
+                "activeBridge": member.get("activeBridge", False),
+                "noAutoAssignIps": member.get("noAutoAssignIps", False),
+                "ipAssignments": member.get("ipAssignments", []),
+                "tags": member.get("tags", []),
+                "capabilities": member.get("capabilities", []),
+            },
+        }
+
+    def fetch_members(self) -> list[dict]:
+        """Получает список участников сети и их активность из локального API."""
+        headers = self._get_headers()
+        base_path = f"controller/network/{self.network_id}/member"
+        member_ids = self._get_json(base_path, headers)
+        self._last_seen.update(self._get_peer_last_seen(headers))
+        return [
+            self._normalize_member(self._get_json(f"{base_path}/{member_id}", headers))
+            for member_id in member_ids
+        ]
+
+
+def create_member_source(network: dict) -> MemberSource:
+    """Создает источник участников по описанию сети из ZEROTIER_NETWORKS_JSON."""
+    source_type = network.get("type", CENTRAL_SOURCE_TYPE)
+    if source_type == CONTROLLER_SOURCE_TYPE:
+        return LocalControllerMemberSource(
+            network["network_id"],
+            url=network.get("url", DEFAULT_CONTROLLER_URL),
+            token=network.get("token"),
+            token_file=network.get("token_file"),
+        )
+    return CentralMemberSource(
+        network["network_id"], network["token"], network.get("url", settings.API_URL)
+    )
+
+
+def network_key(network: dict) -> str:
+    """Возвращает ключ, однозначно описывающий конфигурацию сети."""
+    return json.dumps(network, sort_keys=True)
+
+
+def rebuild_member_sources(
+    current: dict[str, MemberSource], networks: list[dict]
+) -> dict[str, MemberSource]:
+    """
+    Возвращает источники для нового списка сетей. Источники сетей, чья
+    конфигурация не изменилась, переиспользуются вместе с их состоянием;
+    создаются только источники новых и измененных сетей.
+    """
+    sources = {}
+    for network in networks:
+        key = network_key(network)
+        sources[key] = current.get(key) or create_member_source(network)
+    return sources
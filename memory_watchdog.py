@@ -0,0 +1,160 @@
+"""
+Модуль контроля роста памяти при длительной работе мониторинга.
+Раз в заданное число циклов записывает размер резидентной памяти (RSS)
+и статистику выделений tracemalloc, сравнивает снимки tracemalloc
+и выводит места с наибольшим ростом выделенной памяти. Если память
+выросла больше порога, отправляется оповещение.
+
+Отслеживание выделений включается только при создании MemoryWatchdog,
+поэтому при выключенном контроле накладных расходов нет.
+"""
+
+import os
+import sys
+import tracemalloc
+import settings
+from send_to_chat import send_alert
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Глубина стека, сохраняемая для каждого выделения: одного кадра достаточно,
+# чтобы найти место роста, а каждый следующий увеличивает накладные расходы
+TRACEMALLOC_FRAMES = 1
+# Выделения самого tracemalloc и механизма импорта в статистику не попадают
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+MEGABYTE = 1024 * 1024
+
+
+def read_rss_bytes() -> int | None:
+    """
+    Возвращает размер резидентной памяти процесса в байтах.
+    В Linux - текущий (/proc/self/statm), в других Unix-системах -
+    пиковый (getrusage), в Windows - None.
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss в macOS - в байтах, в остальных системах - в килобайтах
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class MemoryWatchdog:
+    """
+    Раз в interval_cycles циклов сравнивает потребление памяти с базовым
+    замером и выводит места с наибольшим ростом выделений. Базовый замер
+    делается при первой проверке, а не при запуске, чтобы рост за счет
+    заполнения кэшей в первых циклах не считался утечкой.
+    """
+
+    def __init__(
+        self, interval_cycles: int, growth_threshold_mb: float, top_sites: int
+    ):
+        self.interval_cycles = interval_cycles
+        self.growth_threshold = growth_threshold_mb * MEGABYTE
+        self.top_sites = top_sites
+        self._cycles = 0
+        self._baseline_rss: int | None = None
+        self._baseline_traced = 0
+        self._baseline_snapshot: tracemalloc.Snapshot | None = None
+        self._previous_snapshot: tracemalloc.Snapshot | None = None
+        # Рост, при превышении которого отправляется следующее оповещение
+        self._next_alert_growth = self.growth_threshold
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        print(
+            settings.t(
+                "memory_watchdog_enabled",
+                cycles=interval_cycles,
+                threshold=growth_threshold_mb,
+            )
+        )
+
+    def on_cycle(self) -> None:
+        """Учитывает завершенный цикл и раз в interval_cycles циклов проверяет память."""
+        self._cycles += 1
+        if self._cycles % self.interval_cycles == 0:
+            self.check()
+
+    def check(self) -> None:
+        """Замеряет память, выводит места наибольшего роста и проверяет порог."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        traced, peak = tracemalloc.get_traced_memory()
+        rss = read_rss_bytes()
+        if self._baseline_snapshot is None:
+            self._baseline_snapshot = snapshot
+            self._baseline_rss = rss
+            self._baseline_traced = traced
+
+        # Рост оценивается по RSS, а если его узнать нельзя - по выделениям Python
+        if rss is not None and self._baseline_rss is not None:
+            growth = rss - self._baseline_rss
+        else:
+            growth = traced - self._baseline_traced
+        print(
+            settings.t(
+                "memory_watchdog_stats",
+                cycles=self._cycles,
+                rss=_format_mb(rss),
+                traced=_format_mb(traced),
+                peak=_format_mb(peak),
+                growth=_format_mb(growth),
+            )
+        )
+        if self._previous_snapshot is not None:
+            for line in self._growing_sites(self._previous_snapshot, snapshot):
+                print(line)
+        self._previous_snapshot = snapshot
+
+        if growth > self._next_alert_growth:
+            self._next_alert_growth = growth + self.growth_threshold
+            sites = self._growing_sites(self._baseline_snapshot, snapshot)
+            send_alert(
+                settings.t(
+                    "memory_watchdog_alert",
+                    growth=_format_mb(growth),
+                    cycles=self._cycles,
+                    rss=_format_mb(rss),
+                    traced=_format_mb(traced),
+                )
+                + "".join(f"\n{line}" for line in sites)
+            )
+
+    def _growing_sites(
+        self, old: tracemalloc.Snapshot, new: tracemalloc.Snapshot
+    ) -> list[str]:
+        """Возвращает строки о местах с наибольшим ростом выделенной памяти."""
+        growing = sorted(
+            (stat for stat in new.compare_to(old, "lineno") if stat.size_diff > 0),
+            key=lambda stat: stat.size_diff,
+            reverse=True,
+        )
+        lines = []
+        for stat in growing[: self.top_sites]:
+            frame = stat.traceback[0]
+            lines.append(
+                settings.t(
+                    "memory_watchdog_site",
+                    site=f"{frame.filename}:{frame.lineno}",
+                    size_kb=round(stat.size_diff / 1024, 1),
+                    count=stat.count_diff,
+                )
+            )
+        return lines
+
+
+def _format_mb(size: int | None) -> str:
+    """Форматирует размер в мегабайтах (или N/A, если он неизвестен)."""
+    return "N/A" if size is None else f"{size / MEGABYTE:.1f}"
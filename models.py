@@ -1,6 +1,6 @@
 """Модуль, содержащий классы данных (модели) для проекта."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import sqlite3
 
 
@@ -9,14 +9,22 @@ class MemberState:
     """
     Представляет полное сохраненное состояние участника сети.
     Инкапсулирует все данные, которые хранятся в БД для одного узла.
+    ID узла хранится числом (см. utils.node_id_to_int).
     """
 
-    node_id: str
+    node_id: int
     name: str
     version_alert_sent: bool = False
     offline_alert_level: int = 0
     last_seen_seconds_ago: int = -1
     problems_count: int = 0
+    # Абсолютное время последней активности (мс, Unix), 0 - неизвестно.
+    # В отличие от относительного значения, не устаревает при перезапуске.
+    last_seen_ts: int = 0
+    # Сеть, в которой узел был замечен последний раз (для сводок по сетям)
+    network_id: str = ""
+    # Хэш отслеживаемых полей конфигурации (см. checker.config_hash), 0 - неизвестно
+    config_hash: int = 0
 
     @classmethod
     def from_db_row(cls, row: sqlite3.Row | None) -> "MemberState | None":
@@ -34,6 +42,39 @@ class OnlineStatusResult:
     new_offline_alert_level: int
     seconds_ago: int
     last_online_str: str
+    last_seen_ts: int = 0
+    # Уровень оповещения повысился (отчет - об уходе в офлайн)
+    escalated: bool = False
+    # Узел вернулся в сеть после оповещения
+    recovered: bool = False
+    # IP-адрес для проверки пингом при повышении уровня (пинг - отложенный)
+    ping_ip: str | None = None
+
+
+@dataclass
+class MemberCheckContext:
+    """
+    Данные проверки одного узла за цикл (см. checks.py): исходная запись,
+    предыдущее состояние и результаты проверок, из которых строится
+    новое состояние.
+    """
+
+    member: dict
+    node_id: int
+    name: str
+    # Предыдущее состояние (для нового узла - состояние по умолчанию)
+    current_state: MemberState
+    latest_version: str
+    time_ms: int
+    client_version: str
+    ip_assignments: list[str]
+    problems_count: int
+    version_alert_sent: bool
+    reports: list[str] = field(default_factory=list)
+    online_status: OnlineStatusResult | None = None
+    config_hash: int = 0
+    # Новое состояние: заполняется после дешевых проверок
+    new_state: MemberState | None = None
 
 
 @dataclass
@@ -42,3 +83,77 @@ class ProblematicMember:
 
     name: str
     problems_count: int
+
+
+@dataclass
+class LatencyStats:
+    """Представляет сводные показатели задержки и потерь до узла (по окну замеров)."""
+
+    node_id: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    loss_percent: float
+    samples: int
+    slo_alert_sent: bool = False
+
+    @classmethod
+    def from_db_row(cls, row: sqlite3.Row | None) -> "LatencyStats | None":
+        """Создает экземпляр LatencyStats из строки базы данных."""
+        if not row:
+            return None
+        return cls(**dict(row))
+
+
+@dataclass
+class MemberAvailability:
+    """Показатели доступности узла за период (по истории состояний)."""
+
+    node_id: int
+    uptime_percent: float
+    failures: int
+    # Среднее время между сбоями (сек) или None, если сбоев не было
+    mtbf_seconds: float | None
+    longest_outage_seconds: float
+    observed_seconds: float
+
+
+@dataclass
+class NetworkAvailability:
+    """Доступность сети за период: средняя по времени наблюдения узлов."""
+
+    network_id: str
+    uptime_percent: float
+    members: int
+
+
+@dataclass
+class Incident:
+    """
+    Представляет инцидент недоступности узла: открывается при первом
+    оповещении об офлайне и закрывается, когда узел возвращается в сеть.
+    """
+
+    node_id: int
+    opened_ts: int
+    peak_level: int
+    closed_ts: int | None = None
+    duration_seconds: int | None = None
+
+    @classmethod
+    def from_db_row(cls, row: sqlite3.Row | None) -> "Incident | None":
+        """Создает экземпляр Incident из строки базы данных."""
+        if not row:
+            return None
+        return cls(**dict(row))
+
+
+@dataclass
+class IncidentSummary:
+    """Сводка по инцидентам за период."""
+
+    opened: int
+    closed: int
+    # Среднее время восстановления (сек) по закрытым инцидентам или None
+    mttr_seconds: float | None
+    currently_open: int
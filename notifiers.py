@@ -0,0 +1,254 @@
+"""
+Модуль каналов доставки уведомлений (Telegram, webhook, SMTP).
+Каждый канал обслуживается собственным фоновым потоком с очередью,
+поэтому медленный канал не задерживает ни другие каналы, ни цикл проверки.
+Доставка одного сообщения (со всеми повторными попытками) ограничена
+таймаутом канала, а очередь - MAX_QUEUED_MESSAGES сообщениями.
+"""
+
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+import settings
+import tracing
+from http_client import make_request
+
+
+class Notifier:
+    """Базовый класс канала доставки уведомлений."""
+
+    name = ""
+
+    def send(self, message: str) -> None:
+        """
+        Доставляет сообщение.
+
+        Raises:
+            Exception: Если доставить сообщение не удалось.
+        """
+        raise NotImplementedError
+
+
+class TelegramNotifier(Notifier):
+    """Отправляет уведомления в чат Telegram."""
+
+    name = "telegram"
+
+    def __init__(self, bot_token: str, chat_id: str, timeout: float):
+        self.url = f"{settings.TELEGRAM_API_URL}bot{bot_token}/sendMessage"
+        self.chat_id = chat_id
+        self.timeout = timeout
+
+    def send(self, message: str) -> None:
+        """Отправляет сообщение с повторными попытками в пределах таймаута канала."""
+        payload = {"chat_id": self.chat_id, "text": message}
+        error_log_template = settings.t("telegram_sending_error", e="{e}")
+        make_request(
+            "POST",
+            self.url,
+            error_log_template,
+            total_timeout=self.timeout,
+            json=payload,
+            timeout=self.timeout,
+        )
+
+
+class WebhookNotifier(Notifier):
+    """Отправляет уведомления POST-запросом с JSON на произвольный URL."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, message: str) -> None:
+        """Отправляет сообщение в формате {"text": ...}."""
+        payload = {"text": message, "source": "zero_monitor"}
+        error_log_template = settings.t(
+            "notify_sink_error", sink=self.name, error="{e}"
+        )
+        make_request(
+            "POST",
+            self.url,
+            error_log_template,
+            total_timeout=self.timeout,
+            json=payload,
+            timeout=self.timeout,
+        )
+
+
+class SmtpNotifier(Notifier):
+    """Отправляет уведомления письмом через SMTP-сервер."""
+
+    name = "smtp"
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        recipients: list[str],
+        timeout: float,
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.timeout = timeout
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    def send(self, message: str) -> None:
+        """Отправляет сообщение письмом; тема - первая строка сообщения."""
+        email = EmailMessage()
+        email["Subject"] = message.split("\n", 1)[0][:120]
+        email["From"] = self.sender
+        email["To"] = ", ".join(self.recipients)
+        email.set_content(message)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(email)
+
+
+class SinkWorker:
+    """
+    Фоновый поток с очередью сообщений для одного канала доставки.
+    Если канал недоступен дольше, чем нужно для MAX_QUEUED_MESSAGES
+    сообщений, самые старые из них отбрасываются.
+    """
+
+    _STOP = object()
+    MAX_QUEUED_MESSAGES = 100
+
+    def __init__(self, notifier: Notifier):
+        self.notifier = notifier
+        self.queue: queue.Queue = queue.Queue(self.MAX_QUEUED_MESSAGES)
+        self._put_lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self._run, name=f"notifier-{notifier.name}", daemon=True
+        )
+        self.thread.start()
+
+    def put(self, message: str) -> None:
+        """Ставит сообщение в очередь; доставка попадает в текущую трассу."""
+        self._enqueue((tracing.bind(self._deliver), message))
+
+    def _enqueue(self, item) -> None:
+        """Ставит элемент в очередь без ожидания, отбрасывая самое старое сообщение."""
+        with self._put_lock:
+            if self.queue.full():
+                try:
+                    self.queue.get_nowait()
+                    print(settings.t("notify_queue_full", sink=self.notifier.name))
+                except queue.Empty:
+                    pass
+            # Очередь разбирает только поток канала, поэтому место в ней есть
+            self.queue.put_nowait(item)
+
+    def _run(self):
+        """Последовательно доставляет сообщения из очереди."""
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                return
+            deliver, message = item
+            deliver(message)
+
+    def _deliver(self, message: str) -> None:
+        """Доставляет одно сообщение."""
+        with tracing.span("notify.send", sink=self.notifier.name) as span:
+            try:
+                self.notifier.send(message)
+                span.set("status", "ok")
+                print(settings.t("notify_sink_sent", sink=self.notifier.name))
+            # pylint: disable=broad-exception-caught
+            except Exception as e:
+                span.set("status", "error")
+                # Ошибка одного канала не должна останавливать его поток
+                print(settings.t("notify_sink_error", sink=self.notifier.name, error=e))
+
+    def stop(self, timeout: float) -> None:
+        """Ожидает доставки поставленных в очередь сообщений не дольше timeout."""
+        self._enqueue(self._STOP)
+        self.thread.join(timeout)
+
+
+class NotificationDispatcher:
+    """Рассылает каждое сообщение во все каналы параллельно и без ожидания."""
+
+    def __init__(self, notifiers: list[Notifier]):
+        self.workers = [SinkWorker(notifier) for notifier in notifiers]
+
+    def dispatch(self, message: str) -> None:
+        """Ставит сообщение в очередь каждого канала и сразу возвращает управление."""
+        if not self.workers:
+            print(settings.t("telegram_sending_skipped"))
+            return
+        for worker in self.workers:
+            worker.put(message)
+
+    def close(self, timeout: float) -> None:
+        """Дожидается доставки оставшихся сообщений (общий лимит времени)."""
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            worker.stop(max(0.0, deadline - time.monotonic()))
+        self.workers = []
+
+
+def _create_notifier(sink: str, timeout: float) -> Notifier | None:
+    """Создает канал доставки по имени или возвращает None, если он не настроен."""
+    if sink == TelegramNotifier.name and settings.BOT_TOKEN and settings.CHAT_ID:
+        return TelegramNotifier(settings.BOT_TOKEN, settings.CHAT_ID, timeout)
+    if sink == WebhookNotifier.name and settings.WEBHOOK_URL:
+        return WebhookNotifier(settings.WEBHOOK_URL, timeout)
+    if sink == SmtpNotifier.name and settings.SMTP_HOST and settings.SMTP_TO:
+        return SmtpNotifier(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            settings.SMTP_FROM,
+            settings.SMTP_TO,
+            timeout,
+            settings.SMTP_USER,
+            settings.SMTP_PASSWORD,
+            settings.SMTP_STARTTLS,
+        )
+    return None
+
+
+def create_notifiers() -> list[Notifier]:
+    """Создает каналы доставки, перечисленные в NOTIFY_SINKS."""
+    notifiers = []
+    for sink in settings.NOTIFY_SINKS:
+        notifier = _create_notifier(sink, settings.NOTIFY_SINK_TIMEOUT_SECONDS)
+        if notifier:
+            notifiers.append(notifier)
+        else:
+            print(settings.t("notify_sink_not_configured", sink=sink))
+    return notifiers
+
+
+_dispatcher: NotificationDispatcher | None = None
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    """Возвращает общий диспетчер уведомлений, создавая его при первом вызове."""
+    global _dispatcher  # pylint: disable=global-statement
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher(create_notifiers())
+    return _dispatcher
+
+
+def set_dispatcher(dispatcher: NotificationDispatcher) -> None:
+    """Заменяет общий диспетчер уведомлений (например, заглушкой при воспроизведении)."""
+    global _dispatcher  # pylint: disable=global-statement
+    _dispatcher = dispatcher
@@ -0,0 +1,305 @@
+"""
+Модуль непрерывного замера задержки (RTT) и потерь пакетов до узлов ZeroTier.
+Для каждого узла хранится компактное окно последних результатов, по которому
+считаются перцентили и потери.
+
+Если установлена утилита fping, все узлы замеряются одним процессом:
+запросы к разным узлам идут с интервалом 1 мс, поэтому цикл занимает около
+(узлов x PROBE_COUNT) мс плюс время ожидания последнего ответа -
+например, около 7 секунд для 2000 узлов при PROBE_COUNT=3. Иначе каждый
+узел пингуется отдельным процессом ping, PROBE_CONCURRENCY одновременно:
+на Linux и Windows это PROBE_COUNT x 0,2 + 1 секунд на узел (около 100 секунд
+для 2000 узлов при PROBE_CONCURRENCY=32), на macOS и BSD - около PROBE_COUNT + 1
+секунд на узел, что подходит лишь для сотен узлов.
+"""
+
+import math
+import platform
+import re
+import shutil
+import subprocess
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import settings
+import tracing
+from models import LatencyStats
+from utils import node_id_to_hex
+
+# Время ответа в выводе ping: "time=0.045 ms", "time<1ms", "время=12мс"
+_RTT_PATTERN = re.compile(r"(?:time|время)[=<]\s*([\d.]+)\s*(?:ms|мс)", re.IGNORECASE)
+
+
+# Интервал между запросами fping к разным узлам (мс) и время ожидания ответа (мс)
+FPING_INTERVAL_MS = 1
+FPING_TIMEOUT_MS = 1000
+# Коды завершения fping: ошибка аргументов или системного вызова
+_FPING_FAILURE_CODES = (3, 4)
+
+
+@dataclass
+class ProbeResult:
+    """Представляет результат одного замера: времена ответов и число запросов."""
+
+    rtts_ms: list[float]
+    sent: int
+
+
+def probe_host(ip_address: str, count: int) -> ProbeResult:
+    """
+    Отправляет несколько ICMP-запросов к хосту и возвращает времена ответов.
+
+    Args:
+        ip_address: IP-адрес для проверки.
+        count: Количество запросов.
+
+    Returns:
+        ProbeResult с временами ответов (мс) и количеством отправленных запросов.
+    """
+    system = platform.system().lower()
+    if system == "windows":
+        command = ["ping", "-n", str(count), "-w", "1000", ip_address]
+    elif system == "linux":
+        command = ["ping", "-c", str(count), "-i", "0.2", "-W", "1", ip_address]
+    else:
+        # На macOS и BSD -W задается в миллисекундах, а интервал меньше
+        # секунды в BSD доступен только root: используются значения по умолчанию
+        command = ["ping", "-c", str(count), ip_address]
+
+    try:
+        output = subprocess.run(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+            check=False,
+        ).stdout
+    except FileNotFoundError:
+        print(settings.t("ping_command_not_found", ip=ip_address))
+        return ProbeResult([], 0)
+    rtts = [float(match) for match in _RTT_PATTERN.findall(output)]
+    return ProbeResult(rtts[:count], count)
+
+
+def probe_hosts_fping(
+    ip_addresses: list[str], count: int
+) -> dict[str, ProbeResult] | None:
+    """
+    Замеряет задержку до всех хостов одним процессом fping.
+
+    Args:
+        ip_addresses: IP-адреса для проверки (без повторов).
+        count: Количество запросов к каждому хосту.
+
+    Returns:
+        Словарь IP-адрес -> ProbeResult или None, если fping не удалось
+        запустить (тогда хосты замеряются по отдельности через ping).
+    """
+    command = [
+        "fping",
+        "-q",
+        "-C",
+        str(count),
+        "-p",
+        "200",
+        "-i",
+        str(FPING_INTERVAL_MS),
+        "-t",
+        str(FPING_TIMEOUT_MS),
+    ]
+    try:
+        # Адреса передаются через stdin: их может быть больше лимита аргументов
+        completed = subprocess.run(
+            command,
+            input="\n".join(ip_addresses),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            check=False,
+        )
+    except OSError as e:
+        print(settings.t("fping_failed", error=e))
+        return None
+    if completed.returncode in _FPING_FAILURE_CODES:
+        print(settings.t("fping_failed", error=completed.stderr.strip()))
+        return None
+    results = {ip_address: ProbeResult([], count) for ip_address in ip_addresses}
+    # Строка результата: "10.147.17.5 : 0.51 0.48 -" ("-" - нет ответа)
+    for line in completed.stderr.splitlines():
+        ip_address, separator, values = line.partition(" : ")
+        if not separator or ip_address.strip() not in results:
+            continue
+        results[ip_address.strip()] = ProbeResult(
+            [float(value) for value in values.split() if value != "-"][:count],
+            count,
+        )
+    return results
+
+
+class LatencyWindow:
+    """
+    Кольцевой буфер последних замеров узла. Хранит времена ответов
+    и признаки успеха запросов в компактных массивах.
+    """
+
+    __slots__ = ("rtts", "outcomes", "_rtt_pos", "_outcome_pos")
+
+    def __init__(self):
+        self.rtts = array("f")
+        self.outcomes = array("B")
+        self._rtt_pos = 0
+        self._outcome_pos = 0
+
+    @staticmethod
+    def _push(buffer: array, position: int, value) -> int:
+        """Добавляет значение в кольцевой буфер и возвращает новую позицию."""
+        if len(buffer) < settings.PROBE_WINDOW_SAMPLES:
+            buffer.append(value)
+        else:
+            buffer[position] = value
+        return (position + 1) % settings.PROBE_WINDOW_SAMPLES
+
+    def add(self, result: ProbeResult) -> None:
+        """Добавляет результаты замера в окно."""
+        for rtt in result.rtts_ms:
+            self._rtt_pos = self._push(self.rtts, self._rtt_pos, rtt)
+        received = len(result.rtts_ms)
+        for index in range(result.sent):
+            self._outcome_pos = self._push(
+                self.outcomes, self._outcome_pos, 1 if index < received else 0
+            )
+
+    def summarize(self, node_id: int, slo_alert_sent: bool) -> LatencyStats:
+        """Считает перцентили задержки и долю потерь по окну."""
+        ordered = sorted(self.rtts)
+
+        def percentile(share: float) -> float:
+            # Метод ближайшего ранга; при отсутствии ответов возвращаем -1
+            if not ordered:
+                return -1.0
+            rank = max(0, min(len(ordered) - 1, math.ceil(share * len(ordered)) - 1))
+            return round(ordered[rank], 2)
+
+        total = len(self.outcomes)
+        loss = 100.0 * (total - sum(self.outcomes)) / total if total else 0.0
+        return LatencyStats(
+            node_id,
+            percentile(0.50),
+            percentile(0.95),
+            percentile(0.99),
+            round(loss, 2),
+            total,
+            slo_alert_sent,
+        )
+
+
+def is_slo_violated(latency: LatencyStats) -> bool:
+    """Проверяет, нарушены ли SLO по задержке или потерям."""
+    return (
+        latency.p95_ms > settings.PROBE_RTT_SLO_MS
+        or latency.loss_percent > settings.PROBE_LOSS_SLO_PERCENT
+    )
+
+
+class LatencyProber:
+    """Выполняет замеры для всех узлов за цикл и формирует оповещения по SLO."""
+
+    def __init__(self):
+        self.windows: dict[int, LatencyWindow] = {}
+        # Замер всех узлов одним процессом fping (см. probe_hosts_fping)
+        self.batched = shutil.which("fping") is not None
+
+    def _probe_all(self, targets: dict[int, tuple[str, str]]) -> list[ProbeResult]:
+        """Замеряет все цели: одним процессом fping или параллельно через ping."""
+        node_ids = list(targets)
+        if self.batched:
+            ip_addresses = list(dict.fromkeys(ip for _, ip in targets.values()))
+            with tracing.span("probe.batch", targets=len(ip_addresses)) as span:
+                results = probe_hosts_fping(ip_addresses, settings.PROBE_COUNT)
+                span.set("status", "ok" if results is not None else "failed")
+            if results is not None:
+                return [results[targets[node_id][1]] for node_id in node_ids]
+            # fping не работает: дальше узлы пингуются по отдельности
+            self.batched = False
+
+        def probe(node_id: int) -> ProbeResult:
+            ip_address = targets[node_id][1]
+            with tracing.span(
+                "probe", node=node_id_to_hex(node_id), ip=ip_address
+            ) as span:
+                result = probe_host(ip_address, settings.PROBE_COUNT)
+                span.set("replies", len(result.rtts_ms))
+                return result
+
+        with ThreadPoolExecutor(max_workers=settings.PROBE_CONCURRENCY) as executor:
+            return list(executor.map(tracing.bind(probe), node_ids))
+
+    def seconds_per_target(self) -> float:
+        """Оценивает время замера одного узла (для бюджета дорогих проверок)."""
+        if self.batched:
+            return settings.PROBE_COUNT * FPING_INTERVAL_MS / 1000
+        if platform.system().lower() in ("windows", "linux"):
+            # Запросы с интервалом 0,2 с и ожидание последнего ответа до 1 с
+            return settings.PROBE_COUNT * 0.2 + 1
+        return settings.PROBE_COUNT + 1
+
+    def probe_cycle(
+        self,
+        targets: dict[int, tuple[str, str]],
+        latency_stats: dict[int, LatencyStats],
+    ) -> tuple[list[LatencyStats], list[str]]:
+        """
+        Замеряет задержку до всех узлов.
+
+        Args:
+            targets: Словарь node_id -> (имя узла, IP-адрес для замера).
+            latency_stats: Текущие показатели узлов (для флагов оповещений).
+
+        Returns:
+            Кортеж (новые показатели задержки, отчеты о нарушениях SLO).
+        """
+        if not targets:
+            return [], []
+        print(settings.t("probing_nodes", count=len(targets)))
+        node_ids = list(targets)
+        results = self._probe_all(targets)
+
+        new_stats = []
+        reports = []
+        for node_id, result in zip(node_ids, results):
+            window = self.windows.setdefault(node_id, LatencyWindow())
+            window.add(result)
+            previous = latency_stats.get(node_id)
+            was_alert_sent = bool(previous.slo_alert_sent) if previous else False
+            latency = window.summarize(node_id, was_alert_sent)
+            name = targets[node_id][0]
+            violated = is_slo_violated(latency)
+            if violated and not was_alert_sent:
+                reports.append(
+                    settings.t(
+                        "latency_slo_violated_report",
+                        name=name,
+                        p95=latency.p95_ms,
+                        loss=latency.loss_percent,
+                    )
+                )
+                latency.slo_alert_sent = True
+            elif not violated and was_alert_sent:
+                reports.append(
+                    settings.t(
+                        "latency_slo_restored_report",
+                        name=name,
+                        p95=latency.p95_ms,
+                        loss=latency.loss_percent,
+                    )
+                )
+                latency.slo_alert_sent = False
+            new_stats.append(latency)
+        return new_stats, reports
+
+    def forget(self, node_ids: set[int]) -> None:
+        """Удаляет окна замеров узлов, которые больше не отслеживаются."""
+        for node_id in node_ids:
+            self.windows.pop(node_id, None)
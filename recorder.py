@@ -0,0 +1,44 @@
+"""
+Модуль записи снимков ответов API ZeroTier в сжатый архив JSON Lines.
+Каждый цикл записывается отдельным gzip-блоком, поэтому архив остается
+читаемым даже после аварийной остановки во время записи.
+"""
+
+import gzip
+import json
+from typing import Iterator
+import settings
+
+
+class CycleRecorder:
+    """Записывает исходные данные каждого цикла проверки в архив."""
+
+    def __init__(self, path: str):
+        self.path = path
+        print(settings.t("recording_cycles_to", path=path))
+
+    def record(self, time_ms: int, latest_version: str, members: list[dict]) -> None:
+        """Добавляет в архив данные одного цикла."""
+        record = {
+            "time_ms": time_ms,
+            "latest_version": latest_version,
+            "member_ids": list(settings.MEMBER_IDS),
+            "members": members,
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with open(self.path, "ab") as archive:
+            archive.write(gzip.compress(line.encode("utf-8")))
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    """
+    Построчно читает записи циклов из архива. Поврежденный хвост архива
+    (например, после аварийной остановки) пропускается.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        try:
+            for line in archive:
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile, json.JSONDecodeError) as e:
+            print(settings.t("archive_tail_damaged", path=path, error=e))
@@ -0,0 +1,126 @@
+"""
+Модуль воспроизведения архива, записанного в режиме RECORD_ARCHIVE_FILE.
+Прогоняет записанные циклы через полную проверку максимально быстро,
+без обращений к сети и с заглушкой вместо Telegram, и выводит
+пропускную способность и оповещения, которые были бы отправлены.
+
+Запуск: python replay.py <архив.jsonl.gz> [--verbose]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+
+# Настройки офлайн-режима задаются до импорта settings: список узлов берется
+# из архива, а запись архива, замеры задержки и HTTP API отключаются.
+os.environ.setdefault("ZEROTIER_NETWORKS_JSON", "[]")
+os.environ.setdefault("MEMBER_IDS_CSV", "0000000000")
+os.environ["RECORD_ARCHIVE_FILE"] = ""
+os.environ["PROBE_ENABLED"] = "false"
+os.environ["STATUS_API_PORT"] = "0"
+# Состояния узлов хранятся во временной БД, а не в рабочем файле mmap
+os.environ["STATE_BACKEND"] = "sqlite"
+os.environ["STATE_FLUSH_INTERVAL_SECONDS"] = "3600"
+
+# pylint: disable=wrong-import-position
+import checker
+import database_manager as db
+import main
+import notifiers
+import settings
+from recorder import iter_records
+
+
+class CollectingDispatcher(notifiers.NotificationDispatcher):
+    """Заглушка диспетчера уведомлений: сохраняет сообщения вместо отправки."""
+
+    def __init__(self):
+        super().__init__([])
+        self.cycle_time_ms = 0
+        self.alerts: list[tuple[int, str]] = []
+
+    def dispatch(self, message: str) -> None:
+        """Запоминает сообщение вместе со временем воспроизводимого цикла."""
+        self.alerts.append((self.cycle_time_ms, message))
+
+    def close(self, timeout: float) -> None:
+        """Отправлять нечего: сообщения только сохраняются."""
+
+
+def replay(path: str, verbose: bool = False) -> CollectingDispatcher:
+    """Воспроизводит архив и печатает сводку. Возвращает собранные оповещения."""
+    dispatcher = CollectingDispatcher()
+    notifiers.set_dispatcher(dispatcher)
+    # Пинг - сетевая операция, при воспроизведении узел считается недоступным
+    checker.ping_host = lambda ip_address: False
+
+    cycles = 0
+    evaluations = 0
+    print(settings.t("replay_started", path=path))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings.DB_FILE = os.path.join(temp_dir, "replay_state.db")
+        output = None if verbose else io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            db.initialize_database()
+            state = main.AppStateManager()
+            for record in iter_records(path):
+                settings.MEMBER_IDS = record["member_ids"]
+                dispatcher.cycle_time_ms = record["time_ms"]
+                state.update_last_check_time(record["time_ms"])
+                state.increment_checks()
+                state.update_latest_version(record["latest_version"])
+                main.evaluate_members(
+                    state,
+                    record["members"],
+                    record["latest_version"],
+                    record["time_ms"],
+                )
+                cycles += 1
+                evaluations += len(
+                    {
+                        m["nodeId"]
+                        for m in record["members"]
+                        if m["nodeId"] in settings.MEMBER_IDS
+                    }
+                )
+                if output:
+                    # Вывод циклов не нужен, очищаем буфер, чтобы не копить память
+                    output.seek(0)
+                    output.truncate()
+            state.flush()
+        elapsed = time.perf_counter() - started
+
+    print(
+        settings.t(
+            "replay_summary",
+            cycles=cycles,
+            evaluations=evaluations,
+            seconds=round(elapsed, 3),
+            cycles_per_second=round(cycles / elapsed, 1) if elapsed else cycles,
+            evaluations_per_second=(
+                round(evaluations / elapsed, 1) if elapsed else evaluations
+            ),
+            alerts=len(dispatcher.alerts),
+        )
+    )
+    for time_ms, message in dispatcher.alerts:
+        cycle_time = datetime.fromtimestamp(time_ms / 1000).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        print(f"\n[{cycle_time}]\n{message}")
+    return dispatcher
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=settings.t("replay_description"))
+    parser.add_argument("archive", help=settings.t("replay_archive_help"))
+    parser.add_argument(
+        "--verbose", action="store_true", help=settings.t("replay_verbose_help")
+    )
+    args = parser.parse_args()
+    replay(args.archive, args.verbose)
@@ -1,28 +1,74 @@
-"""Модуль для отправки уведомлений и отчетов о состоянии ZeroTier в Telegram."""
+"""Модуль для отправки уведомлений и отчетов о состоянии ZeroTier (Telegram и другие каналы)."""
 
-from datetime import date
+from typing import IO
+import clock
+import daily_report
+import notifiers
 import settings
+import tracing
 from http_client import ApiClientError, make_request
 from models import ProblematicMember
 
 
-def send_telegram_alert(message: str) -> None:
-    """Отправляет сообщение в Telegram с несколькими попытками в случае сбоя."""
-    if not settings.BOT_TOKEN or not settings.CHAT_ID:
-        print(settings.t("telegram_sending_skipped"))
+def send_alert(message: str) -> None:
+    """
+    Отправляет сообщение во все настроенные каналы (Telegram, webhook, SMTP).
+    Доставка выполняется в фоне, функция не ждет ее завершения.
+    """
+    notifiers.get_dispatcher().dispatch(message)
+
+
+def close_notifications() -> None:
+    """Дожидается доставки оставшихся уведомлений перед остановкой."""
+    notifiers.get_dispatcher().close(settings.NOTIFY_SINK_TIMEOUT_SECONDS)
+
+
+def telegram_api_url(method: str) -> str:
+    """Возвращает URL метода Bot API Telegram для настроенного бота."""
+    return f"{settings.TELEGRAM_API_URL}bot{settings.BOT_TOKEN}/{method}"
+
+
+def send_telegram_message(chat_id: str | int, text: str) -> None:
+    """Отправляет сообщение в указанный чат Telegram (например, ответ на команду)."""
+    error_log_template = settings.t("telegram_sending_error", e="{e}")
+    with tracing.span("telegram.send", method="sendMessage") as span:
+        try:
+            make_request(
+                "POST",
+                telegram_api_url("sendMessage"),
+                error_log_template,
+                json={"chat_id": chat_id, "text": text},
+            )
+            span.set("status", "ok")
+        except ApiClientError as e:
+            span.set("status", "error")
+            print(settings.t("telegram_sending_error", e=e))
+
+
+def send_telegram_document(document: IO[bytes], filename: str, caption: str) -> None:
+    """Отправляет файл в Telegram (sendDocument) с несколькими попытками."""
+    if (
+        not settings.BOT_TOKEN
+        or not settings.CHAT_ID
+        or "telegram" not in settings.NOTIFY_SINKS
+    ):
+        print(settings.t("telegram_document_skipped"))
         return
 
-    url = f"https://api.telegram.org/bot{settings.BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": settings.CHAT_ID, "text": message}
+    url = telegram_api_url("sendDocument")
+    payload = {"chat_id": settings.CHAT_ID, "caption": caption}
+    files = {"document": (filename, document, "application/gzip")}
 
     error_log_template = settings.t("telegram_sending_error", e="{e}")
 
-    try:
-        make_request("POST", url, error_log_template, json=payload)
-        print(settings.t("telegram_notification_sent"))
-    except ApiClientError as e:
-        # Теперь мы логируем настоящую причину сбоя, а не просто "все попытки провалились"
-        print(settings.t("telegram_sending_error", e=e))
+    with tracing.span("telegram.send", method="sendDocument") as span:
+        try:
+            make_request("POST", url, error_log_template, data=payload, files=files)
+            span.set("status", "ok")
+            print(settings.t("telegram_notification_sent"))
+        except ApiClientError as e:
+            span.set("status", "error")
+            print(settings.t("telegram_sending_error", e=e))
 
 
 def report_findings(problem_reports: list[str]):
@@ -32,14 +78,14 @@ def report_findings(problem_reports: list[str]):
     print(alert_message)
 
     print(f"\n{settings.t('sending_telegram_notification')}")
-    send_telegram_alert(alert_message)
+    send_alert(alert_message)
 
 
-def _build_daily_report_message(
-    stats: dict, problematic_members: list[ProblematicMember]
+def build_daily_report_message(
+    stats: dict, problematic_members: list[ProblematicMember], availability: str = ""
 ) -> str:
     """Собирает текст для ежедневного отчета."""
-    report_date = stats.get("last_report_date", str(date.today()))
+    report_date = stats.get("last_report_date", str(clock.today()))
     last_check = stats.get("last_check_datetime", "N/A")
 
     # Собираем отчет по частям для лучшей читаемости
@@ -61,26 +107,53 @@ def _build_daily_report_message(
                     count=member.problems_count,
                 )
             )
+    report_parts.append(availability)
     return "".join(report_parts)
 
 
-def send_daily_report(stats: dict, problematic_members: list[ProblematicMember]):
+def send_daily_report(
+    stats: dict, problematic_members: list[ProblematicMember], availability: str = ""
+):
     """Отправляет ежедневный отчет о работе скрипта и статистике."""
-    message = _build_daily_report_message(stats, problematic_members)
+    message = build_daily_report_message(stats, problematic_members, availability)
     print(f"\n{settings.t('sending_daily_report')}")
     print(message)
-    send_telegram_alert(message)
+    send_alert(message)
+
+
+def send_daily_report_document(
+    stats: dict, problematic_count: int, availability: str = ""
+):
+    """
+    Отправляет краткую сводку ежедневного отчета сообщением, а полный список
+    проблемных узлов - сжатым документом.
+    """
+    report_date = stats.get("last_report_date", str(clock.today()))
+    summary = build_daily_report_message(stats, [], availability) + settings.t(
+        "daily_report_document_summary", count=problematic_count
+    )
+    print(f"\n{settings.t('sending_daily_report')}")
+    print(summary)
+    send_alert(summary)
+
+    document, filename = daily_report.build_report_document(report_date)
+    with document:
+        send_telegram_document(
+            document,
+            filename,
+            settings.t("daily_report_document_title", date=report_date),
+        )
 
 
 def send_startup_notification():
     """Отправляет уведомление о запуске скрипта."""
     message = settings.t("startup_notification", version=settings.PROJECT_VERSION)
     print("\n" + message)
-    send_telegram_alert(message)
+    send_alert(message)
 
 
 def send_exit_notification() -> None:
     """Отправляет уведомление об остановке скрипта."""
     message = settings.t("stop_notification")
     print("\n" + message)
-    send_telegram_alert(message)
+    send_alert(message)
@@ -1,12 +1,15 @@
 """Модуль с настройками и конфигурацией для мониторинга ZeroTier."""
 
 import os
-from dotenv import load_dotenv
+import socket
+from dotenv import find_dotenv, load_dotenv
 from localization import Translator
 import utils
 
-# Загружаем переменные окружения из .env файла
-load_dotenv()
+# Загружаем переменные окружения из .env файла.
+# Путь запоминаем, чтобы отслеживать изменения файла без перезапуска.
+ENV_FILE = find_dotenv()
+load_dotenv(ENV_FILE)
 
 # --- Языковые настройки ---
 # Загрузка языка из .env, по умолчанию 'ru'
@@ -30,18 +33,64 @@ PROJECT_VERSION = utils.get_project_version(PROJECT_VERSION_FALLBACK)
 # --- Загрузка и валидация конфигурации из .env файла ---
 ZEROTIER_NETWORKS = utils.load_zt_networks(t)
 MEMBER_IDS = utils.load_member_ids(t)
+# Применять изменения ZEROTIER_NETWORKS_JSON и MEMBER_IDS_CSV в .env
+# без перезапуска (файл проверяется перед каждым циклом)
+CONFIG_RELOAD_ENABLED = utils.load_bool("CONFIG_RELOAD_ENABLED", True)
 
 # API и Telegram токены
 API_URL = "https://api.zerotier.com/api/v1/"
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Адрес Bot API Telegram (можно указать локальный сервер Bot API или заглушку)
+TELEGRAM_API_URL = (
+    os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/") + "/"
+)
+# Отвечать на команды бота (/status, /offline, /member, /report) из чата TELEGRAM_CHAT_ID
+TELEGRAM_COMMANDS_ENABLED = utils.load_bool("TELEGRAM_COMMANDS_ENABLED", False)
+# Время ожидания новых сообщений в одном запросе getUpdates (long polling), сек.
+TELEGRAM_POLL_TIMEOUT_SECONDS = utils.load_non_negative_int(
+    "TELEGRAM_POLL_TIMEOUT_SECONDS", 30, t
+)
+
+# --- Каналы доставки уведомлений ---
+# Список каналов через запятую: telegram, webhook, smtp
+NOTIFY_SINKS = [
+    sink.strip().lower()
+    for sink in os.getenv("NOTIFY_SINKS", "telegram").split(",")
+    if sink.strip()
+]
+# Таймаут доставки одного уведомления в каждом канале, включая повторные попытки (в секундах)
+NOTIFY_SINK_TIMEOUT_SECONDS = max(
+    1, utils.load_non_negative_int("NOTIFY_SINK_TIMEOUT_SECONDS", 10, t)
+)
+# Webhook: URL, на который отправляется POST с JSON {"text": "..."}
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+# SMTP: сервер, отправитель, получатели (через запятую) и учетные данные
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = utils.load_non_negative_int("SMTP_PORT", 25, t)
+SMTP_FROM = os.getenv("SMTP_FROM", "zero-monitor@localhost")
+SMTP_TO = [
+    address.strip()
+    for address in os.getenv("SMTP_TO", "").split(",")
+    if address.strip()
+]
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = utils.load_bool("SMTP_STARTTLS", False)
 
 # --- Конфигурация файлов, порогов и интервалов ---
-DB_FILE = "monitor_state.db"  # Файл базы данных SQLite
+DB_FILE = os.getenv("DB_FILE") or "monitor_state.db"  # Файл базы данных SQLite
+# Хранилище состояний участников: sqlite (таблица member_states в DB_FILE)
+# или mmap - файл записей фиксированного размера, отображенный в память
+# (см. state_backend.py). Остальные данные всегда хранятся в DB_FILE.
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite").lower()
+# Файл хранилища mmap (по умолчанию - <DB_FILE>-members)
+MMAP_STATE_FILE = os.getenv("MMAP_STATE_FILE", "")
 
 # Порог для определения аномального скачка времени офлайна (в секундах).
-# Если 'lastSeen' от API больше, чем (предыдущее значение + интервал проверки + этот порог),
-# то считаем это аномалией и используем расчетное значение.
+# Если время с 'lastSeen' от API больше, чем время с сохраненного абсолютного
+# времени активности (last_seen_ts) до текущего момента плюс этот порог,
+# то считаем это аномалией и используем время от сохраненного значения.
 # Это нужно для сглаживания редких выбросов в ответах API ZeroTier.
 LAST_SEEN_ANOMALY_THRESHOLD_SECONDS = 200
 
@@ -64,6 +113,129 @@ ONLINE_THRESHOLD_SECONDS = OFFLINE_THRESHOLDS["5m"]["seconds"]
 
 CHECK_INTERVAL_SECONDS = utils.load_check_interval(t)
 
+# Интервал (в секундах) между записями накопленных изменений состояния в БД.
+# Изменения уровней оповещений записываются сразу, чтобы после сбоя
+# не отправлять повторные уведомления. 0 - запись после каждой проверки.
+STATE_FLUSH_INTERVAL_SECONDS = utils.load_non_negative_int(
+    "STATE_FLUSH_INTERVAL_SECONDS", 600, t
+)
+
+# Сколько дней хранить историю состояний узлов (таблица member_history),
+# которую выгружает export.py. 0 - история не ведется.
+HISTORY_RETENTION_DAYS = utils.load_non_negative_int("HISTORY_RETENTION_DAYS", 30, t)
+
+# --- Сбой всей сети ---
+# Если за один цикл в офлайн ушло больше этой доли отслеживаемых узлов сети
+# (и не меньше NETWORK_OUTAGE_MIN_MEMBERS), отправляется один отчет о сбое сети
+# без пингов каждого узла. 0 - отчеты всегда по каждому узлу.
+NETWORK_OUTAGE_FRACTION = utils.load_float("NETWORK_OUTAGE_FRACTION", 0.5, t)
+NETWORK_OUTAGE_MIN_MEMBERS = utils.load_non_negative_int(
+    "NETWORK_OUTAGE_MIN_MEMBERS", 3, t
+)
+
+# --- Изменения конфигурации узлов ---
+# Поля конфигурации узла (config), изменения которых отслеживаются.
+# Каждый цикл сравнивается только их хэш; пусто - отслеживание выключено.
+CONFIG_WATCH_FIELDS = [
+    field.strip()
+    for field in os.getenv(
+        "CONFIG_WATCH_FIELDS",
+        "authorized,ipAssignments,activeBridge,noAutoAssignIps,tags,capabilities",
+    ).split(",")
+    if field.strip()
+]
+
+# --- Бюджет дорогих проверок ---
+# Сколько секунд за цикл могут занимать дорогие проверки (пинг узлов,
+# ушедших в офлайн, замер задержки, чтение конфигурации из БД), см. checks.py.
+# Не уместившиеся цели переносятся на следующий цикл или пропускаются.
+# 0 - без ограничения.
+CHECK_BUDGET_SECONDS = utils.load_float("CHECK_BUDGET_SECONDS", 0.0, t)
+
+# --- Непрерывный замер задержки (RTT) и потерь пакетов ---
+# Если включено, каждый цикл пингуются все узлы в сети по первому адресу
+# из ipAssignments, а по окну последних замеров считаются перцентили.
+PROBE_ENABLED = utils.load_bool("PROBE_ENABLED", False)
+# Количество ICMP-запросов к узлу за один цикл
+PROBE_COUNT = max(1, utils.load_non_negative_int("PROBE_COUNT", 3, t))
+# Количество одновременно проверяемых узлов
+PROBE_CONCURRENCY = max(1, utils.load_non_negative_int("PROBE_CONCURRENCY", 32, t))
+# Размер окна замеров на узел, по которому считаются перцентили и потери
+PROBE_WINDOW_SAMPLES = max(
+    1, utils.load_non_negative_int("PROBE_WINDOW_SAMPLES", 60, t)
+)
+# SLO: допустимый 95-й перцентиль задержки (мс) и доля потерь (%)
+PROBE_RTT_SLO_MS = utils.load_float("PROBE_RTT_SLO_MS", 200.0, t)
+PROBE_LOSS_SLO_PERCENT = utils.load_float("PROBE_LOSS_SLO_PERCENT", 5.0, t)
+
+# --- Ежедневный отчет ---
+# Режим отправки: message - сообщением, document - сводка и сжатый документ,
+# auto - документом, если проблемных узлов больше DAILY_REPORT_MAX_MESSAGE_MEMBERS.
+DAILY_REPORT_MODE = os.getenv("DAILY_REPORT_MODE", "auto").lower()
+DAILY_REPORT_MAX_MESSAGE_MEMBERS = utils.load_non_negative_int(
+    "DAILY_REPORT_MAX_MESSAGE_MEMBERS", 50, t
+)
+# Формат документа: csv или html (в обоих случаях сжимается gzip)
+DAILY_REPORT_DOCUMENT_FORMAT = os.getenv("DAILY_REPORT_DOCUMENT_FORMAT", "csv").lower()
+# Сколько узлов с наименьшей доступностью за сутки показывать в отчете
+# (раздел строится по истории состояний, см. HISTORY_RETENTION_DAYS)
+DAILY_REPORT_AVAILABILITY_MEMBERS = utils.load_non_negative_int(
+    "DAILY_REPORT_AVAILABILITY_MEMBERS", 5, t
+)
+
+# --- Контроль роста памяти ---
+# Раз в сколько циклов замерять память (RSS и выделения tracemalloc)
+# и выводить места наибольшего роста. 0 - контроль выключен.
+MEMORY_WATCHDOG_INTERVAL_CYCLES = utils.load_non_negative_int(
+    "MEMORY_WATCHDOG_INTERVAL_CYCLES", 0, t
+)
+# Рост памяти (МБ) относительно первого замера, после которого отправляется оповещение
+MEMORY_WATCHDOG_GROWTH_MB = utils.load_float("MEMORY_WATCHDOG_GROWTH_MB", 50.0, t)
+# Сколько мест с наибольшим ростом выделений выводить
+MEMORY_WATCHDOG_TOP_SITES = utils.load_non_negative_int(
+    "MEMORY_WATCHDOG_TOP_SITES", 10, t
+)
+
+# --- Запись циклов для воспроизведения ---
+# Путь к архиву (JSON Lines, gzip), в который записываются исходные данные
+# каждого цикла. Пусто - запись отключена. Воспроизведение: python replay.py <архив>
+RECORD_ARCHIVE_FILE = os.getenv("RECORD_ARCHIVE_FILE", "")
+
+# --- Трассировка ---
+# Файл JSON Lines, в который записываются интервалы трассировки
+# (см. tracing.py). Пусто - трассировка отключена.
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Доля записываемых трасс (циклов проверки и других корневых операций), от 0 до 1
+TRACE_SAMPLE_RATE = min(max(utils.load_float("TRACE_SAMPLE_RATE", 0.1, t), 0.0), 1.0)
+
+# --- HTTP API состояния (только чтение) ---
+# Порт HTTP API. 0 - API отключен.
+STATUS_API_PORT = utils.load_non_negative_int("STATUS_API_PORT", 0, t)
+# Адрес, на котором слушает HTTP API. По умолчанию доступен только локально.
+STATUS_API_HOST = os.getenv("STATUS_API_HOST", "127.0.0.1")
+
+# --- HTTP-соединения ---
+# Максимум одновременных запросов к одному хосту (размер пула соединений хоста)
+FETCH_CONCURRENCY = max(1, utils.load_non_negative_int("FETCH_CONCURRENCY", 4, t))
+# Время хранения адресов хостов в кэше DNS (сек.). 0 - кэш отключен.
+DNS_CACHE_TTL_SECONDS = utils.load_non_negative_int("DNS_CACHE_TTL_SECONDS", 300, t)
+# Открывать соединения с API источников перед каждым циклом проверки
+HTTP_PREWARM_ENABLED = utils.load_bool("HTTP_PREWARM_ENABLED", True)
+
+# --- Горячий резерв (ведущий и резервный экземпляры) ---
+# Если включено, проверки выполняет только экземпляр, владеющий арендой
+# в файле LEADER_LEASE_FILE, а остальные ждут ее истечения (см. leader.py).
+# БД (DB_FILE) и файл аренды должны находиться на общем хранилище.
+LEADER_LEASE_ENABLED = utils.load_bool("LEADER_LEASE_ENABLED", False)
+LEADER_LEASE_FILE = os.getenv("LEADER_LEASE_FILE") or f"{DB_FILE}-lease"
+# Время действия аренды (сек.): через столько после остановки ведущего
+# его роль может занять резервный экземпляр
+LEADER_LEASE_TTL_SECONDS = max(
+    3, utils.load_non_negative_int("LEADER_LEASE_TTL_SECONDS", 15, t)
+)
+# Имя экземпляра в аренде и сообщениях (по умолчанию - имя хоста и PID)
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
 # --- Настройки для повторных запросов к API ---
 API_RETRY_ATTEMPTS = 3
 API_RETRY_DELAY_SECONDS = 5
@@ -0,0 +1,327 @@
+"""
+Модуль моделирования длительной работы мониторинга на виртуальных часах.
+Полный цикл проверки (ежедневные отчеты, эскалация оповещений, инциденты,
+история, отложенная запись в БД) выполняется против смоделированных сетей,
+а пауза между циклами мгновенно сдвигает виртуальное время. Неделя
+проверок раз в минуту выполняется за секунды, без обращений к сети
+и с заглушкой вместо Telegram.
+
+Узлы смоделированных сетей случайно уходят в офлайн и возвращаются
+(с заданной вероятностью на каждый цикл). В конце выводится сводка:
+число циклов и ежедневных отчетов, смоделированные сбои и записанные
+инциденты, оповещения и, с флагом --memory, объем памяти по дням.
+
+Запуск: python simulate.py [--days N] [--interval СЕК] [--networks N]
+        [--members N] [--failure-rate P] [--recovery-rate P] [--seed N]
+        [--start ДАТА] [--memory] [--verbose]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Настройки офлайн-режима задаются до импорта settings так же, как в replay.py:
+# список узлов задается моделью, а запись архива, замеры задержки
+# и HTTP API отключаются.
+os.environ.setdefault("ZEROTIER_NETWORKS_JSON", "[]")
+os.environ.setdefault("MEMBER_IDS_CSV", "0000000000")
+os.environ["RECORD_ARCHIVE_FILE"] = ""
+os.environ["PROBE_ENABLED"] = "false"
+os.environ["STATUS_API_PORT"] = "0"
+# Состояния узлов хранятся во временной БД, а не в рабочем файле mmap
+os.environ["STATE_BACKEND"] = "sqlite"
+
+# pylint: disable=wrong-import-position
+import api_client
+import checker
+import clock
+import database_manager as db
+import main
+import notifiers
+import settings
+import utils
+from member_sources import MemberSource
+
+SIMULATED_SOURCE_TYPE = "simulated"
+# Доля узлов со старой версией клиента ZeroTier
+OUTDATED_VERSION_SHARE = 0.1
+
+
+class CountingDispatcher(notifiers.NotificationDispatcher):
+    """
+    Заглушка диспетчера уведомлений: только считает сообщения,
+    чтобы не искажать замер роста памяти.
+    """
+
+    def __init__(self):
+        super().__init__([])
+        self.count = 0
+
+    def dispatch(self, message: str) -> None:
+        """Учитывает сообщение без отправки."""
+        self.count += 1
+
+    def close(self, timeout: float) -> None:
+        """Отправлять нечего: сообщения только считаются."""
+
+
+class SimulatedMemberSource(MemberSource):
+    """
+    Смоделированная сеть ZeroTier: при каждом запросе узлы с заданной
+    вероятностью уходят в офлайн или возвращаются в сеть.
+    """
+
+    source_type = SIMULATED_SOURCE_TYPE
+
+    def __init__(
+        self,
+        network_id: str,
+        node_ids: list[str],
+        failure_rate: float,
+        recovery_rate: float,
+        rng: random.Random,
+    ):
+        super().__init__(network_id)
+        self.failure_rate = failure_rate
+        self.recovery_rate = recovery_rate
+        self.rng = rng
+        self.outages = 0
+        self._members = [
+            {
+                "nodeId": node_id,
+                "networkId": network_id,
+                "name": f"sim-{node_id}",
+                "clientVersion": (
+                    "1.0.0"
+                    if rng.random() < OUTDATED_VERSION_SHARE
+                    else settings.ZT_FALLBACK_VERSION
+                ),
+                "lastSeen": None,
+                "config": {"ipAssignments": [f"10.147.{index // 250}.{index % 250}"]},
+            }
+            for index, node_id in enumerate(node_ids)
+        ]
+        self._online = [True] * len(node_ids)
+
+    @property
+    def node_ids(self) -> list[str]:
+        """ID узлов сети."""
+        return [member["nodeId"] for member in self._members]
+
+    def fetch_members(self) -> list[dict]:
+        """Меняет состояние узлов на один цикл и возвращает их."""
+        now_ms = clock.now_ms()
+        for index, member in enumerate(self._members):
+            if self._online[index]:
+                if self.rng.random() < self.failure_rate:
+                    self._online[index] = False
+                    self.outages += 1
+            elif self.rng.random() < self.recovery_rate:
+                self._online[index] = True
+            if self._online[index]:
+                member["lastSeen"] = now_ms - self.rng.randint(0, 30_000)
+        return [dict(member) for member in self._members]
+
+
+def create_simulated_sources(
+    networks: int,
+    members: int,
+    failure_rate: float,
+    recovery_rate: float,
+    seed: int,
+) -> list[SimulatedMemberSource]:
+    """Создает смоделированные сети с members узлами в каждой."""
+    rng = random.Random(seed)
+    sources = []
+    for network_index in range(networks):
+        node_ids = [
+            utils.node_id_to_hex(network_index * members + index + 1)
+            for index in range(members)
+        ]
+        sources.append(
+            SimulatedMemberSource(
+                f"sim{network_index:012d}",
+                node_ids,
+                failure_rate,
+                recovery_rate,
+                rng,
+            )
+        )
+    return sources
+
+
+def _get_unsynchronized_connection():
+    """
+    Открывает соединение с временной БД моделирования без fsync при записи:
+    ее содержимое не нужно после остановки, а ожидание диска заняло бы
+    большую часть времени моделирования.
+    """
+    conn = _get_db_connection()
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    return conn
+
+
+_get_db_connection = db.get_db_connection
+
+
+def simulate(
+    days: float,
+    interval: int,
+    sources: list[SimulatedMemberSource],
+    start: datetime,
+    trace_memory: bool = False,
+    verbose: bool = False,
+) -> int:
+    """
+    Выполняет циклы мониторинга на виртуальных часах и печатает сводку.
+    Возвращает количество оповещений.
+    """
+    simulated_clock = clock.SimulatedClock(start)
+    clock.set_clock(simulated_clock)
+    dispatcher = CountingDispatcher()
+    notifiers.set_dispatcher(dispatcher)
+    # Сетевые операции заменяются: пинг считается неудачным,
+    # а последней версией ZeroTier считается резервная из настроек
+    checker.ping_host = lambda ip_address: False
+    db.get_db_connection = _get_unsynchronized_connection
+    api_client.get_latest_zerotier_version = (
+        lambda known_version=None: settings.ZT_FALLBACK_VERSION
+    )
+    settings.CHECK_INTERVAL_SECONDS = interval
+    settings.MEMBER_IDS = [node_id for source in sources for node_id in source.node_ids]
+
+    end_ts = clock.now_ms() + int(days * 24 * 60 * 60 * 1000)
+    cycles = 0
+    reports = 0
+    memory_by_day: list[tuple[str, int]] = []
+    if trace_memory:
+        tracemalloc.start()
+    print(
+        settings.t(
+            "simulation_started",
+            days=days,
+            interval=interval,
+            members=len(settings.MEMBER_IDS),
+        )
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings.DB_FILE = os.path.join(temp_dir, "simulation_state.db")
+        output = None if verbose else io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            db.initialize_database()
+            state = main.AppStateManager()
+            while clock.now_ms() < end_ts:
+                report_date = state.last_report_date
+                main.run_monitoring_step(state, sources)
+                cycles += 1
+                if state.last_report_date != report_date:
+                    reports += 1
+                    if trace_memory:
+                        memory_by_day.append(
+                            (str(report_date), tracemalloc.get_traced_memory()[0])
+                        )
+                if output:
+                    # Вывод циклов не нужен, очищаем буфер, чтобы не копить память
+                    output.seek(0)
+                    output.truncate()
+                clock.sleep(interval)
+            state.flush()
+            incidents = db.get_incident_summary(0, clock.now_ms())
+        elapsed = time.perf_counter() - started
+
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(
+        settings.t(
+            "simulation_summary",
+            cycles=cycles,
+            reports=reports,
+            seconds=round(elapsed, 3),
+            cycles_per_second=round(cycles / elapsed, 1) if elapsed else cycles,
+            outages=sum(source.outages for source in sources),
+            incidents=incidents.opened,
+            open_now=incidents.currently_open,
+            alerts=dispatcher.count,
+        )
+    )
+    if trace_memory:
+        for day, size in memory_by_day:
+            print(settings.t("simulation_memory_day", day=day, kb=size // 1024))
+        print(
+            settings.t(
+                "simulation_memory_total", kb=current // 1024, peak_kb=peak // 1024
+            )
+        )
+    return dispatcher.count
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Преобразует аргумент командной строки с датой начала моделирования."""
+    return datetime.fromtimestamp(utils.parse_datetime_arg(value, settings.t) / 1000)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=settings.t("simulation_description"))
+    parser.add_argument(
+        "--days", type=float, default=7, help=settings.t("simulation_days_help")
+    )
+    parser.add_argument(
+        "--interval", type=int, default=60, help=settings.t("simulation_interval_help")
+    )
+    parser.add_argument(
+        "--networks", type=int, default=1, help=settings.t("simulation_networks_help")
+    )
+    parser.add_argument(
+        "--members", type=int, default=20, help=settings.t("simulation_members_help")
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.001,
+        help=settings.t("simulation_failure_rate_help"),
+    )
+    parser.add_argument(
+        "--recovery-rate",
+        type=float,
+        default=0.05,
+        help=settings.t("simulation_recovery_rate_help"),
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1, help=settings.t("simulation_seed_help")
+    )
+    parser.add_argument(
+        "--start",
+        type=_parse_datetime,
+        default=None,
+        help=settings.t("simulation_start_help"),
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help=settings.t("simulation_memory_help")
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help=settings.t("simulation_verbose_help")
+    )
+    args = parser.parse_args()
+    simulate(
+        args.days,
+        args.interval,
+        create_simulated_sources(
+            args.networks,
+            args.members,
+            args.failure_rate,
+            args.recovery_rate,
+            args.seed,
+        ),
+        args.start or datetime.now(),
+        args.memory,
+        args.verbose,
+    )
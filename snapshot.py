@@ -0,0 +1,86 @@
+"""
+Модуль снимка состояния мониторинга в памяти.
+Снимок собирается один раз после каждой проверки и заменяется атомарно,
+поэтому читатели (HTTP API и др.) не обращаются к БД и не блокируют цикл.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+import checker
+import settings
+from models import Incident, MemberState
+from utils import node_id_to_hex, node_id_to_int
+
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """Неизменяемый снимок состояния: данные, готовое JSON-тело и его ETag."""
+
+    data: dict
+    body: bytes
+    etag: str
+    members_by_id: dict[str, dict]
+
+
+_current: StatusSnapshot | None = None
+
+
+def _member_to_dict(state: MemberState, incident: Incident | None) -> dict:
+    """Преобразует состояние участника в словарь для снимка."""
+    seconds_ago = state.last_seen_seconds_ago
+    return {
+        "node_id": node_id_to_hex(state.node_id),
+        "name": state.name,
+        "online": checker.is_member_online(state),
+        "offline_alert_level": state.offline_alert_level,
+        "version_alert_sent": bool(state.version_alert_sent),
+        "last_seen_seconds_ago": seconds_ago,
+        "last_seen_ts": state.last_seen_ts,
+        "problems_count": state.problems_count,
+        "network_id": state.network_id,
+        # Время открытия текущего инцидента недоступности или None
+        "incident_opened_ts": incident.opened_ts if incident else None,
+    }
+
+
+def build_snapshot(
+    member_states: dict[int, MemberState],
+    open_incidents: dict[int, Incident],
+    stats: dict,
+    cycle_seconds: float,
+) -> dict:
+    """Собирает данные снимка из состояний участников и статистики."""
+    monitored_ids = (node_id_to_int(node_id) for node_id in settings.MEMBER_IDS)
+    members = [
+        _member_to_dict(member_states[node_id], open_incidents.get(node_id))
+        for node_id in monitored_ids
+        if node_id in member_states
+    ]
+    return {
+        "cycle": {
+            "last_check_datetime": stats.get("last_check_datetime"),
+            "last_check_ts": stats.get("last_check_ts", 0),
+            "duration_seconds": round(cycle_seconds, 3),
+            "interval_seconds": settings.CHECK_INTERVAL_SECONDS,
+            "checks_today": stats.get("checks_today", 0),
+            "problems_today": stats.get("problems_today", 0),
+            "latest_zt_version": stats.get("latest_zt_version"),
+            "open_incidents": len(open_incidents),
+        },
+        "members": members,
+    }
+
+
+def publish(data: dict) -> None:
+    """Сериализует данные снимка и атомарно делает его текущим."""
+    global _current  # pylint: disable=global-statement
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    members_by_id = {member["node_id"]: member for member in data["members"]}
+    _current = StatusSnapshot(data, body, etag, members_by_id)
+
+
+def current() -> StatusSnapshot | None:
+    """Возвращает текущий снимок или None, если проверок еще не было."""
+    return _current
@@ -0,0 +1,388 @@
+"""
+Модуль хранилищ состояний участников (STATE_BACKEND).
+
+По умолчанию (sqlite) состояния хранятся в таблице member_states вместе
+с остальными данными. При очень большом числе узлов основное время записи
+уходит на обновление строк этой таблицы, поэтому можно выбрать хранилище
+mmap: файл записей фиксированного размера, отображенный в память. Запись
+узла находится по номеру его ячейки и изменяется на месте, без разбора SQL
+и перестроения B-дерева, а читается прямо из отображения, без копирования.
+Статистика, история, инциденты, задержки и конфигурации узлов в обоих
+случаях хранятся в SQLite.
+
+Файл mmap состоит из заголовка (сигнатура, версия формата, размер записи,
+номер последней контрольной точки) и ячеек узлов по две копии записи
+в каждой. Изменения пишутся в неактуальную копию с номером следующей
+контрольной точки, файл сбрасывается на диск (msync), и только после этого
+в заголовок записывается номер новой точки. При загрузке используется копия
+с верной контрольной суммой и наибольшим номером, не превышающим номер
+в заголовке. Поэтому после сбоя (в том числе отключения питания) файл
+соответствует последней завершенной контрольной точке целиком.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from dataclasses import asdict
+from typing import Iterator, Mapping, Sequence
+import database_manager as db
+import settings
+import utils
+from models import MemberState
+
+BACKEND_SQLITE = "sqlite"
+BACKEND_MMAP = "mmap"
+
+MMAP_MAGIC = b"ZTMSTATE"
+MMAP_FORMAT_VERSION = 1
+# Заголовок: сигнатура, версия формата, размер записи, номер контрольной точки
+_HEADER = struct.Struct("<8sIIQ")
+_GENERATION = struct.Struct("<Q")
+_GENERATION_OFFSET = 16
+# Заголовок занимает отдельную страницу, записи начинаются после нее
+HEADER_SIZE = 4096
+# Запись узла: номер контрольной точки, node_id, last_seen_seconds_ago,
+# last_seen_ts, config_hash, problems_count, offline_alert_level,
+# version_alert_sent, network_id, name; за ними - контрольная сумма CRC32
+_RECORD_DATA = struct.Struct("<QQqqqIHBx16s124s")
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _RECORD_DATA.size + _CRC.size
+# Счетчик проблем читается отдельно, без разбора всей записи
+_PROBLEMS_COUNT = struct.Struct("<I")
+_PROBLEMS_COUNT_OFFSET = 40
+NETWORK_ID_SIZE = 16
+NAME_SIZE = 124
+# Ячейка узла - две копии записи
+SLOT_SIZE = 2 * RECORD_SIZE
+# Начальное число ячеек; при заполнении файл увеличивается вдвое
+INITIAL_SLOTS = 1024
+
+
+class StateBackend:
+    """
+    Хранилище состояний участников. Строки, которые возвращают методы
+    iter_*, поддерживают обращение к полям по имени (row["name"]).
+    """
+
+    def load_member_states(self) -> dict[int, MemberState]:
+        """Загружает состояния всех участников в словарь по node_id."""
+        raise NotImplementedError
+
+    def save_state_batch(self, member_states: list[MemberState], **batch) -> None:
+        """
+        Сохраняет измененные состояния участников вместе с остальными
+        изменениями кэша (аргументы database_manager.save_state_batch).
+        """
+        raise NotImplementedError
+
+    def iter_member_states(
+        self, node_ids: Sequence[int] | None = None
+    ) -> Iterator[Mapping]:
+        """Построчно возвращает состояния участников в порядке node_id."""
+        raise NotImplementedError
+
+    def count_problematic_members(self) -> int:
+        """Возвращает количество участников, у которых были проблемы за день."""
+        raise NotImplementedError
+
+    def iter_problematic_members(self) -> Iterator[Mapping]:
+        """Построчно возвращает проблемных участников по убыванию числа проблем."""
+        raise NotImplementedError
+
+
+class SqliteStateBackend(StateBackend):
+    """Состояния в таблице member_states, в одной транзакции с остальными данными."""
+
+    def load_member_states(self) -> dict[int, MemberState]:
+        return db.get_all_member_states()
+
+    def save_state_batch(self, member_states: list[MemberState], **batch) -> None:
+        db.save_state_batch(member_states, **batch)
+
+    def iter_member_states(
+        self, node_ids: Sequence[int] | None = None
+    ) -> Iterator[Mapping]:
+        return db.iter_member_states(node_ids)
+
+    def count_problematic_members(self) -> int:
+        return db.count_problematic_members()
+
+    def iter_problematic_members(self) -> Iterator[Mapping]:
+        return db.iter_problematic_members()
+
+
+class MmapStateBackend(StateBackend):
+    """
+    Состояния в файле записей фиксированного размера, отображенном в память.
+    Файл изменяет один экземпляр мониторинга; другие процессы (выгрузка,
+    аналитика, резервный экземпляр на том же хосте) могут читать его
+    одновременно. Имя узла длиннее NAME_SIZE байт UTF-8 обрезается.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        created = not os.path.exists(path)
+        if created:
+            with open(path, "wb") as new_file:
+                new_file.write(
+                    _HEADER.pack(MMAP_MAGIC, MMAP_FORMAT_VERSION, RECORD_SIZE, 0)
+                )
+                new_file.truncate(HEADER_SIZE + INITIAL_SLOTS * SLOT_SIZE)
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, record_size, _ = _HEADER.unpack_from(self._map)
+        if (magic, version, record_size) != (
+            MMAP_MAGIC,
+            MMAP_FORMAT_VERSION,
+            RECORD_SIZE,
+        ):
+            utils.exit_with_error(
+                settings.t("mmap_state_invalid", path=path), settings.t
+            )
+        # node_id -> номер ячейки и актуальная копия записи в каждой ячейке
+        self._slots: dict[int, int] = {}
+        self._active = bytearray()
+        self._next_slot = 0
+        self._generation = 0
+        # Копии из незавершенной контрольной точки: очищаются при следующей записи
+        self._stale: list[int] = []
+        self._scan()
+        if created:
+            # Состояния, сохраненные ранее в SQLite, переносятся в новый файл
+            states = list(db.get_all_member_states().values())
+            if states:
+                self._checkpoint(states)
+                print(settings.t("mmap_state_imported", count=len(states), path=path))
+
+    @property
+    def _capacity(self) -> int:
+        return (len(self._map) - HEADER_SIZE) // SLOT_SIZE
+
+    @staticmethod
+    def _offset(slot: int, copy: int) -> int:
+        """Возвращает смещение копии записи ячейки в файле."""
+        return HEADER_SIZE + slot * SLOT_SIZE + copy * RECORD_SIZE
+
+    def _remap(self) -> None:
+        """Отображает файл заново, если его размер изменился (файл увеличен)."""
+        if os.fstat(self._file.fileno()).st_size != len(self._map):
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _scan(self) -> dict[int, MemberState]:
+        """
+        Читает все ячейки, выбирает в каждой актуальную копию и строит
+        индекс узлов. Возвращает загруженные состояния.
+        """
+        self._remap()
+        (self._generation,) = _GENERATION.unpack_from(self._map, _GENERATION_OFFSET)
+        self._slots = {}
+        self._active = bytearray(self._capacity)
+        self._next_slot = 0
+        self._stale = []
+        states = {}
+        with memoryview(self._map) as view:
+            for slot in range(self._capacity):
+                candidates = []
+                for copy in (0, 1):
+                    # Номер 0 - пустая копия (файл заполняется нулями)
+                    (seq,) = _GENERATION.unpack_from(view, self._offset(slot, copy))
+                    if seq > self._generation:
+                        self._stale.append(self._offset(slot, copy))
+                    elif seq:
+                        candidates.append((seq, copy))
+                # Сумма проверяется сначала у более новой копии
+                for _, copy in sorted(candidates, reverse=True):
+                    state = _read_record(view, self._offset(slot, copy))
+                    if state is not None:
+                        states[state.node_id] = state
+                        self._slots[state.node_id] = slot
+                        self._active[slot] = copy
+                        self._next_slot = slot + 1
+                        break
+        return states
+
+    def _allocate(self, node_id: int) -> int:
+        """Выделяет ячейку для нового узла, при необходимости увеличивая файл."""
+        capacity = self._capacity
+        if self._next_slot >= capacity:
+            self._map.flush()
+            self._map.close()
+            self._file.truncate(HEADER_SIZE + 2 * capacity * SLOT_SIZE)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            self._active.extend(bytes(self._capacity - len(self._active)))
+        slot = self._next_slot
+        self._next_slot += 1
+        self._slots[node_id] = slot
+        return slot
+
+    def _checkpoint(self, member_states: list[MemberState]) -> None:
+        """Записывает состояния в неактуальные копии и завершает контрольную точку."""
+        generation = self._generation + 1
+        empty = bytes(RECORD_SIZE)
+        for offset in self._stale:
+            self._map[offset : offset + RECORD_SIZE] = empty
+        self._stale = []
+        written = []
+        for state in member_states:
+            slot = self._slots.get(state.node_id)
+            copy = 0 if slot is None else 1 - self._active[slot]
+            if slot is None:
+                slot = self._allocate(state.node_id)
+            offset = self._offset(slot, copy)
+            self._map[offset : offset + RECORD_SIZE] = _pack_record(generation, state)
+            written.append((slot, copy))
+        # Заголовок изменяется только после сброса записей на диск
+        self._map.flush()
+        _GENERATION.pack_into(self._map, _GENERATION_OFFSET, generation)
+        self._map.flush(0, HEADER_SIZE)
+        self._generation = generation
+        for slot, copy in written:
+            self._active[slot] = copy
+
+    def load_member_states(self) -> dict[int, MemberState]:
+        # Файл перечитывается: его мог изменить другой экземпляр (см. leader.py)
+        return self._scan()
+
+    def save_state_batch(self, member_states: list[MemberState], **batch) -> None:
+        if member_states:
+            self._checkpoint(member_states)
+        db.save_state_batch([], **batch)
+
+    def _row(self, slot: int) -> dict | None:
+        """
+        Читает актуальную копию записи ячейки в словарь полей. Если ее уже
+        перезаписывает другой процесс, читается вторая копия.
+        """
+        copy = self._active[slot]
+        with memoryview(self._map) as view:
+            state = _read_record(view, self._offset(slot, copy)) or _read_record(
+                view, self._offset(slot, 1 - copy)
+            )
+        if state is None:
+            return None
+        row = asdict(state)
+        # Как в строках SQLite, где BOOLEAN хранится числом
+        row["version_alert_sent"] = int(state.version_alert_sent)
+        return row
+
+    def iter_member_states(
+        self, node_ids: Sequence[int] | None = None
+    ) -> Iterator[Mapping]:
+        selected = sorted(
+            self._slots if not node_ids else set(node_ids) & self._slots.keys()
+        )
+        for node_id in selected:
+            row = self._row(self._slots[node_id])
+            if row is not None:
+                yield row
+
+    def _problematic_slots(self) -> list[tuple[int, int]]:
+        """Возвращает пары (число проблем, ячейка), читая только счетчик проблем."""
+        return [
+            (problems_count, slot)
+            for slot in self._slots.values()
+            if (
+                problems_count := _PROBLEMS_COUNT.unpack_from(
+                    self._map,
+                    self._offset(slot, self._active[slot]) + _PROBLEMS_COUNT_OFFSET,
+                )[0]
+            )
+        ]
+
+    def count_problematic_members(self) -> int:
+        return len(self._problematic_slots())
+
+    def iter_problematic_members(self) -> Iterator[Mapping]:
+        for _, slot in sorted(self._problematic_slots(), reverse=True):
+            row = self._row(slot)
+            if row is not None:
+                yield row
+
+
+def _encode(text: str, size: int) -> bytes:
+    """Кодирует строку в UTF-8, обрезая ее до size байт по границе символа."""
+    encoded = text.encode("utf-8")
+    if len(encoded) <= size:
+        return encoded
+    return encoded[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _pack_record(generation: int, state: MemberState) -> bytes:
+    """Упаковывает состояние узла в запись с контрольной суммой."""
+    data = _RECORD_DATA.pack(
+        generation,
+        state.node_id,
+        state.last_seen_seconds_ago,
+        state.last_seen_ts,
+        state.config_hash,
+        state.problems_count,
+        state.offline_alert_level,
+        state.version_alert_sent,
+        _encode(state.network_id, NETWORK_ID_SIZE),
+        _encode(state.name, NAME_SIZE),
+    )
+    return data + _CRC.pack(zlib.crc32(data))
+
+
+def _read_record(view: memoryview, offset: int) -> MemberState | None:
+    """
+    Читает запись прямо из отображения (без копирования). Возвращает None,
+    если контрольная сумма не совпадает (запись пуста или повреждена).
+    """
+    (crc,) = _CRC.unpack_from(view, offset + _RECORD_DATA.size)
+    if zlib.crc32(view[offset : offset + _RECORD_DATA.size]) != crc:
+        return None
+    (
+        _,
+        node_id,
+        last_seen_seconds_ago,
+        last_seen_ts,
+        config_hash,
+        problems_count,
+        offline_alert_level,
+        version_alert_sent,
+        network_id,
+        name,
+    ) = _RECORD_DATA.unpack_from(view, offset)
+    return MemberState(
+        node_id,
+        name.rstrip(b"\0").decode("utf-8"),
+        bool(version_alert_sent),
+        offline_alert_level,
+        last_seen_seconds_ago,
+        problems_count,
+        last_seen_ts,
+        network_id.rstrip(b"\0").decode("utf-8"),
+        config_hash,
+    )
+
+
+def create_backend() -> StateBackend:
+    """Создает хранилище, выбранное в STATE_BACKEND."""
+    if settings.STATE_BACKEND == BACKEND_MMAP:
+        return MmapStateBackend(
+            settings.MMAP_STATE_FILE or f"{settings.DB_FILE}-members"
+        )
+    if settings.STATE_BACKEND != BACKEND_SQLITE:
+        print(settings.t("state_backend_unknown", backend=settings.STATE_BACKEND))
+    return SqliteStateBackend()
+
+
+_backend: StateBackend | None = None
+
+
+def get_backend() -> StateBackend:
+    """Возвращает общее хранилище состояний, создавая его при первом вызове."""
+    global _backend  # pylint: disable=global-statement
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: StateBackend) -> None:
+    """Заменяет общее хранилище состояний."""
+    global _backend  # pylint: disable=global-statement
+    _backend = backend
@@ -0,0 +1,265 @@
+"""
+Модуль кэша состояния в памяти с отложенной записью (write-behind) в SQLite.
+Авторитетное состояние хранится в памяти, а в БД записываются только
+измененные строки, одной транзакцией. Состояния участников записываются
+в хранилище, выбранное в STATE_BACKEND (см. state_backend.py).
+"""
+
+import checker
+import clock
+import settings
+import database_manager as db
+import state_backend
+import tracing
+from models import Incident, LatencyStats, MemberState, ProblematicMember
+
+
+class StateCache:
+    """
+    Хранит состояния участников и статистику в памяти и отслеживает изменения.
+    Запись в БД выполняется пакетно: по интервалу, при изменении уровней
+    оповещений (чтобы после сбоя не было повторных уведомлений) и при остановке.
+    """
+
+    def __init__(self):
+        """Загружает состояния участников и статистику из БД."""
+        self.backend = state_backend.get_backend()
+        self.member_states: dict[int, MemberState] = self.backend.load_member_states()
+        self.latency_stats: dict[int, LatencyStats] = db.get_all_latency_stats()
+        self.stats: dict = db.get_stats()
+        # Снимок статистики на момент последней записи: изменения статистики
+        # определяются сравнением с ним, так как словарь изменяется напрямую.
+        self._flushed_stats: dict = dict(self.stats)
+        self._dirty_members: set[int] = set()
+        self._dirty_latency: set[int] = set()
+        self._urgent = False
+        self._last_flush = clock.monotonic()
+        # Смены статуса узлов, еще не записанные в историю
+        self._pending_history: list[tuple] = []
+        # Начало текущего периода работы (время первой проверки после запуска)
+        # и время последней проверки предыдущего запуска, загруженное из БД
+        self._session_start_ts = 0
+        self._previous_run_check_ts = self.stats.get("last_check_ts", 0)
+        # Открытые инциденты по node_id и инциденты, измененные с последней записи
+        self.open_incidents: dict[int, Incident] = db.get_open_incidents()
+        self._dirty_incidents: dict[tuple[int, int], Incident] = {}
+        # Конфигурации узлов, измененные с последней записи (node_id -> поля)
+        self._dirty_configs: dict[int, dict] = {}
+
+    def reload(self) -> None:
+        """
+        Перечитывает состояние из БД, отбрасывая несохраненные изменения.
+        Используется резервным экземпляром, чтобы кэш оставался актуальным
+        (см. leader.py).
+        """
+        self.member_states = self.backend.load_member_states()
+        self.latency_stats = db.get_all_latency_stats()
+        # Словарь статистики используется и вне кэша, поэтому обновляется на месте
+        self.stats.clear()
+        self.stats.update(db.get_stats())
+        self._flushed_stats = dict(self.stats)
+        self._dirty_members.clear()
+        self._dirty_latency.clear()
+        self._dirty_configs.clear()
+        self._dirty_incidents.clear()
+        self._pending_history = []
+        self._urgent = False
+        # Период работы этого экземпляра начнется с его первой проверки
+        self._session_start_ts = 0
+        self._previous_run_check_ts = self.stats.get("last_check_ts", 0)
+        self.open_incidents = db.get_open_incidents()
+
+    def get_member_state(self, node_id: int) -> MemberState | None:
+        """Возвращает сохраненное состояние участника или None."""
+        return self.member_states.get(node_id)
+
+    def set_member_state(self, state: MemberState) -> None:
+        """Обновляет состояние участника и помечает его как измененное."""
+        previous = self.member_states.get(state.node_id)
+        if previous == state:
+            return
+        self.member_states[state.node_id] = state
+        self._dirty_members.add(state.node_id)
+        self._record_status_change(previous, state)
+        self._track_incident(previous, state)
+        # Изменение флагов оповещений и счетчика проблем записываем без
+        # ожидания интервала: их потеря приведет к повторным уведомлениям.
+        if (
+            previous is None
+            or previous.offline_alert_level != state.offline_alert_level
+            or previous.version_alert_sent != state.version_alert_sent
+            or previous.problems_count != state.problems_count
+            or previous.config_hash != state.config_hash
+        ):
+            self._urgent = True
+
+    def _record_status_change(
+        self, previous: MemberState | None, state: MemberState
+    ) -> None:
+        """
+        Добавляет строку в историю, если изменился статус узла: онлайн/офлайн,
+        уровень оповещения или флаг версии. Время строки - время проверки.
+        """
+        if not settings.HISTORY_RETENTION_DAYS:
+            return
+        online = checker.is_member_online(state)
+        if (
+            previous is not None
+            and checker.is_member_online(previous) == online
+            and previous.offline_alert_level == state.offline_alert_level
+            and previous.version_alert_sent == state.version_alert_sent
+        ):
+            return
+        self._pending_history.append(
+            (
+                self.stats.get("last_check_ts", 0),
+                state.node_id,
+                online,
+                state.offline_alert_level,
+                state.version_alert_sent,
+                state.last_seen_ts,
+            )
+        )
+
+    def _track_incident(self, previous: MemberState | None, state: MemberState) -> None:
+        """
+        Открывает инцидент при первом оповещении об офлайне, обновляет
+        пиковый уровень при повышении и закрывает при возвращении узла в сеть.
+        """
+        previous_level = previous.offline_alert_level if previous else 0
+        level = state.offline_alert_level
+        if level == previous_level:
+            return
+        check_ts = self.stats.get("last_check_ts", 0)
+        incident = self.open_incidents.get(state.node_id)
+        if level > 0:
+            if incident is None:
+                incident = Incident(state.node_id, check_ts, level)
+                self.open_incidents[state.node_id] = incident
+            incident.peak_level = max(incident.peak_level, level)
+        elif incident is not None:
+            # Узел вернулся в сеть. Если инцидент не найден (например, он был
+            # открыт до появления таблицы инцидентов), закрывать нечего.
+            incident.closed_ts = check_ts
+            incident.duration_seconds = (check_ts - incident.opened_ts) // 1000
+            del self.open_incidents[state.node_id]
+        else:
+            return
+        self._dirty_incidents[(incident.node_id, incident.opened_ts)] = incident
+
+    def get_member_config(self, node_id: int) -> dict | None:
+        """
+        Возвращает последнюю сохраненную конфигурацию узла. Читается из БД,
+        поэтому вызывается только при изменении хэша конфигурации.
+        """
+        if node_id in self._dirty_configs:
+            return self._dirty_configs[node_id]
+        return db.get_member_config(node_id)
+
+    def set_member_config(self, node_id: int, config: dict) -> None:
+        """Запоминает новую конфигурацию узла для записи вместе с его состоянием."""
+        self._dirty_configs[node_id] = config
+
+    def set_latency_stats(self, latency: LatencyStats) -> None:
+        """Обновляет показатели задержки узла и помечает их как измененные."""
+        previous = self.latency_stats.get(latency.node_id)
+        if previous == latency:
+            return
+        self.latency_stats[latency.node_id] = latency
+        self._dirty_latency.add(latency.node_id)
+        if previous is None or previous.slo_alert_sent != latency.slo_alert_sent:
+            self._urgent = True
+
+    def get_problematic_members(self) -> list[ProblematicMember]:
+        """Возвращает список участников, у которых были проблемы за день."""
+        members = [
+            ProblematicMember(state.name, state.problems_count)
+            for state in self.member_states.values()
+            if state.problems_count > 0
+        ]
+        members.sort(key=lambda member: member.problems_count, reverse=True)
+        return members
+
+    def reset_daily_problem_counts(self) -> None:
+        """Сбрасывает счетчик дневных проблем для всех участников."""
+        for state in self.member_states.values():
+            if state.problems_count:
+                state.problems_count = 0
+                self._dirty_members.add(state.node_id)
+        self._urgent = True
+        print(settings.t("daily_counters_reset"))
+
+    def _changed_stats(self) -> dict:
+        """Возвращает показатели статистики, изменившиеся после последней записи."""
+        return {
+            key: value
+            for key, value in self.stats.items()
+            if self._flushed_stats.get(key) != value
+        }
+
+    def _current_session(self) -> tuple[int, int] | None:
+        """
+        Возвращает границы текущего периода работы: от первой проверки
+        после запуска до последней. None, если проверок еще не было.
+        """
+        last_check_ts = self.stats.get("last_check_ts", 0)
+        if (
+            not settings.HISTORY_RETENTION_DAYS
+            or last_check_ts == self._previous_run_check_ts
+        ):
+            return None
+        if not self._session_start_ts:
+            self._session_start_ts = last_check_ts
+        return self._session_start_ts, last_check_ts
+
+    def maybe_flush(self) -> None:
+        """Записывает изменения, если истек интервал или есть срочные изменения."""
+        elapsed = clock.monotonic() - self._last_flush
+        if self._urgent or elapsed >= settings.STATE_FLUSH_INTERVAL_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Записывает в БД только измененные строки одной транзакцией."""
+        changed_stats = self._changed_stats()
+        if (
+            self._dirty_members
+            or self._dirty_latency
+            or self._dirty_incidents
+            or self._dirty_configs
+            or changed_stats
+        ):
+            dirty_states = [
+                self.member_states[node_id] for node_id in self._dirty_members
+            ]
+            dirty_latency = [
+                self.latency_stats[node_id] for node_id in self._dirty_latency
+            ]
+            with tracing.span(
+                "db.flush",
+                backend=settings.STATE_BACKEND,
+                members=len(dirty_states),
+                stats=len(changed_stats),
+                history=len(self._pending_history),
+            ):
+                self.backend.save_state_batch(
+                    dirty_states,
+                    stats=changed_stats,
+                    latency_stats=dirty_latency,
+                    history=self._pending_history,
+                    session=self._current_session(),
+                    incidents=list(self._dirty_incidents.values()),
+                    configs=self._dirty_configs,
+                )
+            print(
+                settings.t(
+                    "state_flushed", members=len(dirty_states), stats=len(changed_stats)
+                )
+            )
+            self._dirty_members.clear()
+            self._dirty_latency.clear()
+            self._pending_history = []
+            self._dirty_incidents.clear()
+            self._dirty_configs.clear()
+            self._flushed_stats.update(changed_stats)
+        self._urgent = False
+        self._last_flush = clock.monotonic()
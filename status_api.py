@@ -0,0 +1,95 @@
+"""
+Модуль легковесного HTTP API (только чтение) для получения состояния мониторинга.
+Ответы формируются из снимка в памяти и поддерживают ETag/304.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import settings
+import snapshot
+
+MEMBER_PATH_PREFIX = "/status/members/"
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к API состояния."""
+
+    server_version = "ZeroMonitorStatus"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Обрабатывает GET-запросы: /status и /status/members/<node_id>."""
+        current = snapshot.current()
+        if current is None:
+            self._send_json(503, {"error": "no data yet"})
+            return
+
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/status":
+            self._send_cached(current.body, current.etag)
+        elif path.startswith(MEMBER_PATH_PREFIX):
+            node_id = path[len(MEMBER_PATH_PREFIX) :].lower()
+            member = current.members_by_id.get(node_id)
+            if member is None:
+                self._send_json(404, {"error": "member not found"})
+                return
+            # ETag участника производный от ETag снимка: он меняется
+            # только вместе со снимком, поэтому остается корректным.
+            etag = f'W/{current.etag[:-1]}-{node_id}"'
+            body = json.dumps(member, ensure_ascii=False).encode("utf-8")
+            self._send_cached(body, etag)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _send_cached(self, body: bytes, etag: str):
+        """Отправляет тело с ETag или 304, если у клиента актуальная версия."""
+        if_none_match = self.headers.get("If-None-Match", "")
+        client_etags = [tag.strip() for tag in if_none_match.split(",")]
+        if etag in client_etags or "*" in client_etags:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: dict):
+        """Отправляет JSON-ответ без кэширования."""
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Отключает журналирование каждого запроса, чтобы не засорять консоль."""
+
+
+def start_status_server() -> ThreadingHTTPServer | None:
+    """Запускает HTTP API в фоновом потоке, если он включен в настройках."""
+    if not settings.STATUS_API_PORT:
+        return None
+    try:
+        server = ThreadingHTTPServer(
+            (settings.STATUS_API_HOST, settings.STATUS_API_PORT), StatusRequestHandler
+        )
+    except OSError as e:
+        print(settings.t("status_api_start_failed", error=e))
+        return None
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(
+        settings.t(
+            "status_api_started",
+            host=settings.STATUS_API_HOST,
+            port=settings.STATUS_API_PORT,
+        )
+    )
+    return server
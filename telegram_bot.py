@@ -0,0 +1,234 @@
+"""
+Модуль команд Telegram-бота: /status, /offline, /member <id> и /report.
+Сообщения получаются длинным опросом (getUpdates) в фоновом потоке,
+поэтому цикл проверки не блокируется. Ответы формируются из снимка
+состояния в памяти (snapshot.py), без обращений к БД и API ZeroTier.
+Команды принимаются только из чата TELEGRAM_CHAT_ID.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+import clock
+import settings
+import snapshot
+from http_client import ApiClientError, make_request
+from models import ProblematicMember
+from send_to_chat import (
+    build_daily_report_message,
+    send_telegram_message,
+    telegram_api_url,
+)
+
+# Сколько узлов выводить в одном ответе: длина сообщения Telegram ограничена
+MAX_LISTED_MEMBERS = 50
+
+
+def _format_member_line(member: dict) -> str:
+    """Формирует строку списка с именем, ID и временем последней активности."""
+    return settings.t(
+        "bot_member_line",
+        name=member["name"],
+        id=member["node_id"],
+        seconds=member["last_seen_seconds_ago"],
+    )
+
+
+def _limited_lines(lines: list[str]) -> str:
+    """Объединяет строки, оставляя не больше MAX_LISTED_MEMBERS."""
+    text = "".join(lines[:MAX_LISTED_MEMBERS])
+    if len(lines) > MAX_LISTED_MEMBERS:
+        text += settings.t("bot_more_members", count=len(lines) - MAX_LISTED_MEMBERS)
+    return text
+
+
+def _status_reply(current: snapshot.StatusSnapshot, _argument: str) -> str:
+    """Ответ на /status: сводка последней проверки."""
+    data = current.data
+    cycle = data["cycle"]
+    online = sum(1 for member in data["members"] if member["online"])
+    return settings.t(
+        "bot_status",
+        last_check=cycle["last_check_datetime"],
+        members=len(data["members"]),
+        online=online,
+        offline=len(data["members"]) - online,
+        open_incidents=cycle["open_incidents"],
+        checks=cycle["checks_today"],
+        problems=cycle["problems_today"],
+        version=cycle["latest_zt_version"],
+    )
+
+
+def _offline_reply(current: snapshot.StatusSnapshot, _argument: str) -> str:
+    """Ответ на /offline: список узлов не в сети."""
+    offline = [member for member in current.data["members"] if not member["online"]]
+    if not offline:
+        return settings.t("bot_all_online")
+    return settings.t("bot_offline_header", count=len(offline)) + _limited_lines(
+        [_format_member_line(member) for member in offline]
+    )
+
+
+def _member_reply(current: snapshot.StatusSnapshot, argument: str) -> str:
+    """Ответ на /member <id>: подробное состояние узла."""
+    node_id = argument.strip().lower()
+    if not node_id:
+        return settings.t("bot_member_usage")
+    member = current.members_by_id.get(node_id)
+    if member is None:
+        return settings.t("bot_member_not_found", id=node_id)
+    return settings.t(
+        "bot_member",
+        name=member["name"],
+        id=member["node_id"],
+        network=member["network_id"] or "?",
+        status=settings.t("bot_online" if member["online"] else "bot_offline"),
+        seconds=member["last_seen_seconds_ago"],
+        level=member["offline_alert_level"],
+        version=settings.t(
+            "bot_version_old" if member["version_alert_sent"] else "bot_version_ok"
+        ),
+        problems=member["problems_count"],
+    )
+
+
+def _report_reply(current: snapshot.StatusSnapshot, _argument: str) -> str:
+    """Ответ на /report: ежедневный отчет за текущие сутки на данный момент."""
+    cycle = current.data["cycle"]
+    problematic = sorted(
+        (
+            ProblematicMember(member["name"], member["problems_count"])
+            for member in current.data["members"]
+            if member["problems_count"] > 0
+        ),
+        key=lambda member: member.problems_count,
+        reverse=True,
+    )[:MAX_LISTED_MEMBERS]
+    return build_daily_report_message(
+        {
+            "last_report_date": str(clock.today()),
+            "last_check_datetime": cycle["last_check_datetime"],
+            "checks_today": cycle["checks_today"],
+            "problems_today": cycle["problems_today"],
+        },
+        problematic,
+    )
+
+
+COMMANDS = {
+    "/status": _status_reply,
+    "/offline": _offline_reply,
+    "/member": _member_reply,
+    "/report": _report_reply,
+}
+
+
+def build_reply(text: str) -> str | None:
+    """
+    Формирует ответ на текст сообщения по текущему снимку состояния.
+    Возвращает None, если сообщение не является командой.
+    """
+    if not text.startswith("/"):
+        return None
+    command, _, argument = text.partition(" ")
+    # В группах команда может быть адресована боту: /status@имя_бота
+    command = command.split("@", 1)[0].lower()
+    reply = COMMANDS.get(command)
+    if reply is None:
+        return settings.t("bot_help")
+    current = snapshot.current()
+    if current is None:
+        return settings.t("bot_no_data")
+    return reply(current, argument)
+
+
+class CommandBot:
+    """Получает сообщения длинным опросом и отвечает на команды."""
+
+    def __init__(
+        self,
+        chat_id: str,
+        poll_timeout: int,
+        is_active: Callable[[], bool] | None = None,
+    ):
+        self.chat_id = str(chat_id)
+        self.poll_timeout = poll_timeout
+        # Резервный экземпляр не опрашивает Telegram: одновременный опрос
+        # двумя экземплярами с одним токеном Telegram не допускает
+        self.is_active = is_active or (lambda: True)
+        self._offset: int | None = None
+
+    def _get_updates(self, offset: int | None, timeout: int) -> list[dict]:
+        """Запрашивает новые сообщения (getUpdates)."""
+        params = {"timeout": timeout, "allowed_updates": '["message"]'}
+        if offset is not None:
+            params["offset"] = offset
+        response = make_request(
+            "GET",
+            telegram_api_url("getUpdates"),
+            settings.t("bot_polling_error", error="{e}"),
+            params=params,
+            # Сервер держит запрос до timeout секунд, если сообщений нет
+            timeout=timeout + settings.API_TIMEOUT_SECONDS,
+        )
+        return response.json().get("result", [])
+
+    def skip_pending(self) -> None:
+        """Пропускает сообщения, пришедшие до запуска: на них отвечать поздно."""
+        updates = self._get_updates(-1, 0)
+        self._offset = updates[-1]["update_id"] + 1 if updates else 0
+
+    def handle_update(self, update: dict) -> None:
+        """Отвечает на сообщение, если это команда из разрешенного чата."""
+        message = update.get("message") or {}
+        chat_id = str(message.get("chat", {}).get("id"))
+        text = message.get("text") or ""
+        if chat_id != self.chat_id:
+            return
+        reply = build_reply(text.strip())
+        if reply:
+            send_telegram_message(chat_id, reply)
+
+    def poll_once(self) -> None:
+        """Выполняет один запрос длинного опроса и обрабатывает полученные сообщения."""
+        for update in self._get_updates(self._offset, self.poll_timeout):
+            self._offset = update["update_id"] + 1
+            self.handle_update(update)
+
+    def run(self) -> None:
+        """Бесконечно опрашивает Telegram; при ошибках делает паузу и повторяет."""
+        print(settings.t("bot_started"))
+        while True:
+            if not self.is_active():
+                # После перехода пропускаем сообщения, пришедшие за это время
+                self._offset = None
+                time.sleep(settings.API_RETRY_DELAY_SECONDS)
+                continue
+            try:
+                if self._offset is None:
+                    self.skip_pending()
+                self.poll_once()
+            except (ApiClientError, ValueError, KeyError, TypeError) as e:
+                print(settings.t("bot_polling_failed", error=e))
+                time.sleep(settings.API_RETRY_DELAY_SECONDS)
+
+
+def start_command_bot(
+    is_active: Callable[[], bool] | None = None,
+) -> threading.Thread | None:
+    """
+    Запускает обработку команд бота в фоновом потоке, если она включена.
+    is_active - признак, что экземпляр сейчас ведущий (см. leader.py).
+    """
+    if not settings.TELEGRAM_COMMANDS_ENABLED:
+        return None
+    if not settings.BOT_TOKEN or not settings.CHAT_ID:
+        print(settings.t("bot_not_configured"))
+        return None
+    bot = CommandBot(
+        settings.CHAT_ID, settings.TELEGRAM_POLL_TIMEOUT_SECONDS, is_active
+    )
+    thread = threading.Thread(target=bot.run, name="telegram-bot", daemon=True)
+    thread.start()
+    return thread
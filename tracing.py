@@ -0,0 +1,246 @@
+"""
+Модуль трассировки операций цикла проверки.
+
+Агрегированные показатели показывают, сколько длилась работа в целом,
+а трассировка - почему медленным оказался конкретный цикл или узел.
+Интервалы (span) охватывают попытки HTTP-запросов, получение участников
+сети, проверку узла, пинги, запись состояния и отправку уведомлений
+и несут атрибуты (сеть, узел, попытка, статус). Завершенные интервалы
+записываются в файл JSON Lines (TRACE_FILE) вместе с ID трассы
+и родительского интервала, по которым восстанавливается дерево вызовов.
+
+Решение о записи принимается один раз для всей трассы (при открытии
+корневого интервала) с вероятностью TRACE_SAMPLE_RATE. В остальных
+трассах и при выключенной трассировке span() возвращает пустой интервал,
+поэтому накладные расходы сводятся к обращению к contextvars.
+"""
+
+import atexit
+import contextvars
+import json
+import random
+import threading
+import time
+from typing import Any, Callable
+import settings
+
+# Открытый интервал текущего потока (или задачи): Span, _NOOP или None вне трассы
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class _NoopSpan:
+    """Пустой интервал: ничего не записывает (трасса не выбрана для записи)."""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        return False
+
+    def set(self, key: str, value: Any) -> None:
+        """Атрибуты пустого интервала не сохраняются."""
+
+
+_NOOP = _NoopSpan()
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Корень трассы, не выбранной для записи: вложенные интервалы тоже пустые."""
+
+    def __init__(self):
+        self._token = None
+
+    def __enter__(self) -> "_UnsampledRoot":
+        self._token = _current_span.set(_NOOP)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        _current_span.reset(self._token)
+        return False
+
+
+class Span:
+    """Интервал трассы: операция, ее атрибуты, время начала и длительность."""
+
+    def __init__(
+        self,
+        exporter: "JsonLinesExporter",
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        attributes: dict,
+    ):
+        self.exporter = exporter
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{_random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self._start = 0.0
+        self._started = 0.0
+        self._token = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Добавляет или заменяет атрибут интервала."""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self._start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes.setdefault("error", exc_type.__name__)
+        self.exporter.export(
+            {
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "name": self.name,
+                "start": round(self._start, 6),
+                "duration_ms": round(duration_ms, 3),
+                "thread": threading.current_thread().name,
+                "attributes": self.attributes,
+            },
+            root=self.parent_id is None,
+        )
+        return False
+
+
+class JsonLinesExporter:
+    """
+    Дописывает завершенные интервалы в файл, по строке JSON на интервал.
+    Файл сбрасывается на диск при завершении корневого интервала и не реже
+    раза в секунду, поэтому запись отдельных интервалов почти бесплатна.
+    """
+
+    FLUSH_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, path: str):
+        self.path = path
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
+
+    def export(self, record: dict, root: bool = False) -> None:
+        """Записывает интервал; ошибка записи отключает трассировку."""
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(line)
+                now = time.monotonic()
+                if root or now - self._last_flush >= self.FLUSH_INTERVAL_SECONDS:
+                    self._file.flush()
+                    self._last_flush = now
+            except OSError as e:
+                print(settings.t("trace_export_failed", path=self.path, error=e))
+                self._file = None
+
+    def close(self) -> None:
+        """Сбрасывает и закрывает файл."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Tracer:
+    """Открывает интервалы и принимает решение о записи трасс (выборку)."""
+
+    def __init__(self, exporter: JsonLinesExporter | None, sample_rate: float):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def span(self, name: str, attributes: dict) -> Span | _NoopSpan:
+        """
+        Открывает интервал внутри текущего (используется в with). Вне трассы
+        открывается корневой интервал новой трассы, если она попала в выборку.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            if self.exporter is None:
+                return _NOOP
+            if _random.random() >= self.sample_rate:
+                return _UnsampledRoot()
+            return Span(
+                self.exporter,
+                name,
+                f"{_random.getrandbits(128):032x}",
+                None,
+                attributes,
+            )
+        if parent is _NOOP:
+            return _NOOP
+        return Span(self.exporter, name, parent.trace_id, parent.span_id, attributes)
+
+
+# Отдельный генератор: выборка не должна влиять на общий random
+# (например, на воспроизводимость моделирования с заданным seed)
+_random = random.Random()
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def create_tracer() -> Tracer:
+    """Создает трассировщик по настройкам TRACE_FILE и TRACE_SAMPLE_RATE."""
+    if not settings.TRACE_FILE or not settings.TRACE_SAMPLE_RATE:
+        return Tracer(None, 0.0)
+    print(
+        settings.t(
+            "tracing_enabled",
+            path=settings.TRACE_FILE,
+            rate=settings.TRACE_SAMPLE_RATE,
+        )
+    )
+    return Tracer(JsonLinesExporter(settings.TRACE_FILE), settings.TRACE_SAMPLE_RATE)
+
+
+def get_tracer() -> Tracer:
+    """Возвращает общий трассировщик, создавая его при первом вызове."""
+    global _tracer  # pylint: disable=global-statement
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = create_tracer()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """Заменяет общий трассировщик."""
+    global _tracer  # pylint: disable=global-statement
+    _tracer = tracer
+
+
+def span(name: str, **attributes) -> Span | _NoopSpan:
+    """Открывает интервал общего трассировщика: with tracing.span("ping", ip=ip):"""
+    return (_tracer or get_tracer()).span(name, attributes)
+
+
+def bind(function: Callable) -> Callable:
+    """
+    Возвращает функцию, которая выполняется внутри текущего интервала
+    в любом потоке. Нужна для пулов потоков и очередей: contextvars
+    в другие потоки не передаются.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return function
+
+    def bound(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+
+    return bound
@@ -0,0 +1,220 @@
+"""
+Модуль транспортного уровня HTTP: общая сессия requests с отдельным пулом
+соединений для каждого хоста, кэшем DNS и предварительным открытием
+соединений с API перед циклом проверки.
+
+Пулы рассчитаны на FETCH_CONCURRENCY одновременных запросов к хосту,
+поэтому параллельные запросы не открывают лишних соединений. Для каждого
+хоста считаются запросы и новые соединения цикла проверки (measure),
+по которым видно, какая доля запросов обошлась без установки соединения
+(и TLS-рукопожатия). Запросы других потоков (опрос команд бота, доставка
+уведомлений) в статистику не входят.
+"""
+
+import contextvars
+import ipaddress
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+import urllib3.util.connection
+from requests.adapters import HTTPAdapter
+import settings
+
+# Учитываются ли запросы текущего потока (или задачи) в статистике соединений
+_measuring: contextvars.ContextVar = contextvars.ContextVar("measuring", default=False)
+
+
+class DnsCache:
+    """Кэш разрешения имен хостов в адреса с ограниченным временем жизни."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[tuple[str, int], tuple[float, list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> list[str]:
+        """Возвращает адреса хоста, при необходимости выполняя запрос к DNS."""
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        addresses = list(
+            dict.fromkeys(
+                info[4][0]
+                for info in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+            )
+        )
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, addresses)
+        return addresses
+
+    def invalidate(self, host: str, port: int) -> None:
+        """Удаляет запись хоста, например после неудачного подключения."""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class ConnectionStats:
+    """Счетчики запросов и новых соединений по хостам."""
+
+    def __init__(self):
+        self._requests: dict[str, int] = {}
+        self._connections: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, host: str) -> None:
+        """Учитывает запрос к хосту."""
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+
+    def record_connection(self, host: str) -> None:
+        """Учитывает новое соединение с хостом."""
+        with self._lock:
+            self._connections[host] = self._connections.get(host, 0) + 1
+
+    def take(self) -> dict[str, tuple[int, int]]:
+        """Возвращает и обнуляет счетчики: хост -> (запросы, новые соединения)."""
+        with self._lock:
+            hosts = self._requests.keys() | self._connections.keys()
+            result = {
+                host: (self._requests.get(host, 0), self._connections.get(host, 0))
+                for host in sorted(hosts)
+            }
+            self._requests.clear()
+            self._connections.clear()
+        return result
+
+
+class Transport:
+    """
+    Общая HTTP-сессия: для каждого хоста монтируется собственный адаптер
+    с пулом из pool_size соединений, а новые соединения открываются
+    через кэш DNS (если dns_ttl_seconds больше 0).
+    """
+
+    def __init__(self, pool_size: int, dns_ttl_seconds: float):
+        self.session = requests.Session()
+        self.pool_size = max(pool_size, 1)
+        self.dns_cache = DnsCache(dns_ttl_seconds) if dns_ttl_seconds > 0 else None
+        self.stats = ConnectionStats()
+        self._mounted: set[str] = set()
+        self._mount_lock = threading.Lock()
+        self._create_connection = urllib3.util.connection.create_connection
+        # urllib3 открывает все соединения через эту функцию
+        urllib3.util.connection.create_connection = self._connect
+
+    def _mount_adapter(self, url: str) -> str:
+        """Монтирует адаптер с пулом для хоста URL, если его еще нет. Возвращает хост."""
+        parts = urlsplit(url)
+        prefix = f"{parts.scheme}://{parts.netloc}/"
+        if prefix not in self._mounted:
+            with self._mount_lock:
+                if prefix not in self._mounted:
+                    self.session.mount(
+                        prefix,
+                        HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size),
+                    )
+                    self._mounted.add(prefix)
+        return parts.hostname or ""
+
+    def _connect(self, address, *args, **kwargs):
+        """Открывает соединение, разрешая имя хоста через кэш DNS."""
+        host, port = address
+        if _measuring.get():
+            self.stats.record_connection(host)
+        if self.dns_cache is None or _is_ip_address(host):
+            return self._create_connection(address, *args, **kwargs)
+        last_error = None
+        for ip_address in self.dns_cache.resolve(host, port):
+            try:
+                return self._create_connection((ip_address, port), *args, **kwargs)
+            except OSError as e:
+                last_error = e
+        # Адреса могли измениться: при следующем подключении запросим DNS заново
+        self.dns_cache.invalidate(host, port)
+        raise last_error or OSError(f"No addresses for {host}")
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Выполняет запрос через пул соединений хоста."""
+        host = self._mount_adapter(url)
+        if _measuring.get():
+            self.stats.record_request(host)
+        return self.session.request(method, url, **kwargs)
+
+    @contextmanager
+    def measure(self):
+        """
+        Учитывает в статистике запросы и соединения внутри блока with
+        (в том числе в потоках, запущенных с копией контекста).
+        """
+        token = _measuring.set(True)
+        try:
+            yield
+        finally:
+            _measuring.reset(token)
+
+    def prewarm(self, urls: list[str]) -> None:
+        """
+        Открывает соединения с хостами заранее легким запросом HEAD, чтобы
+        установка соединения и TLS-рукопожатие не входили во время цикла.
+        Ответ (в том числе ошибка авторизации) не важен. Соединения прогрева
+        в статистике цикла не учитываются.
+        """
+        token = _measuring.set(False)
+        try:
+            for url in dict.fromkeys(urls):
+                self._mount_adapter(url)
+                try:
+                    self.session.head(
+                        url, timeout=settings.API_TIMEOUT_SECONDS, allow_redirects=False
+                    )
+                except requests.RequestException as e:
+                    print(settings.t("http_prewarm_failed", url=url, error=e))
+        finally:
+            _measuring.reset(token)
+
+
+def _is_ip_address(host: str) -> bool:
+    """Проверяет, является ли хост IP-адресом (его разрешать не нужно)."""
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+_transport: Transport | None = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Возвращает общий транспорт, создавая его при первом вызове."""
+    global _transport  # pylint: disable=global-statement
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = Transport(
+                    settings.FETCH_CONCURRENCY, settings.DNS_CACHE_TTL_SECONDS
+                )
+    return _transport
+
+
+def log_connection_stats() -> None:
+    """Выводит по каждому хосту число запросов, новых соединений и долю повторного использования."""
+    for host, (requests_count, connections) in get_transport().stats.take().items():
+        reused = max(requests_count - connections, 0)
+        print(
+            settings.t(
+                "http_connection_stats",
+                host=host,
+                requests=requests_count,
+                connections=connections,
+                reuse=round(100 * reused / requests_count) if requests_count else 0,
+            )
+        )
@@ -1,13 +1,20 @@
 """Общие вспомогательные утилиты."""
 
+import argparse
 import json
 import os
+import string
 import subprocess
 import sys
 import time
 from datetime import datetime
 from typing import Callable, NoReturn
 
+import clock
+
+# Длина ID узла ZeroTier: 40 бит в шестнадцатеричной записи
+NODE_ID_HEX_LENGTH = 10
+
 
 def exit_with_error(message: str, t: Callable) -> NoReturn:
     """Выводит сообщение о критической ошибке и завершает работу скрипта."""
@@ -52,24 +59,80 @@ def get_project_version(fallback: str) -> str:
         return fallback
 
 
+def parse_zt_networks(networks_json: str, t: Callable) -> list[dict]:
+    """
+    Разбирает и валидирует JSON со списком сетей ZeroTier.
+
+    Raises:
+        ValueError: Если JSON некорректен или не соответствует формату.
+    """
+    # json.JSONDecodeError - подкласс ValueError
+    networks = json.loads(networks_json)
+    if not isinstance(networks, list):
+        raise ValueError(t("json_must_be_list"))
+    for network in networks:
+        if not isinstance(network, dict) or "network_id" not in network:
+            raise ValueError(t("json_must_be_dict"))
+        network_type = network.get("type", "central")
+        if network_type not in ("central", "controller"):
+            raise ValueError(t("unknown_network_type", type=network_type))
+        # Для ZeroTier Central токен обязателен, а локальный контроллер
+        # может прочитать его из файла authtoken.secret.
+        if network_type == "central" and "token" not in network:
+            raise ValueError(t("json_must_be_dict"))
+    return networks
+
+
+def parse_member_ids(member_ids_csv: str, t: Callable) -> list[str]:
+    """
+    Разбирает строку с ID участников, разделенными запятыми.
+    ID приводятся к нижнему регистру, как в ответах API ZeroTier.
+
+    Raises:
+        ValueError: Если ID не является 40-битным шестнадцатеричным числом.
+    """
+    member_ids = []
+    for item in member_ids_csv.split(","):
+        member_id = item.strip().lower()
+        if not member_id:
+            continue
+        try:
+            node_id_to_int(member_id)
+        except ValueError:
+            raise ValueError(t("invalid_member_id", id=member_id)) from None
+        member_ids.append(member_id)
+    return member_ids
+
+
+def node_id_to_int(node_id: str) -> int:
+    """
+    Преобразует ID узла ZeroTier (10 шестнадцатеричных символов) в целое число.
+    Внутри скрипта и в БД ID хранятся числами: это компактнее строк.
+
+    Raises:
+        ValueError: Если строка не является 40-битным шестнадцатеричным числом.
+    """
+    # int() допускает префикс 0x, знак, пробелы и "_": такие строки не ID
+    if len(node_id) != NODE_ID_HEX_LENGTH or not all(
+        char in string.hexdigits for char in node_id
+    ):
+        raise ValueError(node_id)
+    return int(node_id, 16)
+
+
+def node_id_to_hex(node_id: int) -> str:
+    """Преобразует числовой ID узла обратно в шестнадцатеричную строку."""
+    return f"{node_id:0{NODE_ID_HEX_LENGTH}x}"
+
+
 def load_zt_networks(t: Callable) -> list[dict]:
     """Загружает и валидирует сети ZeroTier из переменной окружения."""
     networks_json = _get_required_env(
         "ZEROTIER_NETWORKS_JSON", "zt_networks_json_not_found", t
     )
     try:
-        networks = json.loads(networks_json)
-        if not isinstance(networks, list):
-            raise ValueError(t("json_must_be_list"))
-        for network in networks:
-            if (
-                not isinstance(network, dict)
-                or "token" not in network
-                or "network_id" not in network
-            ):
-                raise ValueError(t("json_must_be_dict"))
-        return networks
-    except (json.JSONDecodeError, ValueError) as e:
+        return parse_zt_networks(networks_json, t)
+    except ValueError as e:
         exit_with_error(t("invalid_json_format", e=e), t)
     return []  # Недостижимо, но нужно для линтера
 
@@ -77,7 +140,11 @@ def load_zt_networks(t: Callable) -> list[dict]:
 def load_member_ids(t: Callable) -> list[str]:
     """Загружает ID участников из переменной окружения."""
     member_ids_csv = _get_required_env("MEMBER_IDS_CSV", "member_ids_csv_not_found", t)
-    return [item.strip() for item in member_ids_csv.split(",")]
+    try:
+        return parse_member_ids(member_ids_csv, t)
+    except ValueError as e:
+        exit_with_error(str(e), t)
+    return []  # Недостижимо, но нужно для линтера
 
 
 def load_check_interval(t: Callable) -> int:
@@ -94,9 +161,57 @@ def load_check_interval(t: Callable) -> int:
         return default_interval
 
 
+def load_non_negative_int(var_name: str, default: int, t: Callable) -> int:
+    """Загружает неотрицательное целое число из переменной окружения."""
+    try:
+        value = int(os.getenv(var_name, str(default)))
+        if value < 0:
+            raise ValueError(var_name)
+        return value
+    except (ValueError, TypeError):
+        print(t("invalid_int_setting", var=var_name, default=default))
+        return default
+
+
+def load_bool(var_name: str, default: bool) -> bool:
+    """Загружает логическое значение (true/false, 1/0, yes/no) из переменной окружения."""
+    value = os.getenv(var_name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def load_float(var_name: str, default: float, t: Callable) -> float:
+    """Загружает неотрицательное число с плавающей точкой из переменной окружения."""
+    try:
+        value = float(os.getenv(var_name, str(default)))
+        if value < 0:
+            raise ValueError(var_name)
+        return value
+    except (ValueError, TypeError):
+        print(t("invalid_int_setting", var=var_name, default=default))
+        return default
+
+
+def parse_datetime_arg(value: str, t: Callable) -> int:
+    """
+    Преобразует дату/время в формате ISO 8601 из аргумента командной строки
+    в миллисекунды Unix.
+
+    Raises:
+        argparse.ArgumentTypeError: Если формат даты некорректен.
+    """
+    try:
+        return int(datetime.fromisoformat(value).timestamp() * 1000)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            t("invalid_datetime_argument", value=value)
+        ) from None
+
+
 def now_datetime() -> str:
     """Возвращает текущую дату и время в строке формата YYYY-MM-DD HH:MM:SS."""
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return clock.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
 def get_seconds_since(last_online: int | None, time_ms: int | None) -> int: